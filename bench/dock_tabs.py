@@ -0,0 +1,42 @@
+# Cost of the DockTabs operations for growing tab counts.
+# Run from the repository root: python -m bench.dock_tabs
+import random
+import timeit
+
+from quacro.quacro_dock import DockTabs
+
+TAB_COUNTS = (10, 100, 1_000, 10_000)
+NUMBER = 100_000
+
+def bench(tab_count:int) -> dict[str, float]:
+    tabs = DockTabs()
+    hwnds = list(range(1, tab_count+1))
+    for hwnd in hwnds:
+        tabs.add(hwnd)
+    picks = [random.choice(hwnds) for _ in range(NUMBER)]
+    it = iter(picks)
+    new_hwnd = tab_count+1
+
+    def add_remove():
+        tabs.add(new_hwnd)
+        tabs.remove(new_hwnd)
+
+    results = {
+        "touch": timeit.timeit(lambda: tabs.touch(next(it)), number=NUMBER),
+        "add+remove": timeit.timeit(add_remove, number=NUMBER),
+        "most_recent": timeit.timeit(tabs.most_recent, number=NUMBER),
+        "contains": timeit.timeit(lambda: new_hwnd in tabs, number=NUMBER),
+    }
+    return {name: elapsed/NUMBER*1e9 for name, elapsed in results.items()}
+
+def main():
+    names = None
+    for tab_count in TAB_COUNTS:
+        results = bench(tab_count)
+        if names is None:
+            names = list(results)
+            print(f"{'tabs':>8}" + "".join(f"{name:>14}" for name in names))
+        print(f"{tab_count:>8}" + "".join(f"{results[name]:>11.0f} ns" for name in names))
+
+if __name__ == "__main__":
+    main()
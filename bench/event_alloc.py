@@ -0,0 +1,137 @@
+# Allocations of the decoded hook events, with tracemalloc.
+# Compares the __slots__ events with a __dict__ event like the one they
+# replaced, and the decode + lane queue flow with the EventMoveSize free
+# list (quacro_ipc.event_pool) off and on.
+# Run from the repository root: python -m bench.event_alloc
+import time
+import tracemalloc
+
+from quacro.quacro_ipc import (
+    EVENT_TYPE_ACTIVATE,
+    EVENT_TYPE_ICON_TITLE_UPDATE,
+    EVENT_TYPE_MOVE_SIZE,
+    EventMoveSize,
+    IPCQueueItem,
+    decode_event,
+    event_pool,
+)
+from quacro.quacro_event_queue import LaneEventQueue
+
+EVENT_COUNT = 10_000
+WINDOW_COUNT = 8
+# events put into the queue before the event loop catches up
+BATCH_SIZE = 16
+QPC_FREQUENCY = 10_000_000
+
+class DictEventMoveSize:
+    """EventMoveSize with an instance __dict__ and a rect tuple"""
+
+    def __init__(self, hwnd, rect):
+        self.enqueue_ns = 0
+        self.hook_ns = 0
+        self.hwnd = hwnd
+        self.rect = rect
+
+def make_items() -> list[IPCQueueItem]:
+    """3/4 move/size, the rest split between activate and icon/title updates"""
+    items = []
+    for index in range(EVENT_COUNT):
+        item = IPCQueueItem()
+        item.hwnd = index%WINDOW_COUNT+1
+        item.timestamp = index
+        if index%4!=3:
+            item.event_type = EVENT_TYPE_MOVE_SIZE
+            item.data.rect.left = index
+            item.data.rect.top = index
+            item.data.rect.right = index+800
+            item.data.rect.bottom = index+600
+        elif index%8==3:
+            item.event_type = EVENT_TYPE_ACTIVATE
+        else:
+            item.event_type = EVENT_TYPE_ICON_TITLE_UPDATE
+            item.data.icon_title_info.title_changed = 1
+        items.append(item)
+    return items
+
+def measure_retained(build) -> tuple[int, int]:
+    """Blocks and bytes still held by the objects `build` returns"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del objects
+    return blocks, size
+
+def run_flow(items:list[IPCQueueItem], seen:set[EventMoveSize]|None=None):
+    """Decode, queue and handle the events like the forwarder and the event loop"""
+    event_queue = LaneEventQueue()
+    for start in range(0, len(items), BATCH_SIZE):
+        for item in items[start:start+BATCH_SIZE]:
+            event = decode_event(item, QPC_FREQUENCY)
+            if seen is not None and type(event) is EventMoveSize:
+                seen.add(event)
+            event_queue.put(event)
+        while not event_queue.empty():
+            event_queue.get_nowait().release()
+
+def measure_flow(items:list[IPCQueueItem], pooled:bool):
+    event_pool.enabled = pooled
+    event_pool.free.clear()
+    try:
+        # keep every decoded event alive, so each allocation has its own identity
+        seen: set[EventMoveSize] = set()
+        run_flow(items, seen)
+        allocations = len(seen)
+        seen.clear()
+        event_pool.free.clear()
+
+        tracemalloc.start()
+        run_flow(items)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        event_pool.free.clear()
+
+        start_time = time.perf_counter()
+        run_flow(items)
+        elapsed = time.perf_counter()-start_time
+    finally:
+        event_pool.enabled = False
+        event_pool.free.clear()
+    label = "on" if pooled else "off"
+    print(
+        f"free list {label:>3}: {allocations:>5} EventMoveSize allocations, "
+        f"peak {peak/1024:7.1f} KiB, {elapsed*1e3:6.1f} ms"
+    )
+
+def main():
+    items = make_items()
+    move_size_count = sum(item.event_type==EVENT_TYPE_MOVE_SIZE for item in items)
+    print(
+        f"{EVENT_COUNT} events, {move_size_count} move/size, "
+        f"{WINDOW_COUNT} windows, batches of {BATCH_SIZE}"
+    )
+
+    blocks, size = measure_retained(
+        lambda: [decode_event(item, QPC_FREQUENCY) for item in items]
+    )
+    print(f"retained by {EVENT_COUNT} decoded events: {blocks} blocks, {size/1024:.0f} KiB")
+    rect = [0, 0, 800, 600]
+    for cls in (DictEventMoveSize, EventMoveSize):
+        # a new rect tuple per event, like the one built from the ipc record
+        blocks, size = measure_retained(
+            lambda: [cls(1, tuple(rect)) for _ in range(EVENT_COUNT)]
+        )
+        print(
+            f"{cls.__name__:>17}: {size/EVENT_COUNT:5.0f} bytes, "
+            f"{blocks/EVENT_COUNT:.1f} blocks per event"
+        )
+
+    for pooled in (False, True):
+        measure_flow(items, pooled)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,116 @@
+# Throughput and latency of the threaded and the asyncio event loops,
+# driven by the same producer thread and the same blocking calls.
+# Run from the repository root: python -m bench.event_loop
+import asyncio
+import queue
+import statistics
+import threading
+import time
+
+from quacro.quacro_ipc import EventCreateWindow
+from quacro.quacro_events import EventStop
+from quacro.quacro_event_queue import LaneEventQueue
+from quacro.quacro_dispatcher import Dispatcher, EventBlockingCallDone
+from quacro.quacro_async_event_loop import AsyncEventQueue, AsyncDispatcher
+
+EVENT_COUNT = 100_000
+# all submitted at once, so the dispatchers are allowed to hold them all
+BLOCKING_CALL_COUNT = 2_000
+WORKERS = 4
+
+def produce(event_queue:LaneEventQueue):
+    for hwnd in range(EVENT_COUNT):
+        event_queue.put(EventCreateWindow(hwnd))
+    event_queue.put(EventStop())
+
+def noop():
+    return time.perf_counter_ns()
+
+class Consumer:
+    """The part of a WindowManager the benchmark needs"""
+    latencies: list[int]
+    round_trips: list[int]
+    dispatcher: Dispatcher
+
+    def __init__(self, dispatcher:Dispatcher):
+        self.latencies = []
+        self.round_trips = []
+        self.dispatcher = dispatcher
+
+    def handle_event(self, event) -> None:
+        if isinstance(event, EventBlockingCallDone):
+            event.callback(event.result)
+            return
+        self.latencies.append(time.perf_counter_ns()-event.enqueue_ns)
+
+    def start_blocking_calls(self) -> None:
+        for _ in range(BLOCKING_CALL_COUNT):
+            submit_time = time.perf_counter_ns()
+            self.dispatcher.run_blocking(
+                noop,
+                callback=lambda _result, submit_time=submit_time:
+                    self.round_trips.append(time.perf_counter_ns()-submit_time),
+            )
+
+    def report(self, mode:str, elapsed:float) -> None:
+        latencies = sorted(self.latencies)
+        round_trips = sorted(self.round_trips)
+        print(
+            f"{mode:>8}: {len(latencies)/elapsed:>9.0f} events/s, "
+            f"latency p50 {statistics.median(latencies)/1e3:>8.1f} us "
+            f"p99 {latencies[len(latencies)*99//100]/1e3:>8.1f} us, "
+            f"blocking round trip p50 {statistics.median(round_trips)/1e3:>6.1f} us"
+        )
+
+def run_threaded():
+    event_queue = LaneEventQueue()
+    consumer = Consumer(Dispatcher(event_queue, WORKERS, BLOCKING_CALL_COUNT))
+    consumer.start_blocking_calls()
+    producer = threading.Thread(target=produce, args=(event_queue,))
+    start_time = time.perf_counter()
+    producer.start()
+    stopped = False
+    while not stopped or len(consumer.round_trips)<BLOCKING_CALL_COUNT:
+        try:
+            event = event_queue.get(timeout=1)
+        except queue.Empty:
+            break
+        if isinstance(event, EventStop):
+            stopped = True
+            continue
+        consumer.handle_event(event)
+    elapsed = time.perf_counter()-start_time
+    producer.join()
+    consumer.dispatcher.shutdown()
+    consumer.report("threaded", elapsed)
+
+async def run_asyncio():
+    event_queue = AsyncEventQueue()
+    event_queue.bind(asyncio.get_running_loop())
+    consumer = Consumer(AsyncDispatcher(event_queue, WORKERS, 5.0, BLOCKING_CALL_COUNT))
+    consumer.start_blocking_calls()
+    producer = threading.Thread(target=produce, args=(event_queue,))
+    start_time = time.perf_counter()
+    producer.start()
+    stopped = False
+    while not stopped or len(consumer.round_trips)<BLOCKING_CALL_COUNT:
+        try:
+            event = await event_queue.aget(1)
+        except TimeoutError:
+            break
+        if isinstance(event, EventStop):
+            stopped = True
+            continue
+        consumer.handle_event(event)
+    elapsed = time.perf_counter()-start_time
+    producer.join()
+    consumer.dispatcher.shutdown()
+    consumer.report("asyncio", elapsed)
+
+def main():
+    print(f"{EVENT_COUNT} events, {BLOCKING_CALL_COUNT} blocking calls on {WORKERS} workers")
+    run_threaded()
+    asyncio.run(run_asyncio())
+
+if __name__ == "__main__":
+    main()
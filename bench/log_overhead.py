@@ -0,0 +1,136 @@
+# Cost of a log call on the calling thread (the event loop) with the old
+# direct file handler and with the queue pipeline of quacro_logging.
+# A busy wait stands in for the GetWindowText round trip of format_window.
+# The last rows log a dock and a rect, like the move handler, with no window.
+# Run from the repository root: python -m bench.log_overhead
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+
+from quacro.quacro_logging import DeferredQueueHandler, Snapshot
+
+CALL_COUNT = 20_000
+TITLE_LOOKUP_NS = 50_000
+
+def busy_wait(duration_ns:int):
+    end = time.perf_counter_ns()+duration_ns
+    while time.perf_counter_ns()<end:
+        pass
+
+class FakeWindow(Snapshot):
+    """Formatted like WindowFormat, on the calling thread"""
+    __slots__ = ("hwnd",)
+
+    def __init__(self, hwnd:int):
+        self.hwnd = hwnd
+
+    def __str__(self):
+        busy_wait(TITLE_LOOKUP_NS)
+        return f"[{self.hwnd}]'title'"
+
+class FakeDeferred:
+    """Formatted by the listener thread"""
+    __slots__ = ("hwnd",)
+
+    def __init__(self, hwnd:int):
+        self.hwnd = hwnd
+
+    def __str__(self):
+        busy_wait(TITLE_LOOKUP_NS)
+        return f"[{self.hwnd}]'title'"
+
+def time_calls(logger:logging.Logger, call) -> float:
+    start_time = time.perf_counter_ns()
+    for hwnd in range(CALL_COUNT):
+        call(logger, hwnd)
+    return (time.perf_counter_ns()-start_time)/CALL_COUNT/1000
+
+def eager(logger:logging.Logger, hwnd:int):
+    logger.debug(f"Window activated: {FakeWindow(hwnd)}")
+
+def lazy_snapshot(logger:logging.Logger, hwnd:int):
+    logger.debug("Window activated: %s", FakeWindow(hwnd))
+
+def lazy_deferred(logger:logging.Logger, hwnd:int):
+    logger.debug("Window activated: %s", FakeDeferred(hwnd))
+
+class FakeDock:
+    """Formatted like Dock, by its repr"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return f'Dock(id {hex(id(self))})'
+
+DOCK = FakeDock()
+
+def eager_plain(logger:logging.Logger, hwnd:int):
+    logger.debug(f"{DOCK} move: {(hwnd, hwnd, hwnd+800, hwnd+600)}")
+
+def lazy_plain(logger:logging.Logger, hwnd:int):
+    logger.debug("%s move: %s", DOCK, (hwnd, hwnd, hwnd+800, hwnd+600))
+
+def direct_logger(log_path:str, level:int) -> tuple[logging.Logger, logging.Handler]:
+    handler = logging.handlers.WatchedFileHandler(log_path)
+    handler.setFormatter(logging.Formatter('[%(levelname)s] %(name)s: %(message)s'))
+    logger = logging.getLogger(f"bench.direct.{level}")
+    logger.propagate = False
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    return logger, handler
+
+def bench_direct(log_path:str, level:int, call) -> float:
+    logger, handler = direct_logger(log_path, level)
+    try:
+        return time_calls(logger, call)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+def bench_queue(log_path:str, level:int, call) -> tuple[float, float]:
+    """Return the cost per call and the time the listener needs to catch up"""
+    file_handler = logging.handlers.WatchedFileHandler(log_path)
+    file_handler.setFormatter(logging.Formatter('[%(levelname)s] %(name)s: %(message)s'))
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    queue_handler = DeferredQueueHandler(log_queue)
+    logger = logging.getLogger(f"bench.queue.{level}.{call.__name__}")
+    logger.propagate = False
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    try:
+        per_call = time_calls(logger, call)
+    finally:
+        start_time = time.perf_counter()
+        listener.stop()
+        drain = time.perf_counter()-start_time
+        logger.removeHandler(queue_handler)
+        file_handler.close()
+    return per_call, drain
+
+def main():
+    print(f"{CALL_COUNT} calls, {TITLE_LOOKUP_NS/1000:.0f} us title lookup")
+    with tempfile.TemporaryDirectory() as log_dir:
+        log_path = os.path.join(log_dir, "bench.log")
+        rows = [
+            ("file handler, eager f-string", bench_direct(log_path, logging.DEBUG, eager), None),
+            ("queue handler, snapshot arg", *bench_queue(log_path, logging.DEBUG, lazy_snapshot)),
+            ("queue handler, deferred arg", *bench_queue(log_path, logging.DEBUG, lazy_deferred)),
+            ("DEBUG disabled, eager f-string", bench_direct(log_path, logging.INFO, eager), None),
+            ("DEBUG disabled, snapshot arg", *bench_queue(log_path, logging.INFO, lazy_snapshot)),
+            ("queue handler, dock f-string", *bench_queue(log_path, logging.DEBUG, eager_plain)),
+            ("queue handler, dock lazy args", *bench_queue(log_path, logging.DEBUG, lazy_plain)),
+            ("DEBUG disabled, dock f-string", *bench_queue(log_path, logging.INFO, eager_plain)),
+            ("DEBUG disabled, dock lazy args", *bench_queue(log_path, logging.INFO, lazy_plain)),
+        ]
+    for name, per_call, drain in rows:
+        line = f"{name:<32} {per_call:>8.1f} us/call"
+        if drain is not None:
+            line += f"  (listener drained in {drain*1000:.0f} ms)"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Throughput of the mmap ring transport for several producer batch sizes.
+# Run from the repository root: python -m bench.transport
+import threading
+import time
+
+from quacro.quacro_events import EventStop
+from quacro.quacro_ipc import EVENT_TYPE_MOVE_SIZE, IPCQueueItem
+from quacro.quacro_transport import MmapRingTransport
+
+EVENT_COUNT = 200_000
+BATCH_SIZES = (1, 16, 64)
+CAPACITY = 256
+
+def make_batch(batch_size:int) -> list[IPCQueueItem]:
+    batch = []
+    for hwnd in range(batch_size):
+        item = IPCQueueItem()
+        item.event_type = EVENT_TYPE_MOVE_SIZE
+        item.hwnd = hwnd+1
+        item.data.rect.right = 800
+        item.data.rect.bottom = 600
+        batch.append(item)
+    return batch
+
+def produce(transport:MmapRingTransport, batch_size:int):
+    producer = transport.producer()
+    batch = make_batch(batch_size)
+    for _ in range(EVENT_COUNT//batch_size):
+        producer.put_batch(batch)
+        # let the consumer run like the hooked apps do between messages
+        time.sleep(0)
+    transport.send_stop()
+
+def bench(batch_size:int) -> tuple[float, int, int]:
+    transport = MmapRingTransport(capacity=CAPACITY, poll_interval=0.001)
+    transport.open()
+    producer = threading.Thread(target=produce, args=(transport, batch_size))
+    received = 0
+    start_time = time.perf_counter()
+    producer.start()
+    while not isinstance(transport.wait_event(), EventStop):
+        received += 1
+    elapsed = time.perf_counter()-start_time
+    producer.join()
+    dropped = transport.dropped_count()
+    transport.close()
+    return received/elapsed, received, dropped
+
+def main():
+    print(f"{EVENT_COUNT} events, ring capacity {CAPACITY}")
+    for batch_size in BATCH_SIZES:
+        rate, received, dropped = bench(batch_size)
+        print(
+            f"batch {batch_size:>3}: {rate:>9.0f} events/s, "
+            f"{received} received, {dropped} dropped"
+        )
+
+if __name__ == "__main__":
+    main()
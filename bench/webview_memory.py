@@ -0,0 +1,74 @@
+# Private memory of the WebView2 processes for N docks,
+# with [dock] shared_renderer off and on. Windows only.
+# Every mode runs in its own process, since the browser arguments
+# are read when the first webview is created.
+# Run from the repository root: python -m bench.webview_memory [dock count]
+import json
+import subprocess
+import sys
+import time
+
+DEFAULT_DOCK_COUNT = 8
+# let the renderers settle after the pages are loaded
+SETTLE_TIME = 5.0
+
+def run_child(dock_count:int, shared:bool):
+    from quacro import quacro_pywebview_inject
+    quacro_pywebview_inject.inject()
+    if shared:
+        quacro_pywebview_inject.enable_shared_renderer()
+
+    import webview
+    from quacro import quacro_web_data
+    from quacro.quacro_dock import webview_memory_stats
+
+    # created like the docks
+    windows = [
+        webview.create_window(
+            'QuacroDock',
+            hidden=True,
+            frameless=True,
+            resizable=False,
+            min_size=(0,0),
+            html=quacro_web_data.frontend_html
+        )
+        for _ in range(dock_count)
+    ]
+
+    def measure():
+        for window in windows:
+            window.events.loaded.wait()
+        time.sleep(SETTLE_TIME)
+        print(json.dumps(webview_memory_stats(windows[0], dock_count)))
+        for window in windows:
+            window.destroy()
+
+    webview.start(measure, gui="edgechromium", private_mode=False)
+
+def main():
+    dock_count = int(sys.argv[1]) if len(sys.argv)>1 else DEFAULT_DOCK_COUNT
+    for shared in (False, True):
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "bench.webview_memory",
+                "--child", str(dock_count), str(int(shared))
+            ],
+            capture_output=True, text=True, check=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        label = "on" if shared else "off"
+        processes = ", ".join(
+            f"{kind} {entry['count']}x {entry['private_mb']:.0f} MB"
+            for kind, entry in stats["processes"].items()
+        )
+        print(
+            f"shared_renderer {label:>3}: {dock_count} docks, "
+            f"{stats['total_private_mb']:.0f} MB total, "
+            f"{stats['per_dock_private_mb']:.1f} MB per dock ({processes})"
+        )
+
+if __name__=="__main__":
+    if len(sys.argv)>1 and sys.argv[1]=="--child":
+        run_child(int(sys.argv[2]), sys.argv[3]=="1")
+    else:
+        main()
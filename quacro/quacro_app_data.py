@@ -3,6 +3,9 @@ import sys
 import logging
 import typing
 import json
+import threading
+import time
+import zlib
 
 logger = logging.getLogger("app_data")
 
@@ -15,9 +18,13 @@ HP_DLL_PATH = os.path.join(
 )
 
 CACHE_PATH = os.path.join(APPDATA_PATH, "quacro_cache.json")
-
-CACHE_KEY_NULL = "NULL"
-CACHE_KEY_DOCK_WIDTH = "DOCK_WIDTH"
+METRICS_DUMP_PATH = os.path.join(APPDATA_PATH, "quacro_metrics.json")
+TRACE_DUMP_PATH = os.path.join(APPDATA_PATH, "quacro_trace.json")
+ARTIFACT_MANIFEST_PATH = os.path.join(APPDATA_PATH, "quacro_artifacts.json")
+STARTUP_TIMELINE_PATH = os.path.join(APPDATA_PATH, "quacro_startup.json")
+CLASSIFICATION_CACHE_PATH = os.path.join(
+    APPDATA_PATH, "quacro_classification_cache.json"
+)
 
 def create_dir_if_not_exist(path):
     if not os.path.exists(path):
@@ -32,9 +39,98 @@ def create_dir_if_not_exist(path):
 def init_app_data():
     create_dir_if_not_exist(APPDATA_PATH)
     create_dir_if_not_exist(LOG_PATH)
-    cache_get(CACHE_KEY_NULL, None) # init cache file
 
 
+def atomic_write_bytes(path:str, data:bytes):
+    """Write to a temp file then rename, readers never see a half-written file"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def digest_bytes(data:bytes) -> dict[str, int]:
+    return {"crc32": zlib.crc32(data), "size": len(data)}
+
+def digest_file(path:str) -> dict[str, int]|None:
+    try:
+        with open(path, "rb") as file:
+            return digest_bytes(file.read())
+    except OSError:
+        return None
+
+class ArtifactManifest:
+    """Digests of the artifacts extracted to the app data dir"""
+    path: str
+    # artifact name -> {"crc32", "size", "extract_ms"}
+    entries: dict[str, dict[str, typing.Any]]
+
+    def __init__(self, path:str):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path, "r", encoding="utf8") as manifest_file:
+                entries = json.load(manifest_file)
+            if type(entries) is dict:
+                self.entries = entries
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as err:
+            logger.warning(f"Ignoring invalid artifact manifest: {err}")
+
+    def save(self):
+        try:
+            atomic_write_bytes(
+                self.path, json.dumps(self.entries, indent=2).encode("utf8")
+            )
+        except OSError as err:
+            logger.error(f"Unable to write the artifact manifest: {err}")
+
+    def extract(self, name:str, src_path:str, dst_path:str) -> None:
+        """Copy `src_path` to `dst_path` unless the copy is up to date"""
+        start_time = time.perf_counter()
+        with open(src_path, "rb") as src_file:
+            data = src_file.read()
+        digest = digest_bytes(data)
+
+        entry = self.entries.get(name)
+        if (
+            entry is not None and
+            entry.get("crc32")==digest["crc32"] and
+            entry.get("size")==digest["size"] and
+            os.path.isfile(dst_path) and
+            os.path.getsize(dst_path)==digest["size"]
+        ):
+            elapsed_ms = (time.perf_counter()-start_time)*1000
+            logger.info(
+                f"'{name}' is up to date, extraction skipped in {elapsed_ms:.1f}ms "
+                f"(extracting took {entry.get('extract_ms', 0):.1f}ms)"
+            )
+            return
+
+        try:
+            atomic_write_bytes(dst_path, data)
+        except OSError as err:
+            # the dll can't be replaced while being loaded by hooked processes
+            logger.warning(f"Unable to write '{dst_path}': {err}")
+            logger.info("Falling back to verify")
+            if digest_file(dst_path)!=digest:
+                raise OSError(f"Unable to extract '{name}'")
+            logger.info(f"'{name}' is verified")
+        else:
+            logger.info(f"'{name}' is extracted")
+        digest["extract_ms"] = (time.perf_counter()-start_time)*1000
+        self.entries[name] = digest
+        self.save()
+
 def extract_hook_proc_dll():
     if getattr(sys, "frozen", False): # when running as exe
        HP_DLL_SRC_PATH = os.path.join(
@@ -44,89 +140,152 @@ def extract_hook_proc_dll():
         HP_DLL_SRC_PATH = os.path.join(
            "./", HP_DLL_NAME
         )
-    
-    src_file = open(HP_DLL_SRC_PATH, "rb")
-
-    try:
-        dst_file = open(HP_DLL_PATH, "wb")
-    except:
-        logger.warning(f"Unable to write '{HP_DLL_PATH}'")
-        logger.info("Falling back to read and verify")
-        
-        dst_file = open(HP_DLL_PATH, "rb")
-
-        if dst_file.read()!=src_file.read():
-            dst_file.close()
-            raise OSError("Unable to extract hook proc dll")
-        logger.info(f"Hook proc dll is verified")
-    else:
-        dst_file.write(src_file.read())
-        logger.info(f"Hook proc dll is extracted")
-    finally:
-        src_file.close()
-    dst_file.close()
-
-def _load_cache_json() -> dict[str, typing.Any]:
-    data: dict[str, typing.Any]
-    try:
-        cache_file = open(CACHE_PATH, "+r", encoding="utf8")
-    except FileNotFoundError as err:
-        logger.warning(f"Error when reading cache: {err}")
-        logger.info(f"Overwriting the cache file")
-        try:
-            with open(CACHE_PATH, "w", encoding="utf8") as cache_file:
-                data = {}
-                json.dump(data, cache_file)
-        except Exception as err:
-            logger.error(f"Unable to write the cache: {err}")
-    except Exception as err:
-        logger.error(f"Unable to open cache: {err}")
-    else:
-        try:
-            data = json.load(cache_file)
-            if type(data) is not dict:
-                raise ValueError("Invalid type of cache data")
-        except (
-            json.JSONDecodeError,
-            UnicodeDecodeError,
-            ValueError,
-        ) as err:
-            logger.warning(f"Error when decoding cache json: {err}")
-            logger.info(f"Overwriting the cache file")
-            cache_file.seek(0)
-            cache_file.truncate()
-            data = {}
-            json.dump(data, cache_file)
-        finally:
-            cache_file.close()
-    return data
-
-_cache_data:dict[str, typing.Any]|None = None
+    manifest = ArtifactManifest(ARTIFACT_MANIFEST_PATH)
+    manifest.extract(HP_DLL_NAME, HP_DLL_SRC_PATH, HP_DLL_PATH)
 
 T = typing.TypeVar("T")
 
-def cache_get(key:str, default:T) -> T:
-    global _cache_data
-    if _cache_data is None:
-        _cache_data = _load_cache_json()
+class CacheKey(typing.Generic[T]):
+    """A typed key of the cache store, stored as `data[namespace][name]`"""
+    namespace: str
+    name: str
+    value_type: type[T]
+
+    def __init__(self, namespace:str, name:str, value_type:type[T]):
+        self.namespace = namespace
+        self.name = name
+        self.value_type = value_type
+
+    def for_item(self, item:str) -> "CacheKey[T]":
+        """The same key in a separate namespace per item, e.g. per dock or per app"""
+        return CacheKey(f"{self.namespace}:{item}", self.name, self.value_type)
+
+    def __repr__(self):
+        return f"CacheKey({self.namespace}.{self.name})"
+
+CACHE_KEY_DOCK_WIDTH = CacheKey("dock", "width", int)
+
+# top level keys of the old cache format
+LEGACY_CACHE_KEYS: dict[str, CacheKey] = {
+    "DOCK_WIDTH": CACHE_KEY_DOCK_WIDTH,
+}
 
-    if key in _cache_data:
-        value = _cache_data[key]
-        if type(value) is not type(default):
+CACHE_FLUSH_DELAY = 5.0
+
+class CacheStore:
+    """
+    A json key-value store with write-behind.
+    `set` only marks the store dirty, the data is written by a timer thread
+    `flush_delay` seconds later, so several changes are written at once.
+    `close` writes the pending changes at shutdown.
+    """
+    path: str
+    flush_delay: float
+    _data: dict[str, dict[str, typing.Any]]|None
+    # (namespace, name) changed since the last flush
+    _dirty: set[tuple[str, str]]
+    _lock: threading.Lock
+    # held while writing the file, so flushes don't overtake each other
+    _write_lock: threading.Lock
+    _timer: threading.Timer|None
+    _closed: bool
+
+    def __init__(self, path:str, flush_delay:float=CACHE_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._data = None
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._closed = False
+
+    def _load(self) -> dict[str, dict[str, typing.Any]]:
+        if self._data is not None:
+            return self._data
+        data: dict[str, dict[str, typing.Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf8") as cache_file:
+                raw_data = json.load(cache_file)
+            if type(raw_data) is not dict:
+                raise ValueError("Invalid type of cache data")
+        except FileNotFoundError:
+            raw_data = {}
+        except (OSError, UnicodeDecodeError, ValueError) as err:
+            # json.JSONDecodeError is a ValueError
+            logger.warning(f"Error when reading cache: {err}")
+            logger.info("The cache is reset")
+            raw_data = {}
+        for namespace, values in raw_data.items():
+            if namespace in LEGACY_CACHE_KEYS:
+                key = LEGACY_CACHE_KEYS[namespace]
+                data.setdefault(key.namespace, {}).setdefault(key.name, values)
+            elif type(values) is dict:
+                data.setdefault(namespace, {}).update(values)
+        self._data = data
+        return data
+
+    def get(self, key:CacheKey[T], default:T) -> T:
+        with self._lock:
+            value = self._load().get(key.namespace, {}).get(key.name)
+        if type(value) is not key.value_type:
             return default
         return value
-    return default
 
-def cache_set(key:str, value:typing.Any):
-    global _cache_data
-    if _cache_data is None:
-        _cache_data = _load_cache_json()
-    _cache_data[key] = value
-    try:
-        with open(CACHE_PATH, "w") as cache_file:
-            json.dump(_cache_data, cache_file)
-    except Exception as err:
-        logger.error(f"Unable to write the cache: {err}")
+    def set(self, key:CacheKey[T], value:T) -> None:
+        if type(value) is not key.value_type:
+            raise TypeError(
+                f"{key} expects {key.value_type.__name__}, "
+                f"got {type(value).__name__}"
+            )
+        with self._lock:
+            values = self._load().setdefault(key.namespace, {})
+            if key.name in values and values[key.name]==value:
+                return
+            values[key.name] = value
+            self._dirty.add((key.namespace, key.name))
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Called with `_lock` held"""
+        if self._timer is None and not self._closed:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.name = "quacro_cache_flush"
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty or self._data is None:
+                    return
+                dirty = self._dirty
+                self._dirty = set()
+                data = json.dumps(self._data)
+            try:
+                atomic_write_bytes(self.path, data.encode("utf8"))
+            except OSError as err:
+                logger.error("Unable to write the cache: %s", err)
+                with self._lock:
+                    # retried by the next flush
+                    self._dirty |= dirty
+                    self._schedule_flush()
+                return
+        logger.debug("Cache flushed, %d keys changed", len(dirty))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            timer = self._timer
+        if timer is not None:
+            timer.cancel()
+        self.flush()
 
+cache_store = CacheStore(CACHE_PATH)
 
+def cache_get(key:CacheKey[T], default:T) -> T:
+    return cache_store.get(key, default)
 
+def cache_set(key:CacheKey[T], value:T) -> None:
+    cache_store.set(key, value)
@@ -0,0 +1,259 @@
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import time
+import traceback
+import typing
+
+from .quacro_events import Event, EventStop
+from .quacro_dispatcher import Dispatcher, measured
+from .quacro_event_queue import LaneEventQueue
+from .quacro_transport import HookEventTransport
+
+if typing.TYPE_CHECKING:
+    from .quacro_window_manager import WindowManager
+
+logger = logging.getLogger("async_loop")
+
+class AsyncEventQueue(LaneEventQueue):
+    """
+    A `LaneEventQueue` that can also be awaited.
+    `put` stays thread-safe and wakes up the bound asyncio loop.
+    Events put before the loop is bound are kept and read later.
+    """
+    loop: asyncio.AbstractEventLoop|None = None
+    _wakeup: asyncio.Event
+    # set while aget is waiting, so a busy loop is not woken up for every put
+    _waiting: bool = False
+
+    def bind(self, loop:asyncio.AbstractEventLoop):
+        self._wakeup = asyncio.Event()
+        self.loop = loop
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        loop = self.loop
+        if self._waiting and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def aget(self, timeout:float|None=None):
+        """
+        Raise TimeoutError if nothing is put within `timeout` seconds.
+        Only waiting goes through `asyncio.wait_for`,
+        since it costs a task for each call.
+        """
+        while 1:
+            try:
+                return self.get_nowait()
+            except queue.Empty:
+                pass
+            self._wakeup.clear()
+            self._waiting = True
+            try:
+                # check again, an item may be put before the flag is set
+                try:
+                    return self.get_nowait()
+                except queue.Empty:
+                    pass
+                if timeout is None:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+            finally:
+                self._waiting = False
+
+class AsyncDispatcher(Dispatcher):
+    """
+    Dispatcher for the asyncio event loop.
+    Results are posted back through the event queue like `Dispatcher`,
+    the loop only watches the calls that run longer than the timeout.
+    """
+    timeout: float
+
+    def __init__(self, event_queue, max_workers:int, timeout:float, max_pending:int=64):
+        super().__init__(event_queue, max_workers, max_pending)
+        self.timeout = timeout
+
+    def run_blocking(self, fn, *args, callback=None, errback=None, key=None) -> bool:
+        # called by the event handlers, on the loop thread
+        if not self._acquire(key):
+            return False
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        try:
+            future = self.executor.submit(
+                self._run_started, loop, started, measured(fn), *args
+            )
+        except RuntimeError:
+            self._done(key)
+            return False
+        future.add_done_callback(
+            lambda _future: self._post_result(_future, callback, errback, key)
+        )
+        loop.create_task(self._watch_timeout(started, future, fn))
+        return True
+
+    @staticmethod
+    def _run_started(loop:asyncio.AbstractEventLoop, started:asyncio.Future, fn, *args):
+        try:
+            loop.call_soon_threadsafe(_set_done, started)
+        except RuntimeError:
+            # the loop is closed
+            pass
+        return fn(*args)
+
+    async def _watch_timeout(self, started:asyncio.Future, future:concurrent.futures.Future, fn):
+        """Warn when the call runs longer than the timeout, the result is still delivered"""
+        finished = asyncio.wrap_future(future)
+        # errors are reported through the event queue
+        finished.add_done_callback(_retrieve)
+        # the time spent queued in the executor is not counted
+        await asyncio.wait((started, finished), return_when=asyncio.FIRST_COMPLETED)
+        if finished.done():
+            return
+        done, _ = await asyncio.wait((finished,), timeout=self.timeout)
+        if done:
+            return
+        fn_name = getattr(fn, "__name__", repr(fn))
+        logger.warning("Blocking call '%s' is still running after %ss", fn_name, self.timeout)
+
+def _set_done(future:asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+def _retrieve(future:asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+async def hook_events(transport:HookEventTransport) -> typing.AsyncIterator[Event]:
+    """Iterate hook events until the stop event is sent"""
+    while 1:
+        # waiting in the transport can't be cancelled, use send_stop to end it
+        event = await asyncio.to_thread(transport.wait_event)
+        if isinstance(event, EventStop):
+            return
+        yield event
+
+class AsyncEventLoopRunner:
+    """
+    Run both the hook event forwarder and the event loop
+    of a `WindowManager` on one asyncio loop.
+    Events with an `async def` handler in `WindowManager.async_event_handlers`
+    are handled by a task each, cancelled after `handler_timeout` seconds,
+    so the loop goes on with the next event while they wait.
+    Shutdown is done by cancelling the main task.
+    """
+    window_manager: "WindowManager"
+    event_queue: AsyncEventQueue
+    slow_handler_threshold: float
+    handler_timeout: float
+    # running async handlers, cancelled on shutdown
+    handler_tasks: set[asyncio.Task]
+    loop: asyncio.AbstractEventLoop|None = None
+    main_task: asyncio.Task|None = None
+
+    def __init__(
+            self,
+            window_manager:"WindowManager",
+            slow_handler_threshold:float,
+            handler_timeout:float
+        ):
+        self.window_manager = window_manager
+        assert isinstance(window_manager.event_queue, AsyncEventQueue)
+        self.event_queue = window_manager.event_queue
+        self.slow_handler_threshold = slow_handler_threshold
+        self.handler_timeout = handler_timeout
+        self.handler_tasks = set()
+
+    def run(self):
+        """Target of the event loop thread"""
+        asyncio.run(self.main())
+        logger.info("async event loop ended")
+
+    def stop(self):
+        """Thread-safe"""
+        self.window_manager.transport.send_stop()
+        loop = self.loop
+        main_task = self.main_task
+        if loop is not None and main_task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(main_task.cancel)
+
+    async def forward_hook_events(self):
+        async for event in hook_events(self.window_manager.transport):
+            self.window_manager.queue_hook_event(event)
+        logger.info("hook event forwarder task ended")
+
+    def handle_event(self, event:Event):
+        async_handler = self.window_manager.async_event_handlers.get(type(event))
+        if async_handler is not None:
+            task = asyncio.create_task(self.run_async_handler(async_handler, event))
+            self.handler_tasks.add(task)
+            task.add_done_callback(self.handler_tasks.discard)
+            return
+        # sync handlers, blocking works have been sent to the dispatcher
+        start_time = time.perf_counter()
+        self.window_manager.handle_event(event)
+        elapsed = time.perf_counter()-start_time
+        if elapsed>self.slow_handler_threshold:
+            logger.warning(
+                f"Handling '{type(event).__name__}' took {elapsed:.3f}s"
+            )
+
+    async def run_async_handler(self, handler, event:Event):
+        try:
+            await asyncio.wait_for(handler(event), self.handler_timeout)
+        except TimeoutError:
+            logger.warning(
+                "Handling '%s' timed out after %ss, cancelled",
+                type(event).__name__, self.handler_timeout
+            )
+        except Exception:
+            logger.error(
+                "Error occured in async handler of '%s':\n%s",
+                type(event).__name__, traceback.format_exc()
+            )
+        finally:
+            event.release()
+
+    async def cancel_handler_tasks(self):
+        for task in list(self.handler_tasks):
+            task.cancel()
+        await asyncio.gather(*self.handler_tasks, return_exceptions=True)
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.main_task = asyncio.current_task()
+        self.event_queue.bind(self.loop)
+        window_manager = self.window_manager
+
+        window_manager.enumerate_windows()
+
+        transport = window_manager.transport
+        transport.open()
+        window_manager.attach_interest_table()
+        forwarder_task = None
+        try:
+            transport.start_producer()
+            forwarder_task = asyncio.create_task(self.forward_hook_events())
+            while 1:
+                timeout = window_manager.run_timers()
+                try:
+                    event = await self.event_queue.aget(timeout)
+                except TimeoutError:
+                    continue
+                if isinstance(event, EventStop):
+                    break
+                self.handle_event(event)
+        except asyncio.CancelledError:
+            logger.info("async event loop cancelled")
+        finally:
+            transport.send_stop()
+            await self.cancel_handler_tasks()
+            if forwarder_task is not None:
+                # wait for the C side to return before deinit
+                await asyncio.gather(forwarder_task, return_exceptions=True)
+            transport.stop_producer()
+            window_manager.detach_interest_table()
+            transport.close()
+            window_manager.finish_event_loop()
@@ -1,43 +1,30 @@
 import ctypes
-import ctypes.wintypes
-
-from .quacro_events import Event, EventStop
-
-SCRIPT_ABI_VERSION = (0, 0, 2)
-
-EVENT_TYPE_STOP = 0
-EVENT_TYPE_CREATE_WINDOW = 1
-EVENT_TYPE_DESTROY_WINDOW = 2
-EVENT_TYPE_MOVE_SIZE = 3
-EVENT_TYPE_ACTIVATE = 4
-EVENT_TYPE_ICON_TITLE_UPDATE = 5
-EVENT_TYPE_MINIMIZED = 6
-
-if ctypes.sizeof(ctypes.c_voidp) == 8:
-    # 64bit windows
-    HWND = ctypes.c_uint64
-else:
-    # 32bit windows
-    HWND = ctypes.c_uint32 # type: ignore
-
-class ActivateInfo(ctypes.Structure):
-    _fields_ = [
-        ("inactive", ctypes.wintypes.BOOL),
-        ("minimized", ctypes.wintypes.BOOL),
-    ]
-
-class EventData(ctypes.Union):
-    _fields_ = [
-        ("rect", ctypes.wintypes.RECT),
-        ("activate_info", ActivateInfo)
-    ]
-
-class _IPCQueueItem(ctypes.Structure):
-    _fields_ = [
-        ("event_type", ctypes.c_int32),
-        ("hwnd", HWND),
-        ("data", EventData),
-    ]
+
+from .quacro_ipc import (
+    EVENT_TYPE_STOP,
+    EVENT_TYPE_CREATE_WINDOW,
+    EVENT_TYPE_DESTROY_WINDOW,
+    EVENT_TYPE_MOVE_SIZE,
+    EVENT_TYPE_ACTIVATE,
+    EVENT_TYPE_ICON_TITLE_UPDATE,
+    EVENT_TYPE_MINIMIZED,
+    HWND,
+    IPCQueueItem as _IPCQueueItem,
+    InterestTable,
+    WindowEvent,
+    EventCreateWindow,
+    EventDestroyWindow,
+    EventMoveSize,
+    EventActivate,
+    EventIconTitleUpdate,
+    EventMinimized,
+)
+from .quacro_transport import (
+    HookEventTransport,
+    MmapRingTransport,
+)
+
+SCRIPT_ABI_VERSION = (0, 0, 6)
 
 dll = ctypes.cdll.LoadLibrary("./quacro_utils.dll")
 
@@ -67,73 +54,66 @@ _wait_for_hook_event.restype = ctypes.c_int
 _wait_for_hook_event.errcheck = error_check
 
 
-class WindowEvent(Event):
-    hwnd: int
-
-    def __init__(self, hwnd):
-        self.hwnd = hwnd
-
-class EventCreateWindow(WindowEvent):
-    pass
-
-class EventDestroyWindow(WindowEvent):
-    pass
-
-class EventMoveSize(WindowEvent):
-    rect: tuple[int, int, int, int]
-
-    def __init__(self, hwnd, rect):
-        super().__init__(hwnd)
-        self.rect = rect
-
-class EventActivate(WindowEvent):
-    inactive: bool
-    minimized: bool
-
-    def __init__(self, hwnd, inactive, minimized):
-        super().__init__(hwnd)
-        self.inactive = bool(inactive)
-        self.minimized = bool(minimized)
-
-class EventIconTitleUpdate(WindowEvent):
-    pass
-
-class EventMinimized(WindowEvent):
-    pass
-
-def wait_for_hook_event() -> Event:
-    event = _IPCQueueItem()
-    event_id = _wait_for_hook_event(ctypes.byref(event))
-    if event_id==EVENT_TYPE_STOP:
-        return EventStop()
-    if event_id==EVENT_TYPE_CREATE_WINDOW:
-        return EventCreateWindow(event.hwnd)
-    if event_id==EVENT_TYPE_DESTROY_WINDOW:
-        return EventDestroyWindow(event.hwnd)
-    if event_id==EVENT_TYPE_MOVE_SIZE:
-        rect = (
-            event.data.rect.left,
-            event.data.rect.top,
-            event.data.rect.right,
-            event.data.rect.bottom,
-        )
-        return EventMoveSize(event.hwnd, rect)
-    if event_id==EVENT_TYPE_ACTIVATE:
-        return EventActivate(
-            event.hwnd,
-            event.data.activate_info.inactive,
-            event.data.activate_info.minimized
-        )
-    if event_id==EVENT_TYPE_ICON_TITLE_UPDATE:
-        return EventIconTitleUpdate(event.hwnd)
-    if event_id==EVENT_TYPE_MINIMIZED:
-        return EventMinimized(event.hwnd)
-    raise OSError(f"Unknown event type id {event_id}")
-
 send_stop_event = dll.send_stop_event
 send_stop_event.argtypes = ()
 send_stop_event.restype = None
 
+get_dropped_event_count = dll.get_dropped_event_count
+get_dropped_event_count.argtypes = ()
+get_dropped_event_count.restype = ctypes.c_uint32
+
+_get_interest_table = dll.get_interest_table
+_get_interest_table.argtypes = ()
+_get_interest_table.restype = ctypes.POINTER(InterestTable)
+
+def get_interest_table() -> InterestTable|None:
+    """The table in the shared memory, available after event_queue_init"""
+    table_ptr = _get_interest_table()
+    if not table_ptr:
+        return None
+    return table_ptr.contents
+
+def _get_qpc_frequency() -> int:
+    frequency = ctypes.c_int64()
+    ctypes.windll.kernel32.QueryPerformanceFrequency(ctypes.byref(frequency))
+    return frequency.value
+
+class Win32RingTransport(HookEventTransport):
+    """
+    The ring in the named shared memory of quacro_utils.dll,
+    filled by the global hook in quacro_hook_proc.dll
+    """
+    timestamp_frequency = _get_qpc_frequency()
+
+    def open(self):
+        event_queue_init()
+
+    def close(self):
+        event_queue_deinit()
+
+    def start_producer(self):
+        setup_hook()
+
+    def stop_producer(self):
+        unins_hook()
+
+    def send_stop(self):
+        send_stop_event()
+
+    def dropped_count(self) -> int:
+        return get_dropped_event_count()
+
+    def interest_table(self) -> InterestTable|None:
+        return get_interest_table()
+
+    def _wait_item(self) -> _IPCQueueItem|None:
+        item = _IPCQueueItem()
+        event_id = _wait_for_hook_event(ctypes.byref(item))
+        if event_id==EVENT_TYPE_STOP:
+            # the stop event is not read from the ring
+            return None
+        return item
+
 _get_abi_version = dll.get_abi_version
 _get_abi_version.argtypes = (
     ctypes.POINTER(ctypes.c_uint16),
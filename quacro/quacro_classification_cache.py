@@ -0,0 +1,82 @@
+import json
+import logging
+import typing
+import zlib
+
+from . import quacro_win32, quacro_app_data
+
+logger = logging.getLogger("classification_cache")
+
+CACHE_FORMAT_VERSION = 1
+
+# (hwnd, pid, process start time, class name)
+WindowIdentity: typing.TypeAlias = tuple[int, int, int, str]
+
+def config_hash(window_groups_config_dict:dict) -> int:
+    """Entries made with another window group config are not trusted"""
+    config_json = json.dumps(window_groups_config_dict, sort_keys=True, default=str)
+    return zlib.crc32(config_json.encode("utf8"))
+
+def get_window_identity(hwnd:int) -> WindowIdentity|None:
+    """None if the window can't be identified stably"""
+    _, pid = quacro_win32.get_window_thread_process_id(hwnd)
+    if pid==0:
+        return None
+    start_time = quacro_win32.get_process_start_time(pid)
+    if start_time==0:
+        return None
+    class_name = quacro_win32.get_window_class_name(hwnd)
+    return (hwnd, pid, start_time, class_name)
+
+class ClassificationCache:
+    """Group membership of the windows, saved on quit and trusted on startup"""
+    config_hash: int
+    # identity -> names of the groups the window was in
+    entries: dict[WindowIdentity, list[str]]
+
+    def __init__(self, config_hash:int):
+        self.config_hash = config_hash
+        self.entries = {}
+
+    def load(self, path:str) -> None:
+        try:
+            with open(path, "r", encoding="utf8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as err:
+            logger.warning(f"Unable to read the classification cache: {err}")
+            return
+        if (
+            type(data) is not dict or
+            data.get("version")!=CACHE_FORMAT_VERSION or
+            data.get("config_hash")!=self.config_hash
+        ):
+            logger.info("Classification cache is outdated, ignored")
+            return
+        try:
+            for hwnd, pid, start_time, class_name, group_names in data["windows"]:
+                self.entries[(hwnd, pid, start_time, class_name)] = group_names
+        except (KeyError, TypeError, ValueError) as err:
+            logger.warning(f"Invalid classification cache: {err}")
+            self.entries.clear()
+
+    def lookup(self, identity:WindowIdentity) -> list[str]|None:
+        return self.entries.get(identity)
+
+    def save(self, path:str, memberships:dict[WindowIdentity, list[str]]) -> None:
+        data = {
+            "version": CACHE_FORMAT_VERSION,
+            "config_hash": self.config_hash,
+            "windows": [
+                [*identity, group_names]
+                for identity, group_names in memberships.items()
+            ],
+        }
+        data_json = json.dumps(data, separators=(",", ":"))
+        try:
+            quacro_app_data.atomic_write_bytes(path, data_json.encode("utf8"))
+        except OSError as err:
+            logger.error(f"Unable to write the classification cache: {err}")
+            return
+        logger.info(f"Classification cache saved, {len(memberships)} windows")
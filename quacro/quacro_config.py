@@ -1,12 +1,113 @@
 import typing
 import tomllib
 
-from . import quacro_window_filters
+from . import quacro_window_filters, quacro_dock_keys
 from .quacro_window_group import WindowGrup
 from .quacro_errors import ConfigError
 
+def get_section(config_dict:dict, section_name:str) -> dict:
+    if section_name not in config_dict:
+        return {}
+    if type(config_dict[section_name]) is not dict:
+        raise ConfigError(f"Type of config '{section_name}' must be dict")
+    return config_dict[section_name]
+
+def get_number_option(
+        section:dict,
+        section_name:str,
+        option_name:str,
+        default:float
+    ) -> float:
+    if option_name not in section:
+        return default
+    value = section[option_name]
+    if type(value) not in (int, float):
+        raise ConfigError(f"Type of '{section_name}.{option_name}' must be number")
+    if value<0:
+        raise ConfigError(f"'{section_name}.{option_name}' must not be negative")
+    return float(value)
+
+def get_int_option(
+        section:dict,
+        section_name:str,
+        option_name:str,
+        default:int,
+        minimum:int=0
+    ) -> int:
+    if option_name not in section:
+        return default
+    value = section[option_name]
+    if type(value) is not int:
+        raise ConfigError(f"Type of '{section_name}.{option_name}' must be int")
+    if value<minimum:
+        raise ConfigError(f"'{section_name}.{option_name}' must not be less than {minimum}")
+    return value
+
+def get_bool_option(
+        section:dict,
+        section_name:str,
+        option_name:str,
+        default:bool
+    ) -> bool:
+    if option_name not in section:
+        return default
+    value = section[option_name]
+    if type(value) is not bool:
+        raise ConfigError(f"Type of '{section_name}.{option_name}' must be bool")
+    return value
+
 class Config:
+    path:str
     window_groups_config_dict:dict
+    dock_key_config_dict:dict
+    dock_config_dict:dict
+
+    # seconds
+    icon_title_quiet_period:float
+    icon_title_max_wait:float
+    # docks share one WebView2 renderer process, needs restart.
+    # Saves the memory of a renderer per dock,
+    # but a renderer crash takes down every dock.
+    shared_renderer:bool
+
+    event_loop_config_dict:dict
+    # "thread" or "asyncio"
+    event_loop_mode:str
+    blocking_workers:int
+    # blocking calls queued or running at most
+    blocking_max_pending:int
+    # seconds, only used in asyncio mode
+    blocking_call_timeout:float
+    slow_handler_threshold:float
+    # async handlers are cancelled after it
+    handler_timeout:float
+    # seconds a lower priority lane of the event queue can wait at most
+    lane_max_wait:float
+    lane_burst_limit:int
+    # drop the events of untracked windows in the hook
+    hook_source_filter:bool
+    # seconds between two sweeps for leaked windows, 0 to disable
+    sweep_interval:float
+    # windows checked per idle tick
+    sweep_batch_size:int
+    # trust the group membership saved on the last quit when starting up
+    classification_cache:bool
+    # seconds between two checks of the config file for changes, 0 to disable
+    config_watch_interval:float
+    # reuse the move/size event objects
+    event_free_list:bool
+
+    diagnostics_config_dict:dict
+    metrics_enabled:bool
+    tracing_enabled:bool
+    # max number of spans kept in the trace ring buffer
+    trace_buffer_size:int
+    # seconds a handler can run before a stall report is written, 0 to disable
+    stall_threshold:float
+    # min seconds between two stall reports
+    stall_report_interval:float
+    # write the startup timeline to quacro_startup.json
+    startup_timeline_json:bool
     @classmethod
     def load_config(cls, config_path):
         try:
@@ -18,11 +119,111 @@ class Config:
             raise ConfigError(f"Unable to decode config file:\n{err}")
 
         self = cls()
+        self.path = config_path
         if "window_groups" not in config_dict:
             raise ConfigError("Section [window_groups] is not exist")
         if type(config_dict["window_groups"]) is not dict:
             raise ConfigError("Type of config 'window_groups' must be dict")
         self.window_groups_config_dict = config_dict["window_groups"]
+
+        self.dock_key_config_dict = get_section(config_dict, "dock_key")
+
+        self.dock_config_dict = get_section(config_dict, "dock")
+        self.icon_title_quiet_period = get_number_option(
+            self.dock_config_dict, "dock",
+            "icon_title_quiet_period", 0.25
+        )
+        self.icon_title_max_wait = get_number_option(
+            self.dock_config_dict, "dock",
+            "icon_title_max_wait", 1.0
+        )
+        self.shared_renderer = get_bool_option(
+            self.dock_config_dict, "dock",
+            "shared_renderer", False
+        )
+
+        self.event_loop_config_dict = get_section(config_dict, "event_loop")
+        self.blocking_workers = get_int_option(
+            self.event_loop_config_dict, "event_loop",
+            "blocking_workers", 4, minimum=1
+        )
+        self.blocking_max_pending = get_int_option(
+            self.event_loop_config_dict, "event_loop",
+            "blocking_max_pending", 64, minimum=1
+        )
+        self.event_loop_mode = self.event_loop_config_dict.get("mode", "thread")
+        if self.event_loop_mode not in ("thread", "asyncio"):
+            raise ConfigError("Value of 'event_loop.mode' must in ('thread', 'asyncio')")
+        self.blocking_call_timeout = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "blocking_call_timeout", 5.0
+        )
+        self.slow_handler_threshold = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "slow_handler_threshold", 0.5
+        )
+        self.handler_timeout = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "handler_timeout", 5.0
+        )
+        self.lane_max_wait = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "lane_max_wait", 0.05
+        )
+        self.lane_burst_limit = get_int_option(
+            self.event_loop_config_dict, "event_loop",
+            "lane_burst_limit", 16, minimum=1
+        )
+        self.hook_source_filter = get_bool_option(
+            self.event_loop_config_dict, "event_loop",
+            "hook_source_filter", True
+        )
+        self.sweep_interval = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "sweep_interval", 30.0
+        )
+        self.sweep_batch_size = get_int_option(
+            self.event_loop_config_dict, "event_loop",
+            "sweep_batch_size", 32, minimum=1
+        )
+        self.classification_cache = get_bool_option(
+            self.event_loop_config_dict, "event_loop",
+            "classification_cache", True
+        )
+        self.config_watch_interval = get_number_option(
+            self.event_loop_config_dict, "event_loop",
+            "config_watch_interval", 1.0
+        )
+        self.event_free_list = get_bool_option(
+            self.event_loop_config_dict, "event_loop",
+            "event_free_list", False
+        )
+
+        self.diagnostics_config_dict = get_section(config_dict, "diagnostics")
+        self.metrics_enabled = get_bool_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "metrics", False
+        )
+        self.tracing_enabled = get_bool_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "tracing", False
+        )
+        self.trace_buffer_size = get_int_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "trace_buffer_size", 100000, minimum=1
+        )
+        self.stall_threshold = get_number_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "stall_threshold", 2.0
+        )
+        self.stall_report_interval = get_number_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "stall_report_interval", 60.0
+        )
+        self.startup_timeline_json = get_bool_option(
+            self.diagnostics_config_dict, "diagnostics",
+            "startup_timeline", False
+        )
         return self
 
     def load_window_filter_config(self) -> tuple:
@@ -121,3 +322,12 @@ class Config:
         
         return groups,zero_level_groups,primary_group
     # END def load_window_filter_config
+
+    def load_dock_key_config(
+            self,
+            window_groups:dict[str, WindowGrup]
+        ) -> quacro_dock_keys.DockKey:
+        return quacro_dock_keys.generate_dock_key(
+            self.dock_key_config_dict,
+            window_groups,
+        )
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import time
+import typing
+import zlib
+
+from . import quacro_config, quacro_dock_keys
+from .quacro_window_group import WindowGrup
+from .quacro_errors import ConfigError
+
+logger = logging.getLogger("config_reload")
+
+# sections that are only read on startup
+RESTART_REQUIRED_SECTIONS = ("event_loop", "diagnostics")
+
+def group_signatures(window_groups_config_dict:dict) -> dict[str, int]:
+    """
+    The signature of a group changes when its config,
+    or the config of any group it takes windows from, changes.
+    Only call it with a validated config, loops are not checked here.
+    """
+    signatures: dict[str, int] = {}
+
+    def signature(name:str) -> int:
+        if name in signatures:
+            return signatures[name]
+        cfg = window_groups_config_dict[name]
+        source_names = cfg.get("source_groups")
+        if type(source_names) is list:
+            sources = [signature(source_name) for source_name in source_names]
+        else:
+            sources = []
+        cfg_json = json.dumps(
+            [cfg, sources], sort_keys=True, default=str
+        )
+        signatures[name] = zlib.crc32(cfg_json.encode("utf8"))
+        return signatures[name]
+
+    for name in window_groups_config_dict:
+        signature(name)
+    return signatures
+
+def topological_order(window_groups:dict[str, WindowGrup]) -> list[WindowGrup]:
+    """Groups sorted so that every group comes after its source groups"""
+    ordered: list[WindowGrup] = []
+    source_count = {
+        group: len(group.source_groups) for group in window_groups.values()
+    }
+    ready = [group for group, count in source_count.items() if count==0]
+    while ready:
+        group = ready.pop()
+        ordered.append(group)
+        for sink in group.sink_groups:
+            source_count[sink] -= 1
+            if source_count[sink]==0:
+                ready.append(sink)
+    return ordered
+
+class ConfigWatcher:
+    """
+    Poll the modification time and the size of the config file.
+    A change is reported once the file stays the same for one interval,
+    so a file being saved is not read half-written.
+    """
+    path: str
+    interval: float
+    next_time: float
+    # (mtime, size) of the loaded config, None if the file is missing
+    signature: tuple[int, int]|None
+    # a change waiting for the file to settle
+    pending: tuple[int, int]|None
+
+    def __init__(self, path:str, interval:float, now:float):
+        self.path = path
+        self.interval = interval
+        self.next_time = now+interval
+        self.signature = self._stat()
+        self.pending = None
+
+    def _stat(self) -> tuple[int, int]|None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self, now:float) -> bool:
+        """Return True if the config file has changed"""
+        if now<self.next_time:
+            return False
+        self.next_time = now+self.interval
+        signature = self._stat()
+        if signature==self.signature or signature is None:
+            self.pending = None
+            return False
+        if signature!=self.pending:
+            self.pending = signature
+            return False
+        self.signature = signature
+        self.pending = None
+        return True
+
+    def retry(self):
+        """Report the current change again on the next poll"""
+        self.signature = None
+
+class ConfigReload:
+    """A config loaded off the event loop, with the group membership re-evaluated"""
+    config: quacro_config.Config
+    window_groups: dict[str, WindowGrup]
+    zero_level_groups: list[WindowGrup]
+    primary_group: WindowGrup
+    dock_key: quacro_dock_keys.DockKey
+    # names of the groups that have been re-evaluated
+    changed_groups: list[str]
+    # dock keys of the windows in the new primary group
+    window_keys: dict[int, typing.Hashable]
+    # the windows the membership was evaluated against
+    windows: frozenset[int]
+    evaluate_time: float
+
+def prepare_config_reload(
+        config_path:str,
+        old_signatures:dict[str, int],
+        old_memberships:dict[str, set[int]],
+        windows:frozenset[int],
+    ) -> ConfigReload|ConfigError:
+    """
+    Runs on a blocking worker.
+    Groups with unchanged signatures keep their windows,
+    the filters of the others are evaluated against `windows`.
+    """
+    try:
+        config = quacro_config.Config.load_config(config_path)
+        window_groups, zero_level_groups, primary_group = (
+            config.load_window_filter_config()
+        )
+        dock_key = config.load_dock_key_config(window_groups)
+    except ConfigError as err:
+        return err
+
+    start_time = time.perf_counter()
+    signatures = group_signatures(config.window_groups_config_dict)
+    changed_groups = []
+    for group in topological_order(window_groups):
+        if (
+            group.name in old_memberships and
+            old_signatures.get(group.name)==signatures[group.name]
+        ):
+            group.current_windows = old_memberships[group.name]&windows
+            continue
+        changed_groups.append(group.name)
+        if group.source_groups:
+            candidates: set[int] = set()
+            for source in group.source_groups:
+                candidates |= source.current_windows
+        else:
+            candidates = set(windows)
+        group.current_windows = {
+            hwnd for hwnd in candidates if group.filter_window(hwnd)
+        }
+
+    reload = ConfigReload()
+    reload.config = config
+    reload.window_groups = window_groups
+    reload.zero_level_groups = zero_level_groups
+    reload.primary_group = primary_group
+    reload.dock_key = dock_key
+    reload.changed_groups = changed_groups
+    # the memberships are complete here, no need to run the filters again
+    reload.window_keys = {
+        hwnd: dock_key.identify(hwnd, {
+            group: hwnd in group.current_windows
+            for group in window_groups.values()
+        })
+        for hwnd in primary_group.current_windows
+    }
+    reload.windows = windows
+    reload.evaluate_time = time.perf_counter()-start_time
+    return reload
@@ -1,10 +1,14 @@
+import json
 import logging
+import queue
 import traceback
 import threading
+import typing
 
 import webview
 import clr
 
+from . import quacro_i18n
 from .quacro_logging import warn_tb
 from .quacro_i18n import _
 
@@ -38,71 +42,176 @@ def callback(fn):
             )
     return _fn
 
-def init_context_menu(window:webview.Window):
-    if window.native is None:
-        raise RuntimeError(f"Window {window} is not initiallized")
-    if window.native.webview is None:
-        raise RuntimeError(f"Window {window} webview is not initiallized")
+class ContextMenuWorker:
+    """
+    A long-lived thread that fetches the menu model from the frontend,
+    for the menu requests made before the model is pushed. Shared by all docks.
+    """
+    _queue: queue.SimpleQueue
+    _thread: threading.Thread|None
+    _lock: threading.Lock
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn:typing.Callable[[], None]):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run,
+                    name="quacro_context_menu",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._queue.put(fn)
+
+    def run(self):
+        while 1:
+            callback(self._queue.get())()
+
+worker = ContextMenuWorker()
+
+# the model before the frontend pushes one
+MENU_MODEL_UNKNOWN = object()
+
+MenuModel: typing.TypeAlias = tuple[int, tuple[str|None, ...]]
+
+def parse_menu_model(menu) -> MenuModel|None:
+    """Validate the model sent by the frontend: {"tab_id": int, "items": [str|None]}"""
+    if menu is None:
+        return None
+    if type(menu) is not dict or type(menu.get("items")) is not list:
+        warn_tb(logger, f"Ignoring unknown menu type '{type(menu).__name__}'. A 'dict' was expected")
+        return None
+    tab_id = menu.get("tab_id")
+    if type(tab_id) is not int:
+        warn_tb(logger, f"Ignoring menu of invalid tab id {tab_id!r}")
+        return None
+    items = []
+    for menu_item_key in menu["items"]:
+        if menu_item_key is not None and type(menu_item_key) is not str:
+            warn_tb(logger, f"Ignoring unknown menu item type '{type(menu_item_key).__name__}'. A 'str' was expected")
+            continue
+        items.append(menu_item_key)
+    return (tab_id, tuple(items))
+
+class DockContextMenu:
+    """
+    Context menu of a dock. The menu model is pushed by the frontend
+    when the hovered tab changes, and the menu items are built once
+    per language and reused, so a right click is served on the UI thread.
+    """
+    window: webview.Window
+    model: typing.Any # MenuModel|None|MENU_MODEL_UNKNOWN
+    # push sequence of `model`, js api calls run on their own threads
+    # and may arrive out of order
+    model_seq: int
+    _lock: threading.Lock
+    # (language code, position, key) -> CoreWebView2ContextMenuItem
+    items: dict[tuple[str, int, str|None], typing.Any]
+    # tab of the menu being shown, read by the menu item commands
+    menu_tab_id: int|None
+
+    def __init__(self, window:webview.Window):
+        self.window = window
+        self.model = MENU_MODEL_UNKNOWN
+        self.model_seq = 0
+        self._lock = threading.Lock()
+        self.items = {}
+        self.menu_tab_id = None
+
+    def set_model(self, seq:int, menu):
+        """Called by the frontend through the js api"""
+        if type(seq) is not int:
+            warn_tb(logger, f"Ignoring menu model of invalid sequence {seq!r}")
+            return
+        model = parse_menu_model(menu)
+        with self._lock:
+            if seq<=self.model_seq:
+                logger.debug("Ignoring stale menu model %d, %d is set", seq, self.model_seq)
+                return
+            self.model_seq = seq
+            self.model = model
+
+    def get_item(self, sender, position:int, menu_item_key:str|None):
+        language_code = quacro_i18n.current_language.language_code
+        cache_key = (language_code, position, menu_item_key)
+        item = self.items.get(cache_key)
+        if item is not None:
+            return item
+        if menu_item_key is None:
+            item = sender.Environment.CreateContextMenuItem(
+                None, None, CoreWebView2ContextMenuItemKind.Separator
+            )
+        else:
+            item = sender.Environment.CreateContextMenuItem(
+                _[menu_item_names.get(menu_item_key, "Unknown Menu Item Key")],
+                None,
+                CoreWebView2ContextMenuItemKind.Command
+            )
+            item.CustomItemSelected += (lambda _item_str:\
+                # wrap callback lambda with an outer lambda
+                # to solve a closure problem
+                lambda _sender,_event:self.execute_menu_item(sender, _item_str)
+            )(menu_item_key)
+        self.items[cache_key] = item
+        return item
+
+    @callback
+    def execute_menu_item(self, sender, menu_item_key:str):
+        if self.menu_tab_id is None:
+            return
+        sender.ExecuteScriptAsync(
+            f"tab_lst.execute_menu_item_cmd({json.dumps(menu_item_key)}, {self.menu_tab_id})"
+        )
+
+    def show_menu(self, sender, event, model:MenuModel|None):
+        if model is None:
+            event.Handled = True
+            return
+        self.menu_tab_id, menu_item_keys = model
+        menu_items = event.MenuItems
+        # remove default menu items
+        menu_items.Clear()
+        for position, menu_item_key in enumerate(menu_item_keys):
+            menu_items.Add(self.get_item(sender, position, menu_item_key))
 
     @callback
-    def on_context_menu_requested(sender, event):
+    def on_context_menu_requested(self, sender, event):
+        model = self.model
+        if model is not MENU_MODEL_UNKNOWN:
+            self.show_menu(sender, event, model)
+            return
+
         deferral = event.GetDeferral()
-        menuItems = event.MenuItems
 
         @callback
         def set_menu(menu):
-            if type(menu) is not list:
-                if menu is not None:
-                    warn_tb(logger, f"Ignoring unknown menu type '{type(menu).__name__}'. A 'list' was aexpected")
-                event.Handled=True
+            try:
+                self.show_menu(sender, event, parse_menu_model(menu))
+            finally:
                 deferral.Complete()
-                return
-
-            # remove default menu items
-            menuItems.Clear()
-
-            for menu_item_key in menu:
-                if menu_item_key is None:
-                    new_item = sender.Environment.CreateContextMenuItem(
-                        None, None, CoreWebView2ContextMenuItemKind.Separator
-                    )
-                    menuItems.Add(new_item)
-                    continue
-            
-                if type(menu_item_key) is not str:
-                    warn_tb(logger, f"Ignoring unknown menu item type '{type(menu).__name__}'. A 'str' was aexpected")
-                    continue
-
-                new_item = sender.Environment.CreateContextMenuItem(
-                    _[menu_item_names.get(menu_item_key, "Unknown Menu Item Key")],
-                    None,
-                    CoreWebView2ContextMenuItemKind.Command
-                )
-                new_item.CustomItemSelected += (lambda _item_str:\
-                    # wrap callback lambda with an outer lambda
-                    # to solve a closure problem
-                    lambda _sender,_event:sender.ExecuteScriptAsync(f"tab_lst.execute_menu_item_cmd('{_item_str}')")
-                )(menu_item_key)
-                menuItems.Add(new_item)
-
-            deferral.Complete()
-
-        # END def set_menu
 
-        @callback
         def get_menu():
-            menu = window.evaluate_js("tab_lst.get_context_menu()")
-            window.native.webview.Invoke(Func[Type](lambda:set_menu(menu)))
+            menu = self.window.evaluate_js("tab_lst.get_context_menu()")
+            self.window.native.webview.Invoke(Func[Type](lambda:set_menu(menu)))
 
-        threading.Thread(target=get_menu).start()
+        worker.submit(get_menu)
 
-    # END def on_context_menu_requested
+def init_context_menu(window:webview.Window) -> DockContextMenu:
+    if window.native is None:
+        raise RuntimeError(f"Window {window} is not initiallized")
+    if window.native.webview is None:
+        raise RuntimeError(f"Window {window} webview is not initiallized")
 
+    context_menu = DockContextMenu(window)
     webview_obj = window.native.webview
 
     @callback
     def setup_context_menu():
-        webview_obj.CoreWebView2.ContextMenuRequested+=on_context_menu_requested
+        webview_obj.CoreWebView2.ContextMenuRequested+=context_menu.on_context_menu_requested
 
     if webview_obj.InvokeRequired:
         webview_obj.Invoke(
@@ -110,5 +219,6 @@ def init_context_menu(window:webview.Window):
         )
     else:
         setup_context_menu()
+    return context_menu
 
 # END def init_context_menu
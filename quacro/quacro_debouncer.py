@@ -0,0 +1,60 @@
+class PendingIconTitleUpdate:
+    __slots__ = ("first_time", "last_time", "icon_changed", "title_changed")
+    first_time: float
+    last_time: float
+    icon_changed: bool
+    title_changed: bool
+
+    def __init__(self, now:float):
+        self.first_time = now
+        self.last_time = now
+        self.icon_changed = False
+        self.title_changed = False
+
+class IconTitleDebouncer:
+    """
+    Merge the icon/title updates of each window.
+    An update is flushed after the window is quiet for `quiet_period`,
+    or `max_wait` after the first pending update, whichever comes first.
+    """
+    quiet_period: float
+    max_wait: float
+    pending: dict[int, PendingIconTitleUpdate]
+
+    def __init__(self, quiet_period:float, max_wait:float):
+        self.quiet_period = quiet_period
+        self.max_wait = max_wait
+        self.pending = {}
+
+    def push(self, hwnd:int, icon_changed:bool, title_changed:bool, now:float):
+        if hwnd in self.pending:
+            update = self.pending[hwnd]
+            update.last_time = now
+        else:
+            update = PendingIconTitleUpdate(now)
+            self.pending[hwnd] = update
+        update.icon_changed |= icon_changed
+        update.title_changed |= title_changed
+
+    def discard(self, hwnd:int):
+        self.pending.pop(hwnd, None)
+
+    def _deadline(self, update:PendingIconTitleUpdate) -> float:
+        return min(
+            update.last_time + self.quiet_period,
+            update.first_time + self.max_wait,
+        )
+
+    def pop_due(self, now:float) -> list[tuple[int, bool, bool]]:
+        due: list[tuple[int, bool, bool]] = []
+        for hwnd, update in self.pending.items():
+            if self._deadline(update) <= now:
+                due.append((hwnd, update.icon_changed, update.title_changed))
+        for hwnd, _, _ in due:
+            del self.pending[hwnd]
+        return due
+
+    def next_deadline(self) -> float|None:
+        if not self.pending:
+            return None
+        return min(self._deadline(update) for update in self.pending.values())
@@ -0,0 +1,138 @@
+import logging
+import threading
+import concurrent.futures
+import functools
+import time
+import typing
+
+from . import quacro_instrumentation, quacro_metrics
+from .quacro_events import Event
+
+logger = logging.getLogger("dispatcher")
+
+BlockingCallCallBack: typing.TypeAlias = typing.Callable[[typing.Any], None]|None
+BlockingCallErrBack: typing.TypeAlias = typing.Callable[[BaseException], None]|None
+
+def _measured_call(fn:typing.Callable, *args):
+    start_time = time.perf_counter_ns()
+    try:
+        return fn(*args)
+    finally:
+        fn_name = getattr(fn, "__name__", repr(fn))
+        quacro_instrumentation.record_span(f"blocking.{fn_name}", "win32", start_time)
+
+def measured(fn:typing.Callable) -> typing.Callable:
+    """Wrap `fn` to be measured on the worker when instrumentation is enabled"""
+    if not quacro_instrumentation.enabled:
+        return fn
+    return functools.partial(_measured_call, fn)
+
+class EventBlockingCallDone(Event):
+    __slots__ = ("callback", "errback", "result", "error")
+    callback: BlockingCallCallBack
+    errback: BlockingCallErrBack
+    result: typing.Any
+    error: BaseException|None
+
+    def __init__(self, callback, errback, result, error):
+        super().__init__()
+        self.callback = callback
+        self.errback = errback
+        self.result = result
+        self.error = error
+
+class Dispatcher:
+    """
+    Latency-critical win32 calls (dock geometry) run inline on the event loop.
+    Potentially blocking calls (cross-process messages, process queries)
+    go through `run_blocking`, which runs them on a bounded executor
+    and posts the results back to the event queue as `EventBlockingCallDone`.
+    At most `max_pending` calls are queued or running,
+    so a hung process can't pile up work without limit.
+    """
+    executor: concurrent.futures.ThreadPoolExecutor
+    event_queue: typing.Any
+    max_pending: int
+    # calls submitted and not finished yet
+    pending: int
+    # keys of the calls that are still running
+    in_flight: set[typing.Hashable]
+    _lock: threading.Lock
+
+    def __init__(self, event_queue, max_workers:int, max_pending:int=64):
+        self.event_queue = event_queue
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="quacro_blocking",
+        )
+        self.max_pending = max_pending
+        self.pending = 0
+        self.in_flight = set()
+        self._lock = threading.Lock()
+
+    def run_blocking(
+            self,
+            fn:typing.Callable,
+            *args,
+            callback:BlockingCallCallBack=None,
+            errback:BlockingCallErrBack=None,
+            key:typing.Hashable|None=None
+        ) -> bool:
+        """
+        Run `fn(*args)` on the executor,
+        then `callback(result)` on the event loop thread,
+        or `errback(error)` if `fn` raises.
+        Calls with the same `key` are not stacked up,
+        so a hung window can only occupy one worker per key.
+        Return False if the call is not started,
+        because of the key or because `max_pending` calls are pending.
+        """
+        if not self._acquire(key):
+            return False
+        try:
+            future = self.executor.submit(measured(fn), *args)
+        except RuntimeError:
+            # executor has been shut down
+            self._done(key)
+            return False
+        future.add_done_callback(
+            lambda _future: self._post_result(_future, callback, errback, key)
+        )
+        return True
+
+    def _acquire(self, key) -> bool:
+        with self._lock:
+            if self.pending>=self.max_pending:
+                logger.debug("Skipping blocking call %s: %d calls pending", key, self.pending)
+                if quacro_metrics.enabled:
+                    quacro_metrics.counter("dispatcher.rejected").inc()
+                return False
+            if key is not None:
+                if key in self.in_flight:
+                    logger.debug("Skipping blocking call %s: still in flight", key)
+                    return False
+                self.in_flight.add(key)
+            self.pending += 1
+        return True
+
+    def _done(self, key):
+        with self._lock:
+            self.pending -= 1
+            if key is not None:
+                self.in_flight.discard(key)
+
+    def pending_count(self) -> int:
+        return self.pending
+
+    def _post_result(self, future:concurrent.futures.Future, callback, errback, key):
+        self._done(key)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None and callback is None:
+            return
+        result = None if error is not None else future.result()
+        self.event_queue.put(EventBlockingCallDone(callback, errback, result, error))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
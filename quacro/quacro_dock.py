@@ -2,6 +2,9 @@ import json
 import base64
 import queue
 import threading
+import collections
+import time
+import weakref
 from typing import Any, Callable
 import logging
 
@@ -10,14 +13,16 @@ import win32con
 
 from . import (
     quacro_events,
+    quacro_dock_keys,
     quacro_win32,
     quacro_web_data,
     quacro_c_utils,
     quacro_app_data,
-    quacro_context_menu
+    quacro_instrumentation,
 )
 from .quacro_win32 import format_window
 from .quacro_app_data import CACHE_KEY_DOCK_WIDTH
+from .quacro_window_group import FilterVerdicts
 
 logger = logging.getLogger("dock")
 
@@ -27,6 +32,53 @@ DEFAULT_DOCK_WIDTH = 200
 DOCK_WIDTH_MIN = 75
 DOCK_WIDTH_MAX = 250
 
+class DockTabs:
+    """
+    Tabs of a dock, in both tab order and most-recently-activated order.
+    All the updates are O(1).
+    """
+    _order: dict[int, None]
+    # least recently activated first
+    _mru: collections.OrderedDict[int, None]
+
+    def __init__(self):
+        self._order = {}
+        self._mru = collections.OrderedDict()
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, hwnd):
+        return hwnd in self._order
+
+    def add(self, hwnd:int):
+        self._order[hwnd] = None
+        # a new tab is the least recent one until it is activated
+        self._mru[hwnd] = None
+        self._mru.move_to_end(hwnd, last=False)
+
+    def remove(self, hwnd:int):
+        del self._order[hwnd]
+        del self._mru[hwnd]
+
+    def touch(self, hwnd:int):
+        """Mark the tab as the most recently activated one"""
+        if hwnd in self._mru:
+            self._mru.move_to_end(hwnd)
+
+    def iter_recent(self):
+        """Iterate tabs from the most recently activated one"""
+        return reversed(self._mru)
+
+    def most_recent(self) -> int|None:
+        for hwnd in reversed(self._mru):
+            return hwnd
+        return None
+
+
 class Dock:
     window: webview.Window
     hwnd:int
@@ -39,15 +91,19 @@ class Dock:
     _key:Any|None = None
     _width = DEFAULT_DOCK_WIDTH
 
-    tabs: set[int]
+    tabs: DockTabs
     target: int|None = None
+    # time.perf_counter_ns() when the target was last set
+    target_ns: int = 0
+    # quacro_context_menu.DockContextMenu, set after the dom is loaded
+    context_menu: Any = None
 
     def __repr__(self):
         return f'Dock(id {hex(id(self))})'
 
     def __init__(self, manager:"DockManager"):
         self.dock_manager = manager
-        self.tabs = set()
+        self.tabs = DockTabs()
         self.dom_loaded = threading.Event()
         self.window = webview.create_window(
             'QuacroDock',
@@ -76,6 +132,15 @@ class Dock:
         self.window.expose(self.api_get_icon)
         self.window.expose(self.api_get_title)
         self.window.expose(self.api_horizontal_resize)
+        self.window.expose(self.api_set_context_menu)
+
+    def _evaluate_js(self, js:str):
+        if not quacro_instrumentation.enabled:
+            return self.window.evaluate_js(js)
+        start_time = time.perf_counter_ns()
+        result = self.window.evaluate_js(js)
+        quacro_instrumentation.record_span("dock.evaluate_js", "js", start_time)
+        return result
 
     def _move_inj(self,x,y):
         self._move_no_message(x,y)
@@ -100,19 +165,25 @@ class Dock:
     @property
     def width(self): # read-only
         return self._width
+
+    @property
+    def key(self): # read-only
+        return self._key
     
     def window_cb_before_show(self):
         assert self.window.native is not None
         self.hwnd = self.window.native.Handle.ToInt64()
-        logger.debug(f"{self} window handle: [{self.hwnd}]")
+        logger.debug("%s window handle: [%s]", self, self.hwnd)
     
     def window_cb_on_loaded(self):
         js = "var tab_lst = new TabList();"
-        self.window.evaluate_js(js)
-
-        quacro_context_menu.init_context_menu(self.window)
-
+        self._evaluate_js(js)
         self.dom_loaded.set()
+
+        # after dom_loaded, so the pythonnet import is off the startup path.
+        # The menu model pushed before this is fetched on the first right click.
+        from . import quacro_context_menu
+        self.context_menu = quacro_context_menu.init_context_menu(self.window)
     
     def window_cb_closing(self):
         if self.being_destroyed:
@@ -128,17 +199,28 @@ class Dock:
         self.dock_manager.event_queue.put(event)
     
     def api_get_icon(self, tab_id: int):
-        logger.debug(f"Getting icon for {tab_id}")
-        icon_png = quacro_c_utils.read_window_icon(tab_id)
+        logger.debug("Getting icon for %s", tab_id)
+        if quacro_instrumentation.enabled:
+            start_time = time.perf_counter_ns()
+            icon_png = quacro_c_utils.read_window_icon(tab_id)
+            quacro_instrumentation.record_span(
+                "dock.read_window_icon", "win32", start_time, {"hwnd": tab_id}
+            )
+        else:
+            icon_png = quacro_c_utils.read_window_icon(tab_id)
         if icon_png is None:
             return None
         b64_icon = base64.b64encode(icon_png).decode('ascii')
         return "data:image/png;base64," + b64_icon
     
     def api_get_title(self, tab_id: int):
-        logger.debug(f"Getting title for {tab_id}")
+        logger.debug("Getting title for %s", tab_id)
         return quacro_win32.get_window_title(tab_id)
 
+    def api_set_context_menu(self, seq:int, menu):
+        if self.context_menu is not None:
+            self.context_menu.set_model(seq, menu)
+
     def api_horizontal_resize(self, x):
         rect = quacro_win32.get_window_rect(self.hwnd)
         if rect is None:
@@ -160,36 +242,42 @@ class Dock:
         if not result:
             raise OSError("Failed to set dock position")
         self._width = width
-        logger.debug(f"{self} resize (w:{width} x:{x_pos})")
+        logger.debug("%s resize (w:%s x:%s)", self, width, x_pos)
         
-    def notify_icon_title_update(self, hwnd):
+    def notify_icon_title_update(self, hwnd:int, icon_changed:bool, title:str|None):
         _tab_id = json.dumps(hwnd)
-        js = (
-            f"tab_lst.request_get_icon({_tab_id});"
-            f"tab_lst.request_get_title({_tab_id});"
-        )
-        self.window.evaluate_js(js)
+        js = ""
+        if title is not None:
+            # push the title directly instead of letting frontend fetch it
+            _title = json.dumps(title)
+            js += f"tab_lst.update_tab_title({_tab_id}, {_title});"
+        if icon_changed:
+            js += f"tab_lst.request_get_icon({_tab_id});"
+        if js:
+            self._evaluate_js(js)
 
     def create_tab(self, hwnd:int, title:str):
         _title = json.dumps(title)
         _tab_id = json.dumps(hwnd)
         js = f"tab_lst.create_tab({_title}, {_tab_id});"
-        self.window.evaluate_js(js)
+        self._evaluate_js(js)
         self.tabs.add(hwnd)
+        self.dock_manager.window_dock_map[hwnd] = self
     
     def remove_tab(self, hwnd:int):
         _hwnd = json.dumps(hwnd)
         js = f"tab_lst.remove_tab({_hwnd});"
-        self.window.evaluate_js(js)
+        self._evaluate_js(js)
         self.tabs.remove(hwnd)
+        del self.dock_manager.window_dock_map[hwnd]
     
     def activate_tab(self, hwnd:int):
         _hwnd = json.dumps(hwnd)
         js = f"tab_lst.activate_tab({_hwnd});"
-        self.window.evaluate_js(js)
+        self._evaluate_js(js)
     
     def target_lost(self):
-        logger.debug(f"{self} target lost")
+        logger.debug("%s target lost", self)
         self.target = None
         self.hide()
     
@@ -199,15 +287,17 @@ class Dock:
         self.activate_tab(self.target)
         for window in self.tabs:
             if window != self.target:
-                quacro_win32.W32.ShowWindow(window, win32con.SW_MINIMIZE)
+                # don't wait for other apps
+                quacro_win32.W32.ShowWindowAsync(window, win32con.SW_MINIMIZE)
 
     def set_sticking_target(self,hwnd):
         self.target = hwnd
+        self.target_ns = time.perf_counter_ns()
 
     def stick_to_target(self, move_target=True):
         if self.target is None:
             return
-        logger.debug(f"{self} sticking to {format_window(self.target)}")
+        logger.debug("%s sticking to %s", self, format_window(self.target))
         target_rect = quacro_win32.get_window_rect(self.target)
         if target_rect is None:
             self.target_lost()
@@ -265,35 +355,79 @@ class Dock:
         
 
 class DockEvent(quacro_events.Event):
+    __slots__ = ("hwnd", "_dock_ref")
+    lane = quacro_events.EVENT_LANE_USER
     hwnd: int
-    dock: "Dock"
+    # the event doesn't keep a destroyed dock alive
+    _dock_ref: "weakref.ref[Dock]"
 
     def __init__(self, hwnd:int, dock:"Dock"):
+        super().__init__()
         self.hwnd = hwnd
-        self.dock = dock
+        self._dock_ref = weakref.ref(dock)
+
+    @property
+    def dock(self) -> "Dock|None":
+        return self._dock_ref()
 
 class EventRequestCloseWindow(DockEvent):
-    pass
+    __slots__ = ()
 
 class EventRequestActivateWindow(DockEvent):
-    pass
-
+    __slots__ = ()
+
+
+def webview_memory_stats(window:webview.Window, dock_count:int) -> dict[str, Any]:
+    """
+    Private memory of the WebView2 processes of `window`,
+    which are shared by the `dock_count` docks.
+    """
+    # imported here to keep pythonnet types off the startup path
+    from System import Func, Type # type:ignore
+    webview_obj = window.native.webview
+    process_infos: list[tuple[int, str]] = []
+    def get_process_infos():
+        environment = webview_obj.CoreWebView2.Environment
+        for info in environment.GetProcessInfos():
+            process_infos.append((info.ProcessId, str(info.Kind)))
+    webview_obj.Invoke(Func[Type](get_process_infos))
+
+    processes: dict[str, dict[str, Any]] = {}
+    total_bytes = 0
+    for pid, kind in process_infos:
+        private_bytes = quacro_win32.get_process_private_bytes(pid)
+        total_bytes += private_bytes
+        entry = processes.setdefault(kind, {"count": 0, "private_mb": 0.0})
+        entry["count"] += 1
+        entry["private_mb"] += private_bytes/2**20
+    return {
+        "dock_count": dock_count,
+        "processes": processes,
+        "total_private_mb": total_bytes/2**20,
+        "per_dock_private_mb": total_bytes/2**20/dock_count,
+    }
 
 class DockManager:
     active_docks: dict[int, Dock]
     key_dock_map: dict[Any, Dock]
+    # reverse index of Dock.tabs, maintained by create_tab/remove_tab
+    window_dock_map: dict[int, Dock]
     event_queue:queue.Queue[quacro_events.Event]
     pre_created_dock:Dock
 
-    identify_window_key: Callable
+    dock_key: quacro_dock_keys.DockKey
 
-    def __init__(self, event_queue) -> None:
+    def __init__(self, event_queue, dock_key:quacro_dock_keys.DockKey) -> None:
         self.active_docks = {}
         self.key_dock_map = {}
+        self.window_dock_map = {}
         self.event_queue = event_queue
         self.pre_created_dock = Dock(self)
 
-        self.identify_window_key = lambda hwnd:1
+        self.dock_key = dock_key
+    
+    def identify_window_key(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> Any:
+        return self.dock_key.identify(hwnd, verdicts)
     
     def is_dock_window(self,hwnd:int)->bool:
         if hwnd in self.active_docks:
@@ -311,20 +445,26 @@ class DockManager:
         if key is not None:
             self.key_dock_map[key] = new_dock
             new_dock._key = key
-        logger.debug(f"{self.pre_created_dock} pre-created")
-        logger.info(f"{new_dock} activated")
+        logger.debug("%s pre-created", self.pre_created_dock)
+        logger.info("%s activated", new_dock)
         new_dock._width = quacro_app_data.cache_get(CACHE_KEY_DOCK_WIDTH, DEFAULT_DOCK_WIDTH)
         return new_dock
     
     def get_dock_by_window(self, hwnd:int, **kw) -> Dock|Any:
-
-        key = self.identify_window_key(hwnd)
+        if hwnd in self.window_dock_map:
+            return self.window_dock_map[hwnd]
+        elif kw and "default" in kw:
+            return kw["default"]
+        else:
+            raise KeyError(f"Can't find dock for window: {hwnd}")
+    
+    def get_dock_by_key(self, key, **kw) -> Dock|Any:
         if key in self.key_dock_map:
             return self.key_dock_map[key]
         elif kw and "default" in kw:
             return kw["default"]
         else:
-            raise KeyError(f"Can't find dock for window: {hwnd}")
+            raise KeyError(f"Can't find dock for key: {key}")
     
     def destroy_dock(self, dock:Dock) -> None:
         del self.active_docks[dock.hwnd]
@@ -332,8 +472,16 @@ class DockManager:
             del self.key_dock_map[dock._key]
         quacro_app_data.cache_set(CACHE_KEY_DOCK_WIDTH, dock.width)
         dock._destroy()
-        logger.info(f"{dock} destroyed")
+        logger.info("%s destroyed", dock)
     
+    def webview_memory_stats(self) -> dict[str, Any]:
+        """Private memory of the WebView2 processes, shared by all the docks"""
+        dock = self.pre_created_dock
+        if not dock.dom_loaded.is_set():
+            return {}
+        # the pre-created dock is counted too
+        return webview_memory_stats(dock.window, len(self.active_docks)+1)
+
     def quit(self) -> None:
         for hwnd in list(self.active_docks.keys()):
             self.destroy_dock(self.active_docks[hwnd])
@@ -0,0 +1,126 @@
+import os
+import typing
+
+from . import quacro_win32
+from .quacro_window_group import WindowGrup, FilterVerdicts, evaluate_filters
+from .quacro_window_filters import get_param, get_list_param
+from .quacro_errors import ConfigError
+
+class DockKey:
+    """Decides which dock a primary group window belongs to"""
+    name: str
+    # identify() queries other processes, run it off the event loop
+    blocking: bool = False
+    def __init__(self, config:dict, window_groups:dict[str, WindowGrup]):
+        raise NotImplementedError
+    def identify(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> typing.Hashable:
+        """`verdicts` are the evaluated groups of `hwnd`, if known"""
+        # A valid key should not be None
+        raise NotImplementedError
+
+class SingleDockKey(DockKey):
+    name = "single"
+
+    def __init__(self, config:dict, window_groups:dict[str, WindowGrup]):
+        pass
+
+    def identify(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> typing.Hashable:
+        return 1
+
+class ProcessEXEPathDockKey(DockKey):
+    name = "process_exe_path"
+    blocking = True
+
+    def __init__(self, config:dict, window_groups:dict[str, WindowGrup]):
+        pass
+
+    def identify(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> typing.Hashable:
+        exe_path = quacro_win32.get_window_exe_path(hwnd)
+        if not exe_path:
+            # unable to query the process, give the window a dock of its own
+            return hwnd
+        return os.path.normcase(exe_path)
+
+class WindowClassNameDockKey(DockKey):
+    name = "window_class_name"
+
+    def __init__(self, config:dict, window_groups:dict[str, WindowGrup]):
+        pass
+
+    def identify(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> typing.Hashable:
+        return quacro_win32.get_window_class_name(hwnd)
+
+class WindowGroupDockKey(DockKey):
+    name = "window_group"
+    # the filters of the groups may query other processes
+    blocking = True
+    key_groups: list[WindowGrup]
+    fallback_key: str
+
+    def __init__(self, config:dict, window_groups:dict[str, WindowGrup]):
+        group_names = get_list_param(
+            "groups",
+            config, self.name,
+            type_of_items=str,
+        )
+        if not group_names:
+            raise ConfigError("'groups' is empty")
+        self.key_groups = []
+        for group_name in group_names:
+            if group_name not in window_groups:
+                raise ConfigError(f"Group '{group_name}' not found")
+            self.key_groups.append(window_groups[group_name])
+        self.fallback_key = get_param(
+            "fallback", str,
+            config, self.name,
+            default="",
+        )
+
+    def identify(self, hwnd:int, verdicts:FilterVerdicts|None=None) -> typing.Hashable:
+        # the first matched group in 'groups' wins
+        for group in self.key_groups:
+            if verdicts is not None:
+                matched = verdicts.get(group, False)
+            else:
+                matched = group.contains_window(hwnd)
+            if matched:
+                return group.name
+        return self.fallback_key
+
+def classify_window(
+        zero_level_groups:list[WindowGrup],
+        primary_group:WindowGrup,
+        dock_key:DockKey,
+        hwnd:int
+    ) -> tuple[FilterVerdicts, typing.Hashable|None]:
+    """
+    Runs on a blocking worker.
+    The dock key is only identified here if it is blocking
+    and the window can reach the primary group.
+    """
+    verdicts = evaluate_filters(zero_level_groups, hwnd)
+    key = None
+    if dock_key.blocking and verdicts.get(primary_group):
+        key = dock_key.identify(hwnd, verdicts)
+    return verdicts, key
+
+dock_key_type_dict: dict[str, type[DockKey]] = {
+    "single": SingleDockKey,
+    "process_exe_path": ProcessEXEPathDockKey,
+    "window_class_name": WindowClassNameDockKey,
+    "window_group": WindowGroupDockKey,
+}
+
+def generate_dock_key(
+        dock_key_config:dict,
+        window_groups:dict[str, WindowGrup]
+    ) -> DockKey:
+    key_type_name = get_param(
+        "type", str,
+        dock_key_config, "dock_key",
+        default="single",
+    )
+    if key_type_name not in dock_key_type_dict:
+        raise ConfigError(f"Unknown dock key type '{key_type_name}'")
+    key_type = dock_key_type_dict[key_type_name]
+    return key_type(dock_key_config, window_groups)
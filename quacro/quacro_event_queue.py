@@ -0,0 +1,138 @@
+import collections
+import itertools
+import queue
+import time
+import typing
+
+from .quacro_events import (
+    Event,
+    EVENT_LANE_USER,
+    EVENT_LANE_LIFECYCLE,
+    EVENT_LANE_BULK,
+)
+
+LANE_NAMES = {
+    EVENT_LANE_USER: "user",
+    EVENT_LANE_LIFECYCLE: "lifecycle",
+    EVENT_LANE_BULK: "bulk",
+}
+
+class Lane:
+    name: str
+    items: collections.OrderedDict[typing.Hashable, Event]
+    # times this lane was passed over while non-empty
+    skipped: int
+
+    # statistics
+    put_count: int
+    get_count: int
+    coalesced_count: int
+    max_depth: int
+    total_wait_ns: int
+    max_wait_ns: int
+
+    def __init__(self, name:str):
+        self.name = name
+        self.items = collections.OrderedDict()
+        self.skipped = 0
+        self.put_count = 0
+        self.get_count = 0
+        self.coalesced_count = 0
+        self.max_depth = 0
+        self.total_wait_ns = 0
+        self.max_wait_ns = 0
+
+    def head_time(self) -> int:
+        for event in self.items.values():
+            return event.enqueue_ns
+        raise IndexError("lane is empty")
+
+    def stats(self) -> dict[str, typing.Any]:
+        return {
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "put": self.put_count,
+            "get": self.get_count,
+            "coalesced": self.coalesced_count,
+            "avg_wait_ms": (
+                self.total_wait_ns/self.get_count/1e6 if self.get_count else 0.0
+            ),
+            "max_wait_ms": self.max_wait_ns/1e6,
+        }
+
+class LaneEventQueue(queue.Queue):
+    """
+    A `queue.Queue` with a lane for each priority (`Event.lane`).
+    Lanes are served in priority order, except that a non-empty lane
+    is served once its head has waited `max_wait` seconds,
+    or once it has been passed over `burst_limit` times in a row.
+    Pending events with the same `Event.coalesce_key` are merged.
+    """
+    lanes: list[Lane]
+    max_wait_ns: int
+    burst_limit: int
+    _unique_keys: typing.Iterator[int]
+
+    def __init__(self, max_wait:float=0.05, burst_limit:int=16):
+        self.max_wait_ns = int(max_wait*1e9)
+        self.burst_limit = burst_limit
+        super().__init__()
+
+    # the methods below are called with the queue mutex held
+
+    def _init(self, maxsize):
+        self.lanes = [
+            Lane(LANE_NAMES[lane_id]) for lane_id in sorted(LANE_NAMES)
+        ]
+        self._unique_keys = itertools.count()
+
+    def _qsize(self):
+        return sum(len(lane.items) for lane in self.lanes)
+
+    def _put(self, event:Event):
+        lane = self.lanes[event.lane]
+        lane.put_count += 1
+        key = event.coalesce_key()
+        if key is None:
+            key = next(self._unique_keys)
+        elif key in lane.items:
+            # keep the position and the times of the older one
+            older = lane.items[key]
+            event.merge(older)
+            event.enqueue_ns = older.enqueue_ns
+            event.hook_ns = older.hook_ns
+            lane.items[key] = event
+            lane.coalesced_count += 1
+            older.release()
+            return
+        event.enqueue_ns = time.perf_counter_ns()
+        lane.items[key] = event
+        if len(lane.items)>lane.max_depth:
+            lane.max_depth = len(lane.items)
+
+    def _get(self) -> Event:
+        now = time.perf_counter_ns()
+        non_empty = [lane for lane in self.lanes if lane.items]
+        chosen = non_empty[0]
+        for lane in non_empty:
+            if (
+                lane.skipped>=self.burst_limit or
+                now-lane.head_time()>=self.max_wait_ns
+            ):
+                chosen = lane
+                break
+        for lane in non_empty:
+            lane.skipped += 1
+        chosen.skipped = 0
+
+        _, event = chosen.items.popitem(last=False)
+        wait = now-event.enqueue_ns
+        chosen.get_count += 1
+        chosen.total_wait_ns += wait
+        if wait>chosen.max_wait_ns:
+            chosen.max_wait_ns = wait
+        return event
+
+    def stats(self) -> dict[str, dict[str, typing.Any]]:
+        with self.mutex:
+            return {lane.name: lane.stats() for lane in self.lanes}
@@ -1,6 +1,47 @@
+import typing
+
+# Lanes of the event queue, served in this order
+EVENT_LANE_USER = 0 # actions requested by user from the dock
+EVENT_LANE_LIFECYCLE = 1 # window created/destroyed/activated/minimized
+EVENT_LANE_BULK = 2 # coalescible move/size and title updates
 
 class Event:
-    pass
+    # Events are created for every hook message, so they use __slots__.
+    # Subclasses declare __slots__ too and call Event.__init__.
+    __slots__ = ("enqueue_ns", "hook_ns")
+    lane: int = EVENT_LANE_LIFECYCLE
+    # time.perf_counter_ns() when put into the event queue
+    enqueue_ns: int
+    # time.perf_counter_ns() when the hook got the message, 0 if unknown
+    hook_ns: int
+
+    def __init__(self):
+        self.enqueue_ns = 0
+        self.hook_ns = 0
+
+    def coalesce_key(self) -> typing.Hashable|None:
+        """
+        Pending events with the same key are merged by the event queue.
+        None means the event can't be coalesced.
+        """
+        return None
+
+    def merge(self, older:"Event") -> None:
+        """Merge an older pending event with the same coalesce key into self"""
+        pass
+
+    def release(self) -> None:
+        """Called when the event is not used anymore, pooled events are reused"""
+        pass
+
+def event_fields(event:Event) -> dict[str, typing.Any]:
+    fields = {}
+    for cls in reversed(type(event).__mro__):
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(event, name):
+                fields[name] = getattr(event, name)
+    fields.update(getattr(event, "__dict__", {}))
+    return fields
 
 class EventStop(Event):
-    pass
+    __slots__ = ()
@@ -1,8 +1,13 @@
 import logging
+import marshal
+import os
+import string
+import sys
 import tomllib
 import typing
+import zlib
 
-from . import quacro_win32
+from . import quacro_win32, quacro_app_data
 from .quacro_logging import warn_tb
 from .quacro_errors import ConfigError
 
@@ -61,30 +66,178 @@ class Lang:
     def get_translation(self, key:str):
         return self.translations.get(key, None)
 
+# Parsed TOML files are cached as marshal catalogs in the app data dir.
+# A catalog holds two marshal objects, the header and the translations,
+# so the header can be read without loading the translations.
+CATALOG_FORMAT_VERSION = 2
+
+class CatalogHeader(typing.NamedTuple):
+    format_version: int
+    # the marshal format may change between python versions
+    marshal_version: int
+    python_version: tuple[int, int]
+    # crc32 of the TOML source
+    source_crc: int
+    language_code: str
+    name: str
+
+def make_catalog_header(source_crc:int, lang:Lang) -> CatalogHeader:
+    return CatalogHeader(
+        CATALOG_FORMAT_VERSION,
+        marshal.version,
+        tuple(sys.version_info[:2]), # type: ignore[arg-type]
+        source_crc,
+        lang.language_code,
+        lang.name,
+    )
+
+class CatalogLang(Lang):
+    """A `Lang` whose translations are loaded from the catalog on first use"""
+    header: CatalogHeader
+    catalog_path: str
+    source_path: str
+    _translations: dict[str,str]|None
+
+    def __init__(self, header:CatalogHeader, catalog_path:str, source_path:str):
+        self.header = header
+        self.language_code = header.language_code
+        self.name = header.name
+        self.catalog_path = catalog_path
+        self.source_path = source_path
+        self._translations = None
+
+    @property
+    def translations(self) -> dict[str,str]: # type: ignore[override]
+        if self._translations is None:
+            try:
+                self._translations = self.load_translations()
+            except (OSError, EOFError, ValueError, TypeError) as err:
+                # changed since the header was read at launch
+                logger.warning("Invalid catalog '%s': %s", self.catalog_path, err)
+                self._translations = self.compile_translations()
+        return self._translations
+
+    def load_translations(self) -> dict[str,str]:
+        with open(self.catalog_path, "rb") as catalog_file:
+            header = CatalogHeader(*marshal.load(catalog_file))
+            if header!=self.header:
+                raise ValueError("the catalog has been replaced")
+            translations = marshal.load(catalog_file)
+        if type(translations) is not dict:
+            raise TypeError(f"translations must be a dict, not '{type(translations).__name__}'")
+        return translations
+
+    def compile_translations(self) -> dict[str,str]:
+        try:
+            with open(self.source_path, "rb") as lang_file:
+                source = lang_file.read()
+            lang = compile_catalog(source, zlib.crc32(source), self.catalog_path)
+        except (OSError, ConfigError, ValueError) as err:
+            logger.error(
+                "Unable to load the translations of '%s': %s", self.source_path, err
+            )
+            return {}
+        return lang.translations
+
+def get_catalog_path(source_path:str) -> str:
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(quacro_app_data.APPDATA_PATH, base_name+".catalog")
+
+def read_catalog_header(catalog_path:str) -> CatalogHeader|None:
+    try:
+        with open(catalog_path, "rb") as catalog_file:
+            header = CatalogHeader(*marshal.load(catalog_file))
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as err:
+        logger.warning(f"Invalid catalog '{catalog_path}': {err}")
+        return None
+    if (
+        header.format_version!=CATALOG_FORMAT_VERSION or
+        header.marshal_version!=marshal.version or
+        tuple(header.python_version)!=tuple(sys.version_info[:2])
+    ):
+        return None
+    return header
+
+def compile_catalog(source:bytes, source_crc:int, catalog_path:str) -> Lang:
+    lang = Lang.load_lang(tomllib.loads(source.decode("utf8")))
+    header = make_catalog_header(source_crc, lang)
+    try:
+        quacro_app_data.atomic_write_bytes(
+            catalog_path,
+            marshal.dumps(tuple(header))+marshal.dumps(lang.translations),
+        )
+    except OSError as err:
+        logger.warning(f"Unable to write catalog '{catalog_path}': {err}")
+    else:
+        logger.info(f"Catalog '{catalog_path}' compiled")
+    return lang
+
 LanguageCode:typing.TypeAlias = str
 Name:typing.TypeAlias = str
 languages: dict[tuple[LanguageCode, Name], Lang] = {}
 current_language: Lang
 
 class Underline:
-    def __getitem__(self, key:str) -> str:
+    # keys without translation, warned only once
+    missing_keys: set[str]
+    # pre-parsed templates of `__call__`
+    templates: dict[str, list[tuple[str, str|None, str, str|None]]]
+
+    def __init__(self):
+        self.missing_keys = set()
+        self.templates = {}
+
+    def _get(self, key:str) -> str|None:
         translation = current_language.get_translation(key)
+        if translation is None and key not in self.missing_keys:
+            self.missing_keys.add(key)
+            warn_tb(logger, f"Can't find translation for string '{key}'", level=3)
+        return translation
+
+    def __getitem__(self, key:str) -> str:
+        translation = self._get(key)
         if translation is None:
-            warn_tb(logger, f"Can't find translation for string '{key}'")
             return key
         return translation
+
     def __call__(self, key:str, **kwargs) -> str:
-        translation = current_language.get_translation(key)
+        translation = self._get(key)
         if translation is None:
-            warn_tb(logger, f"Can't find translation for string '{key}'")
             return key
-        return translation.format(**kwargs)
+        if key not in self.templates:
+            self.templates[key] = list(string.Formatter().parse(translation))
+        parts = []
+        for literal, field_name, format_spec, conversion in self.templates[key]:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            if not field_name.isidentifier() or "{" in (format_spec or ""):
+                # indexing, attributes, auto numbering or nested fields
+                return translation.format(**kwargs)
+            value = kwargs[field_name]
+            if conversion=="r":
+                value = repr(value)
+            elif conversion=="s":
+                value = str(value)
+            elif conversion=="a":
+                value = ascii(value)
+            parts.append(format(value, format_spec or ""))
+        return "".join(parts)
 _ = Underline()
 
-def load_language_from_file(path):
+def load_language_from_file(path) -> Lang:
     with open(path, "rb") as lang_file:
-        raw = tomllib.load(lang_file)
-    lang = Lang.load_lang(raw)
+        source = lang_file.read()
+    source_crc = zlib.crc32(source)
+    catalog_path = get_catalog_path(path)
+    header = read_catalog_header(catalog_path)
+    lang: Lang
+    if header is not None and header.source_crc==source_crc:
+        lang = CatalogLang(header, catalog_path, path)
+    else:
+        lang = compile_catalog(source, source_crc, catalog_path)
     languages[(lang.language_code, lang.name)] = lang
     return lang
 
@@ -112,8 +265,6 @@ def set_current_language_to_environment_default() -> None:
 
 def init():
     # load default language data
-    import sys
-    import os
     path_zh_cn = "i18n/quacro_lang_zh_cn.toml"
     path_en = "i18n/quacro_lang_en.toml"
     if getattr(sys, "frozen", False):
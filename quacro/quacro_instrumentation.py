@@ -0,0 +1,21 @@
+import time
+
+from . import quacro_metrics, quacro_tracing
+
+# Set when either metrics or tracing is enabled.
+# Measured sites check this flag before reading the clock.
+enabled = False
+
+def configure(metrics:bool, tracing:bool):
+    global enabled
+    quacro_metrics.enabled = metrics
+    quacro_tracing.enabled = tracing
+    enabled = metrics or tracing
+
+def record_span(name:str, category:str, start_ns:int, args:dict|None=None):
+    """Record the time since `start_ns` as a histogram and a trace span"""
+    end_ns = time.perf_counter_ns()
+    if quacro_metrics.enabled:
+        quacro_metrics.histogram(name).record(end_ns-start_ns)
+    if quacro_tracing.enabled:
+        quacro_tracing.complete(name, category, start_ns, end_ns, args)
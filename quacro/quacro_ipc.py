@@ -0,0 +1,378 @@
+import ctypes
+import threading
+import typing
+
+from .quacro_events import Event, EventStop, EVENT_LANE_BULK
+
+# Layout and decoding of the records in the shared hook event ring.
+# Only fixed size ctypes types are used here (no dll, no wintypes),
+# so this module can be imported on any platform.
+
+EVENT_TYPE_STOP = 0
+EVENT_TYPE_CREATE_WINDOW = 1
+EVENT_TYPE_DESTROY_WINDOW = 2
+EVENT_TYPE_MOVE_SIZE = 3
+EVENT_TYPE_ACTIVATE = 4
+EVENT_TYPE_ICON_TITLE_UPDATE = 5
+EVENT_TYPE_MINIMIZED = 6
+
+if ctypes.sizeof(ctypes.c_voidp) == 8:
+    # 64bit windows
+    HWND = ctypes.c_uint64
+else:
+    # 32bit windows
+    HWND = ctypes.c_uint32 # type: ignore
+
+# win32 BOOL and LONG are 32bit, but wintypes.LONG is 64bit on linux
+BOOL = ctypes.c_int32
+
+class Rect(ctypes.Structure):
+    _fields_ = [
+        ("left", ctypes.c_int32),
+        ("top", ctypes.c_int32),
+        ("right", ctypes.c_int32),
+        ("bottom", ctypes.c_int32),
+    ]
+
+class ActivateInfo(ctypes.Structure):
+    _fields_ = [
+        ("inactive", BOOL),
+        ("minimized", BOOL),
+    ]
+
+class IconTitleInfo(ctypes.Structure):
+    _fields_ = [
+        ("icon_changed", BOOL),
+        ("title_changed", BOOL),
+    ]
+
+class EventData(ctypes.Union):
+    _fields_ = [
+        ("rect", Rect),
+        ("activate_info", ActivateInfo),
+        ("icon_title_info", IconTitleInfo),
+    ]
+
+class IPCQueueItem(ctypes.Structure):
+    _fields_ = [
+        ("event_type", ctypes.c_int32),
+        # assigned by the hook for every event, including the dropped ones
+        ("sequence", ctypes.c_uint32),
+        ("hwnd", HWND),
+        # QueryPerformanceCounter ticks when the hook got the message
+        ("timestamp", ctypes.c_int64),
+        ("data", EventData),
+    ]
+
+
+class WindowEvent(Event):
+    __slots__ = ("hwnd",)
+    hwnd: int
+
+    def __init__(self, hwnd):
+        super().__init__()
+        self.hwnd = hwnd
+
+class EventCreateWindow(WindowEvent):
+    __slots__ = ()
+
+class EventDestroyWindow(WindowEvent):
+    __slots__ = ()
+
+class EventMoveSize(WindowEvent):
+    __slots__ = ("left", "top", "right", "bottom")
+    lane = EVENT_LANE_BULK
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    def __init__(self, hwnd, rect):
+        super().__init__(hwnd)
+        self.left, self.top, self.right, self.bottom = rect
+
+    @property
+    def rect(self) -> tuple[int, int, int, int]:
+        return (self.left, self.top, self.right, self.bottom)
+
+    def coalesce_key(self):
+        # only the latest rect matters
+        return (EVENT_TYPE_MOVE_SIZE, self.hwnd)
+
+    def release(self):
+        event_pool.release(self)
+
+class EventActivate(WindowEvent):
+    __slots__ = ("inactive", "minimized")
+    inactive: bool
+    minimized: bool
+
+    def __init__(self, hwnd, inactive, minimized):
+        super().__init__(hwnd)
+        self.inactive = bool(inactive)
+        self.minimized = bool(minimized)
+
+class EventIconTitleUpdate(WindowEvent):
+    __slots__ = ("icon_changed", "title_changed")
+    lane = EVENT_LANE_BULK
+    icon_changed: bool
+    title_changed: bool
+
+    def __init__(self, hwnd, icon_changed, title_changed):
+        super().__init__(hwnd)
+        self.icon_changed = bool(icon_changed)
+        self.title_changed = bool(title_changed)
+
+    def coalesce_key(self):
+        return (EVENT_TYPE_ICON_TITLE_UPDATE, self.hwnd)
+
+    def merge(self, older):
+        self.icon_changed |= older.icon_changed
+        self.title_changed |= older.title_changed
+
+class EventMinimized(WindowEvent):
+    __slots__ = ()
+
+class EventPool:
+    """
+    Free list of `EventMoveSize`, the event flooding the queue while dragging.
+    Events are put back by `Event.release` once handled or coalesced away.
+    Acquired by the forwarder thread and released by the event loop thread,
+    list.append and list.pop are atomic.
+    """
+    enabled: bool
+    max_size: int
+    free: list[EventMoveSize]
+
+    def __init__(self, max_size:int=64):
+        self.enabled = False
+        self.max_size = max_size
+        self.free = []
+
+    def acquire(self, hwnd:int, left:int, top:int, right:int, bottom:int) -> EventMoveSize:
+        if self.enabled:
+            try:
+                event = self.free.pop()
+            except IndexError:
+                pass
+            else:
+                event.enqueue_ns = 0
+                event.hook_ns = 0
+                event.hwnd = hwnd
+                event.left = left
+                event.top = top
+                event.right = right
+                event.bottom = bottom
+                return event
+        return EventMoveSize(hwnd, (left, top, right, bottom))
+
+    def release(self, event:EventMoveSize):
+        if self.enabled and len(self.free)<self.max_size:
+            self.free.append(event)
+
+event_pool = EventPool()
+
+def qpc_to_ns(ticks:int, frequency:int) -> int:
+    # the same conversion as time.perf_counter_ns on windows
+    return ticks*1_000_000_000//frequency
+
+def decode_event(item:IPCQueueItem, qpc_frequency:int) -> Event:
+    event_id = item.event_type
+    event: Event
+    if event_id==EVENT_TYPE_STOP:
+        return EventStop()
+    if event_id==EVENT_TYPE_CREATE_WINDOW:
+        event = EventCreateWindow(item.hwnd)
+    elif event_id==EVENT_TYPE_DESTROY_WINDOW:
+        event = EventDestroyWindow(item.hwnd)
+    elif event_id==EVENT_TYPE_MOVE_SIZE:
+        rect = item.data.rect
+        event = event_pool.acquire(
+            item.hwnd, rect.left, rect.top, rect.right, rect.bottom
+        )
+    elif event_id==EVENT_TYPE_ACTIVATE:
+        event = EventActivate(
+            item.hwnd,
+            item.data.activate_info.inactive,
+            item.data.activate_info.minimized
+        )
+    elif event_id==EVENT_TYPE_ICON_TITLE_UPDATE:
+        event = EventIconTitleUpdate(
+            item.hwnd,
+            item.data.icon_title_info.icon_changed,
+            item.data.icon_title_info.title_changed,
+        )
+    elif event_id==EVENT_TYPE_MINIMIZED:
+        event = EventMinimized(item.hwnd)
+    else:
+        raise OSError(f"Unknown event type id {event_id}")
+    event.hook_ns = qpc_to_ns(item.timestamp, qpc_frequency)
+    return event
+
+SEQUENCE_MASK = 0xFFFFFFFF
+
+class SequenceTracker:
+    """Count the events missing between the sequence numbers of the records"""
+    expected: int|None
+    missing_total: int
+    # missing events not yet taken by `take_missing`
+    missing_pending: int
+
+    def __init__(self):
+        self.expected = None
+        self.missing_total = 0
+        self.missing_pending = 0
+
+    def reset(self):
+        self.expected = None
+        self.missing_pending = 0
+
+    def observe(self, sequence:int) -> int:
+        """Return the number of events dropped right before this one"""
+        if self.expected is None:
+            missing = 0
+        else:
+            # sequence numbers wrap around at 2**32
+            missing = (sequence-self.expected)&SEQUENCE_MASK
+        self.expected = (sequence+1)&SEQUENCE_MASK
+        self.missing_total += missing
+        self.missing_pending += missing
+        return missing
+
+    def take_missing(self) -> int:
+        missing = self.missing_pending
+        self.missing_pending = 0
+        return missing
+
+# The interest table tells the hook which events are wanted,
+# so unwanted events are dropped before taking the ipc queue mutex.
+# Tracked hwnds are kept in an open addressing hash set, written by python
+# and read by the hook in every hooked process. A seqlock protects it:
+# `version` is odd while the table is being written.
+INTEREST_TABLE_BITS = 10
+INTEREST_TABLE_SIZE = 1<<INTEREST_TABLE_BITS
+# keep the load factor low so that the probe sequences stay short
+INTEREST_TABLE_MAX_ITEMS = INTEREST_TABLE_SIZE//2
+FIBONACCI_HASH_MULTIPLIER = 2654435761
+
+class InterestTable(ctypes.Structure):
+    _fields_ = [
+        ("version", ctypes.c_int32),
+        # when 0 the hook sends every event
+        ("enabled", ctypes.c_uint32),
+        # bit (1<<event_type): events sent for every window
+        ("always_mask", ctypes.c_uint32),
+        # bit (1<<event_type): events sent for the tracked windows only
+        ("tracked_mask", ctypes.c_uint32),
+        # events dropped by the hook, incremented by the hook
+        ("filtered_count", ctypes.c_uint32),
+        # low 32 bits of the tracked hwnds, 0 for empty slots
+        ("slots", ctypes.c_uint32*INTEREST_TABLE_SIZE),
+    ]
+
+def event_mask(*event_types:int) -> int:
+    mask = 0
+    for event_type in event_types:
+        mask |= 1<<event_type
+    return mask
+
+def interest_slot(hwnd:int) -> int:
+    # hwnd values only use the low 32 bits, even on 64bit windows
+    key = hwnd&0xFFFFFFFF
+    return ((key*FIBONACCI_HASH_MULTIPLIER)&0xFFFFFFFF)>>(32-INTEREST_TABLE_BITS)
+
+def encode_interest_slots(hwnds:typing.Iterable[int]) -> list[int]:
+    slots = [0]*INTEREST_TABLE_SIZE
+    for hwnd in hwnds:
+        key = hwnd&0xFFFFFFFF
+        if key==0:
+            continue
+        index = interest_slot(key)
+        # linear probing
+        while slots[index] not in (0, key):
+            index = (index+1)&(INTEREST_TABLE_SIZE-1)
+        slots[index] = key
+    return slots
+
+def interest_table_wants(table:InterestTable, event_type:int, hwnd:int) -> bool:
+    """The check done by the hook, see `is_event_wanted` in quacro_hook_proc.c"""
+    if not table.enabled:
+        return True
+    bit = 1<<event_type
+    if table.always_mask&bit:
+        return True
+    if not table.tracked_mask&bit:
+        return False
+    key = hwnd&0xFFFFFFFF
+    index = interest_slot(key)
+    for _ in range(INTEREST_TABLE_SIZE):
+        if table.slots[index]==key:
+            return True
+        if table.slots[index]==0:
+            return False
+        index = (index+1)&(INTEREST_TABLE_SIZE-1)
+    return False
+
+class InterestTableWriter:
+    """
+    Keep the interest table in sync with the tracked hwnds.
+    The table may be attached after the hwnds are set,
+    since the shared memory is only mapped by the hook event forwarder.
+    """
+    always_mask: int
+    tracked_mask: int
+    hwnds: frozenset[int]
+    table: InterestTable|None
+    # the table has too many hwnds and is disabled
+    overflowed: bool
+    _lock: threading.Lock
+
+    def __init__(self, always_mask:int, tracked_mask:int):
+        self.always_mask = always_mask
+        self.tracked_mask = tracked_mask
+        self.hwnds = frozenset()
+        self.table = None
+        self.overflowed = False
+        self._lock = threading.Lock()
+
+    def attach(self, table:InterestTable):
+        with self._lock:
+            self.table = table
+            self._write()
+
+    def detach(self):
+        with self._lock:
+            if self.table is not None:
+                self.table.enabled = 0
+            self.table = None
+
+    def update(self, hwnds:typing.Iterable[int]):
+        hwnds = frozenset(hwnds)
+        with self._lock:
+            if hwnds==self.hwnds:
+                return
+            self.hwnds = hwnds
+            self._write()
+
+    def filtered_count(self) -> int:
+        table = self.table
+        if table is None:
+            return 0
+        return table.filtered_count
+
+    def _write(self):
+        table = self.table
+        if table is None:
+            return
+        self.overflowed = len(self.hwnds)>INTEREST_TABLE_MAX_ITEMS
+        slots = None if self.overflowed else encode_interest_slots(self.hwnds)
+
+        table.version += 1 # odd, readers send the events while writing
+        if slots is None:
+            table.enabled = 0
+        else:
+            table.always_mask = self.always_mask
+            table.tracked_mask = self.tracked_mask
+            table.slots[:] = slots
+            table.enabled = 1
+        table.version += 1
@@ -3,16 +3,100 @@ import logging.handlers
 import traceback
 import sys
 import threading
+import os
+import time
+import gzip
+import shutil
+import queue
+import atexit
 from .quacro_app_data import LOG_PATH
 
+logger = logging.getLogger("logging")
+
+LOG_MAX_AGE = 30*24*3600 # seconds
+LOG_MAX_TOTAL_SIZE = 50*1024*1024 # bytes
+# logs of the last few launches are kept uncompressed
+LOG_KEEP_UNCOMPRESSED = 3
+
+class Snapshot:
+    """
+    A log argument formatted when the record is queued,
+    since what it describes may be gone when the listener writes the record.
+    It is still not formatted if the record is filtered by the level.
+    """
+    __slots__ = ()
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Put the record to the queue without formatting it,
+    so the message is formatted by the listener thread.
+    Only the `Snapshot` arguments are formatted here.
+    """
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if type(args) is tuple:
+            for arg in args:
+                if isinstance(arg, Snapshot):
+                    record.args = tuple(
+                        str(arg) if isinstance(arg, Snapshot) else arg for arg in args
+                    )
+                    break
+        return record
+
+log_listener: logging.handlers.QueueListener|None = None
+
+def prune_logs(log_dir:str, current_log:str, now:float|None=None):
+    """Compress the old logs, then remove the logs beyond the age and size limits"""
+    if now is None:
+        now = time.time()
+    try:
+        names = os.listdir(log_dir)
+    except OSError as err:
+        logger.error(f"Unable to list the logs: {err}")
+        return
+    logs = []
+    for name in names:
+        path = os.path.join(log_dir, name)
+        if path==current_log or not name.endswith((".log", ".log.gz")):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        logs.append((stat.st_mtime, path, stat.st_size))
+    # newest first, the names are timestamps
+    logs.sort(reverse=True)
+
+    kept = []
+    total_size = 0
+    for index, (mtime, path, size) in enumerate(logs):
+        try:
+            if now-mtime>LOG_MAX_AGE:
+                os.remove(path)
+                continue
+            if path.endswith(".log") and index>=LOG_KEEP_UNCOMPRESSED-1:
+                with open(path, "rb") as log_file, gzip.open(path+".gz", "wb") as gz_file:
+                    shutil.copyfileobj(log_file, gz_file)
+                os.utime(path+".gz", (mtime, mtime))
+                os.remove(path)
+                path += ".gz"
+                size = os.path.getsize(path)
+            total_size += size
+            if total_size>LOG_MAX_TOTAL_SIZE:
+                os.remove(path)
+                continue
+        except OSError as err:
+            logger.warning(f"Unable to prune log '{path}': {err}")
+            continue
+        kept.append(path)
+    logger.debug(f"Log retention: {len(kept)} of {len(logs)} old logs kept")
+
 def setup_log_config():
-    import os
-    import time
     log_filename = os.path.join(
         LOG_PATH, 
         time.strftime("%Y-%m-%d-%H-%M-%S.log",time.localtime())
     )
-    handlers = [logging.handlers.WatchedFileHandler(log_filename)]
+    handlers: list[logging.Handler] = [logging.handlers.WatchedFileHandler(log_filename)]
 
     if __debug__:
         LOG_LEVEL = logging.DEBUG
@@ -27,12 +111,38 @@ def setup_log_config():
     logging.addLevelName(logging.ERROR, "ERR")
     logging.addLevelName(logging.FATAL, "FTL")
 
+    formatter = logging.Formatter('[%(levelname)s] %(name)s: %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # the file io is done by the listener thread, not by the logging thread
+    global log_listener
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    log_listener.start()
+    atexit.register(stop_logging)
+
     logging.basicConfig(
         level=LOG_LEVEL,
-        handlers=handlers,
-        format = '[%(levelname)s] %(name)s: %(message)s'
+        handlers=[DeferredQueueHandler(log_queue)],
     )
 
+    threading.Thread(
+        target=prune_logs,
+        args=(LOG_PATH, log_filename),
+        name="quacro_log_retention",
+        daemon=True,
+    ).start()
+
+def stop_logging():
+    """Write the queued records and stop the listener thread"""
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
 def set_except_hook(logger:logging.Logger):
     def sys_hook(exc_type, exc_value, exc_traceback):
         tb_list = traceback.format_exception(exc_type, exc_value, exc_traceback)
@@ -45,9 +155,70 @@ def set_except_hook(logger:logging.Logger):
     threading.excepthook = threading_hook
 
 LOG_TB_LEN = 3
+
+# each call site and message may warn WARN_BURST times at once,
+# then once per WARN_REFILL_INTERVAL seconds
+WARN_BURST = 5
+WARN_REFILL_INTERVAL = 60.0
+# a summary of the suppressed warnings is logged at most this often
+WARN_SUMMARY_INTERVAL = 60.0
+WARN_MAX_FINGERPRINTS = 1024
+
+class WarningBucket:
+    __slots__ = ("tokens", "updated", "suppressed", "last_summary")
+    tokens: float
+    updated: float
+    # suppressed since the last warning or summary
+    suppressed: int
+    last_summary: float
+
+    def __init__(self, now:float):
+        self.tokens = WARN_BURST
+        self.updated = now
+        self.suppressed = 0
+        self.last_summary = now
+
+_warning_buckets: dict[tuple[str, int, str], WarningBucket] = {}
+_warning_lock = threading.Lock()
+
 def warn_tb(logger:logging.Logger, message, level=1):
-    stack = traceback.extract_stack(limit=level+LOG_TB_LEN)[:-level]
+    frame = sys._getframe(level)
+    message = str(message)
+    fingerprint = (frame.f_code.co_filename, frame.f_lineno, message)
+    now = time.monotonic()
+    with _warning_lock:
+        bucket = _warning_buckets.get(fingerprint)
+        if bucket is None:
+            if len(_warning_buckets)>=WARN_MAX_FINGERPRINTS:
+                _warning_buckets.clear()
+            bucket = _warning_buckets[fingerprint] = WarningBucket(now)
+        else:
+            bucket.tokens = min(
+                WARN_BURST,
+                bucket.tokens+(now-bucket.updated)/WARN_REFILL_INTERVAL
+            )
+            bucket.updated = now
+        if bucket.tokens<1:
+            bucket.suppressed += 1
+            if now-bucket.last_summary<WARN_SUMMARY_INTERVAL:
+                return
+            suppressed = bucket.suppressed
+            bucket.suppressed = 0
+            bucket.last_summary = now
+            summary = True
+        else:
+            bucket.tokens -= 1
+            suppressed = bucket.suppressed
+            bucket.suppressed = 0
+            summary = False
+    if summary:
+        logger.warning(
+            "Warning suppressed %d times: %s (%s:%d)",
+            suppressed, message, frame.f_code.co_filename, frame.f_lineno
+        )
+        return
+    stack = traceback.extract_stack(frame, limit=LOG_TB_LEN)
     tb = ''.join(traceback.format_list(stack))
+    if suppressed:
+        message = f"{message} (suppressed {suppressed} times before)"
     logger.warning(f'Warning: {message}\n{tb.rstrip()}')
-
-
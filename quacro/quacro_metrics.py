@@ -0,0 +1,219 @@
+import time
+import json
+import threading
+import typing
+
+# Instrumented code checks this flag before doing any measurement,
+# so the overhead is a global lookup when metrics are disabled.
+enabled = False
+
+class Counter:
+    value: int
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n:int=1):
+        self.value += n
+
+class Gauge:
+    value: float
+    callback: typing.Callable[[], float]|None
+
+    def __init__(self, callback:typing.Callable[[], float]|None=None):
+        self.value = 0
+        self.callback = callback
+
+    def set(self, value:float):
+        self.value = value
+
+    def read(self) -> float:
+        if self.callback is not None:
+            return self.callback()
+        return self.value
+
+# HDR-style log-linear buckets:
+# values below 2*SUB_BUCKET_COUNT are exact,
+# above that each power of 2 is split into SUB_BUCKET_COUNT buckets.
+SUB_BUCKET_BITS = 3
+SUB_BUCKET_COUNT = 1<<SUB_BUCKET_BITS
+
+def bucket_index(value:int) -> int:
+    if value<2*SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length()-SUB_BUCKET_BITS-1
+    return (
+        2*SUB_BUCKET_COUNT +
+        (shift-1)*SUB_BUCKET_COUNT +
+        (value>>shift)-SUB_BUCKET_COUNT
+    )
+
+def bucket_lower_bound(index:int) -> int:
+    if index<2*SUB_BUCKET_COUNT:
+        return index
+    index -= 2*SUB_BUCKET_COUNT
+    shift = index//SUB_BUCKET_COUNT+1
+    return (index%SUB_BUCKET_COUNT+SUB_BUCKET_COUNT)<<shift
+
+class Histogram:
+    """
+    Latency histogram, values are in nanoseconds.
+    Recorded from the dispatcher workers too, so it is locked.
+    """
+    buckets: dict[int, int]
+    count: int
+    total: int
+    min: int
+    max: int
+    _lock: threading.Lock
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, value:int):
+        if value<0:
+            value = 0
+        index = bucket_index(value)
+        with self._lock:
+            self.buckets[index] = self.buckets.get(index, 0)+1
+            if self.count==0 or value<self.min:
+                self.min = value
+            if value>self.max:
+                self.max = value
+            self.count += 1
+            self.total += value
+
+    def percentile(self, percent:float) -> int:
+        with self._lock:
+            return self._percentile(percent)
+
+    def _percentile(self, percent:float) -> int:
+        if self.count==0:
+            return 0
+        threshold = self.count*percent/100
+        accumulated = 0
+        for index in sorted(self.buckets):
+            accumulated += self.buckets[index]
+            if accumulated>=threshold:
+                return min(bucket_lower_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, typing.Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean_ns": self.total//self.count if self.count else 0,
+                "min_ns": self.min,
+                "p50_ns": self._percentile(50),
+                "p90_ns": self._percentile(90),
+                "p99_ns": self._percentile(99),
+                "max_ns": self.max,
+            }
+
+class MetricsRegistry:
+    counters: dict[str, Counter]
+    gauges: dict[str, Gauge]
+    histograms: dict[str, Histogram]
+    # extra structured data, such as lane stats of the event queue
+    providers: dict[str, typing.Callable[[], typing.Any]]
+    start_time: float
+    # guards creating the metrics, they are looked up from any thread
+    _lock: threading.Lock
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.providers = {}
+        self.start_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def counter(self, name:str) -> Counter:
+        if name not in self.counters:
+            with self._lock:
+                self.counters.setdefault(name, Counter())
+        return self.counters[name]
+
+    def gauge(self, name:str, callback=None) -> Gauge:
+        if name not in self.gauges:
+            with self._lock:
+                self.gauges.setdefault(name, Gauge(callback))
+        return self.gauges[name]
+
+    def histogram(self, name:str) -> Histogram:
+        if name not in self.histograms:
+            with self._lock:
+                self.histograms.setdefault(name, Histogram())
+        return self.histograms[name]
+
+    def register_provider(self, name:str, provider:typing.Callable[[], typing.Any]):
+        self.providers[name] = provider
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        uptime = time.monotonic()-self.start_time
+        counters = {}
+        for name, counter in list(self.counters.items()):
+            counters[name] = {
+                "value": counter.value,
+                "rate_per_sec": counter.value/uptime if uptime else 0.0,
+            }
+        return {
+            "uptime_sec": uptime,
+            "counters": counters,
+            "gauges": {
+                name: gauge.read() for name, gauge in list(self.gauges.items())
+            },
+            "histograms": {
+                name: histogram.summary()
+                for name, histogram in list(self.histograms.items())
+            },
+            "extra": {
+                name: provider() for name, provider in list(self.providers.items())
+            },
+        }
+
+registry = MetricsRegistry()
+
+def counter(name:str) -> Counter:
+    return registry.counter(name)
+
+def histogram(name:str) -> Histogram:
+    return registry.histogram(name)
+
+_hook_event_counters: dict[type, Counter] = {}
+
+def count_hook_event(event:object):
+    event_type = type(event)
+    if event_type not in _hook_event_counters:
+        _hook_event_counters[event_type] = counter(f"hook_events.{event_type.__name__}")
+    _hook_event_counters[event_type].value += 1
+
+def dump_json(path:str) -> dict[str, typing.Any]:
+    snapshot = registry.snapshot()
+    with open(path, "w", encoding="utf8") as dump_file:
+        json.dump(snapshot, dump_file, indent=2)
+    return snapshot
+
+def format_summary(snapshot:dict[str, typing.Any], max_lines:int=12) -> str:
+    """Human readable summary of the slowest histograms"""
+    lines = [f"Uptime: {snapshot['uptime_sec']:.0f}s"]
+    for name, value in snapshot["gauges"].items():
+        lines.append(f"{name}: {value}")
+    histograms = sorted(
+        snapshot["histograms"].items(),
+        key=lambda item: item[1]["p99_ns"],
+        reverse=True,
+    )
+    for name, summary in histograms[:max_lines]:
+        lines.append(
+            f"{name}: n={summary['count']} "
+            f"p50={summary['p50_ns']/1e6:.2f}ms "
+            f"p99={summary['p99_ns']/1e6:.2f}ms "
+            f"max={summary['max_ns']/1e6:.2f}ms"
+        )
+    return "\n".join(lines)
@@ -1,3 +1,4 @@
+import os
 import sys
 import types
 
@@ -22,3 +23,20 @@ def inject():
         # Enable context menu
         sender.CoreWebView2.Settings.AreDefaultContextMenusEnabled = True
     edgechromium.EdgeChrome.on_webview_ready = on_webview_ready
+
+SHARED_RENDERER_ARGUMENTS = "--renderer-process-limit=1 --process-per-site"
+
+def enable_shared_renderer():
+    """
+    The docks are created with the same user data folder,
+    so they already share one WebView2 browser process.
+    Limit them to one renderer process too, instead of one per dock.
+    One renderer crash then takes down every dock.
+    Call it before `webview.start`.
+    """
+    # WebView2 appends the variable to the arguments set by pywebview,
+    # so only the arguments of the user are kept here
+    arguments = os.environ.get("WEBVIEW2_ADDITIONAL_BROWSER_ARGUMENTS", "")
+    os.environ["WEBVIEW2_ADDITIONAL_BROWSER_ARGUMENTS"] = (
+        f"{arguments} {SHARED_RENDERER_ARGUMENTS}".strip()
+    )
@@ -0,0 +1,73 @@
+import contextlib
+import json
+import logging
+import time
+import typing
+
+from . import quacro_tracing
+
+logger = logging.getLogger("startup")
+
+class StartupTimeline:
+    """Durations of the startup phases, relative to the creation of the timeline"""
+    start_ns: int
+    # (name, start ns, end ns), end is equal to start for milestones
+    records: list[tuple[str, int, int]]
+    finished: bool
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.records = []
+        self.finished = False
+
+    @contextlib.contextmanager
+    def phase(self, name:str) -> typing.Iterator[None]:
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.records.append((name, start_ns, time.perf_counter_ns()))
+
+    def mark(self, name:str):
+        now = time.perf_counter_ns()
+        self.records.append((name, now, now))
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return {
+            "phases": [
+                {
+                    "name": name,
+                    "start_ms": (start_ns-self.start_ns)/1e6,
+                    "duration_ms": (end_ns-start_ns)/1e6,
+                }
+                for name, start_ns, end_ns in self.records
+            ],
+        }
+
+    def finish(self, dump_path:str|None=None):
+        """Log the timeline, and write it as json if `dump_path` is set"""
+        if self.finished:
+            return
+        self.finished = True
+        lines = []
+        for name, start_ns, end_ns in self.records:
+            start_ms = (start_ns-self.start_ns)/1e6
+            if end_ns==start_ns:
+                lines.append(f"  {start_ms:9.1f}ms  {name}")
+            else:
+                lines.append(
+                    f"  {start_ms:9.1f}ms  {name}: {(end_ns-start_ns)/1e6:.1f}ms"
+                )
+            if quacro_tracing.enabled:
+                quacro_tracing.complete(f"startup.{name}", "startup", start_ns, end_ns)
+        logger.info("Startup timeline:\n"+"\n".join(lines))
+        if dump_path is None:
+            return
+        try:
+            with open(dump_path, "w", encoding="utf8") as dump_file:
+                json.dump(self.to_dict(), dump_file, indent=2)
+        except OSError as err:
+            logger.error(f"Unable to write the startup timeline: {err}")
+
+# created when quacro is first imported, which is close to the process start
+timeline = StartupTimeline()
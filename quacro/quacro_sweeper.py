@@ -0,0 +1,47 @@
+import typing
+
+# seconds between two batches of a sweep pass
+SWEEP_BATCH_DELAY = 0.1
+
+class WindowSweeper:
+    """
+    Find the windows destroyed without a destroy event.
+    The known windows are checked `batch_size` at a time,
+    a new pass starts `interval` seconds after the last one is finished.
+    """
+    interval: float
+    batch_size: int
+    # windows left to check in the current pass
+    pending: list[int]
+    next_time: float
+    pass_reclaimed: int
+    reclaimed_total: int
+
+    def __init__(self, interval:float, batch_size:int, now:float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending = []
+        self.next_time = now+interval
+        self.pass_reclaimed = 0
+        self.reclaimed_total = 0
+
+    def next_batch(self, now:float, known_windows:typing.Iterable[int]) -> list[int]|None:
+        """The windows to be checked now, None if it is not the time"""
+        if now<self.next_time:
+            return None
+        if not self.pending:
+            self.pending = list(known_windows)
+            self.pass_reclaimed = 0
+        batch = self.pending[-self.batch_size:]
+        del self.pending[-self.batch_size:]
+        return batch
+
+    def finish_batch(self, now:float, reclaimed:int) -> int|None:
+        """Return the windows reclaimed by the pass when it is finished"""
+        self.pass_reclaimed += reclaimed
+        self.reclaimed_total += reclaimed
+        if self.pending:
+            self.next_time = now+SWEEP_BATCH_DELAY
+            return None
+        self.next_time = now+self.interval
+        return self.pass_reclaimed
@@ -0,0 +1,113 @@
+import collections
+import itertools
+import json
+import os
+import threading
+import typing
+
+# Spans are only recorded when this flag is set
+enabled = False
+
+DEFAULT_BUFFER_SIZE = 100000
+
+# (phase, name, category, timestamp ns, duration ns, thread id, span id, args)
+TraceRecord: typing.TypeAlias = tuple[
+    str, str, str, int, int, int, int, dict|None
+]
+
+# a ring buffer, the oldest records are dropped when full
+_records: collections.deque[TraceRecord] = collections.deque(maxlen=DEFAULT_BUFFER_SIZE)
+_thread_names: dict[int, str] = {}
+_span_ids = itertools.count(1)
+
+# tid of the virtual track for spans which don't belong to any thread
+VIRTUAL_TID = 0
+
+def configure(buffer_size:int):
+    global _records
+    _records = collections.deque(maxlen=buffer_size)
+
+def _current_tid() -> int:
+    tid = threading.get_ident()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    return tid
+
+def complete(
+        name:str,
+        category:str,
+        start_ns:int,
+        end_ns:int,
+        args:dict|None=None
+    ):
+    """A span on the current thread, spans of a thread must be nested"""
+    _records.append(
+        ("X", name, category, start_ns, end_ns-start_ns, _current_tid(), 0, args)
+    )
+
+def async_span(
+        name:str,
+        category:str,
+        start_ns:int,
+        end_ns:int,
+        args:dict|None=None
+    ):
+    """A span that can overlap with others, such as waiting in a queue"""
+    _records.append(
+        ("A", name, category, start_ns, end_ns-start_ns, VIRTUAL_TID, next(_span_ids), args)
+    )
+
+def instant(name:str, category:str, timestamp_ns:int, args:dict|None=None):
+    _records.append(
+        ("i", name, category, timestamp_ns, 0, _current_tid(), 0, args)
+    )
+
+def _to_trace_events(records:list[TraceRecord]) -> list[dict]:
+    pid = os.getpid()
+    trace_events: list[dict] = []
+    for tid, thread_name in list(_thread_names.items()):
+        trace_events.append({
+            "ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+            "args": {"name": thread_name},
+        })
+    for phase, name, category, timestamp_ns, duration_ns, tid, span_id, args in records:
+        trace_event: dict[str, typing.Any] = {
+            "name": name,
+            "cat": category,
+            "ts": timestamp_ns/1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            trace_event["args"] = args
+        if phase=="X":
+            trace_event["ph"] = "X"
+            trace_event["dur"] = duration_ns/1000
+        elif phase=="i":
+            trace_event["ph"] = "i"
+            trace_event["s"] = "t"
+        else:
+            # async span, split into begin and end
+            trace_event["ph"] = "b"
+            trace_event["id"] = span_id
+            end_event = dict(trace_event)
+            end_event["ph"] = "e"
+            end_event["ts"] = (timestamp_ns+duration_ns)/1000
+            end_event.pop("args", None)
+            trace_events.append(trace_event)
+            trace_event = end_event
+        trace_events.append(trace_event)
+    return trace_events
+
+def dump(path:str) -> int:
+    """Write the buffered spans as Chrome trace-event JSON"""
+    records = list(_records)
+    with open(path, "w", encoding="utf8") as trace_file:
+        json.dump(
+            {
+                "traceEvents": _to_trace_events(records),
+                "displayTimeUnit": "ms",
+            },
+            trace_file,
+        )
+    return len(records)
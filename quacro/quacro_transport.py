@@ -0,0 +1,268 @@
+import collections
+import ctypes
+import logging
+import mmap
+import threading
+import time
+import typing
+
+from . import quacro_metrics
+from .quacro_events import Event, EventStop
+from .quacro_ipc import (
+    IPCQueueItem,
+    InterestTable,
+    SequenceTracker,
+    SEQUENCE_MASK,
+    decode_event,
+    interest_table_wants,
+)
+
+logger = logging.getLogger("transport")
+
+class HookEventTransport:
+    """
+    Carries `IPCQueueItem` records from the hook (the producer)
+    to the hook event forwarder (the consumer).
+    The forwarder only uses the methods of this class.
+    """
+    # ticks per second of `IPCQueueItem.timestamp`
+    timestamp_frequency: int = 1_000_000_000
+    sequence_tracker: SequenceTracker
+
+    def __init__(self):
+        self.sequence_tracker = SequenceTracker()
+
+    def open(self) -> None:
+        """Set up the ring, called by the forwarder before `start_producer`"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def start_producer(self) -> None:
+        pass
+
+    def stop_producer(self) -> None:
+        pass
+
+    def send_stop(self) -> None:
+        """Make `wait_event` return `EventStop`, thread-safe"""
+        raise NotImplementedError
+
+    def dropped_count(self) -> int:
+        """Events dropped by the producer because the ring was full"""
+        raise NotImplementedError
+
+    def interest_table(self) -> InterestTable|None:
+        """Available after `open`"""
+        return None
+
+    def _wait_item(self) -> IPCQueueItem|None:
+        """Block until a record is read, None if stopped"""
+        raise NotImplementedError
+
+    def wait_event(self) -> Event:
+        item = self._wait_item()
+        if item is None:
+            return EventStop()
+        event = decode_event(item, self.timestamp_frequency)
+        missing = self.sequence_tracker.observe(item.sequence)
+        if missing:
+            logger.warning("%d hook events were dropped before %s", missing, type(event).__name__)
+            if quacro_metrics.enabled:
+                quacro_metrics.counter("hook_events.dropped").inc(missing)
+        return event
+
+class MmapRingHeader(ctypes.Structure):
+    _fields_ = [
+        # free running counters, the slot index is counter%capacity
+        ("head", ctypes.c_uint32), # written by the producer only
+        ("tail", ctypes.c_uint32), # written by the consumer only
+        ("next_sequence", ctypes.c_uint32),
+        ("dropped_count", ctypes.c_uint32),
+        ("stop", ctypes.c_uint32),
+        ("capacity", ctypes.c_uint32),
+    ]
+
+def mmap_ring_size(capacity:int) -> int:
+    return (
+        ctypes.sizeof(MmapRingHeader) +
+        ctypes.sizeof(IPCQueueItem)*capacity +
+        ctypes.sizeof(InterestTable)
+    )
+
+class MmapRing:
+    """Views of a single-producer/single-consumer ring in a mmap"""
+    buffer: mmap.mmap
+    header: MmapRingHeader
+    items: ctypes.Array
+    interest_table: InterestTable
+
+    def __init__(self, buffer:mmap.mmap, capacity:int):
+        if capacity&(capacity-1):
+            raise ValueError("capacity must be a power of 2")
+        self.buffer = buffer
+        self.header = MmapRingHeader.from_buffer(buffer)
+        items_offset = ctypes.sizeof(MmapRingHeader)
+        self.items = (IPCQueueItem*capacity).from_buffer(buffer, items_offset)
+        self.interest_table = InterestTable.from_buffer(
+            buffer, items_offset+ctypes.sizeof(self.items)
+        )
+        if self.header.capacity==0:
+            self.header.capacity = capacity
+        elif self.header.capacity!=capacity:
+            raise ValueError(
+                f"ring capacity mismatch: {self.header.capacity}!={capacity}"
+            )
+
+    def size(self) -> int:
+        return (self.header.head-self.header.tail)&SEQUENCE_MASK
+
+    def release(self):
+        # the mmap can't be closed while the views exist
+        del self.header
+        del self.items
+        del self.interest_table
+
+class MmapRingProducer:
+    """The hook side of `MmapRingTransport`, the same protocol as `put_hook_event`"""
+    ring: MmapRing
+    wakeup: threading.Event|None
+
+    def __init__(self, ring:MmapRing, wakeup:threading.Event|None=None):
+        self.ring = ring
+        self.wakeup = wakeup
+
+    def put(self, item:IPCQueueItem) -> bool:
+        return self.put_batch((item,))==1
+
+    def put_batch(self, items) -> int:
+        """Put the records and publish them at once, return the count put"""
+        ring = self.ring
+        header = ring.header
+        table = ring.interest_table
+        capacity = header.capacity
+        head = header.head
+        free = capacity-((head-header.tail)&SEQUENCE_MASK)
+        put_count = 0
+        for item in items:
+            if not interest_table_wants(table, item.event_type, item.hwnd):
+                table.filtered_count += 1
+                continue
+            item.timestamp = time.perf_counter_ns()
+            item.sequence = header.next_sequence
+            header.next_sequence = (header.next_sequence+1)&SEQUENCE_MASK
+            if free==0:
+                header.dropped_count += 1
+                continue
+            ring.items[head&(capacity-1)] = item
+            head = (head+1)&SEQUENCE_MASK
+            free -= 1
+            put_count += 1
+        # publish after the records are written
+        header.head = head
+        if put_count and self.wakeup is not None:
+            self.wakeup.set()
+        return put_count
+
+class MmapRingTransport(HookEventTransport):
+    """
+    A portable transport over a mmap with the same record layout as the
+    win32 ring. The producer can be in another process when `path` is set,
+    the consumer polls the ring in that case.
+    """
+    path: str|None
+    capacity: int
+    poll_interval: float
+    ring: MmapRing|None
+    _file: typing.BinaryIO|None
+    _buffer: mmap.mmap|None
+    _wakeup: threading.Event
+    # records read from the ring but not returned yet
+    _batch: collections.deque[IPCQueueItem]
+
+    def __init__(self, path:str|None=None, capacity:int=256, poll_interval:float=0.001):
+        super().__init__()
+        self.path = path
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.ring = None
+        self._file = None
+        self._buffer = None
+        self._wakeup = threading.Event()
+        self._batch = collections.deque()
+
+    def open(self):
+        size = mmap_ring_size(self.capacity)
+        if self.path is None:
+            self._buffer = mmap.mmap(-1, size)
+        else:
+            self._file = open(self.path, "a+b")
+            self._file.truncate(size)
+            self._buffer = mmap.mmap(self._file.fileno(), size)
+        self.ring = MmapRing(self._buffer, self.capacity)
+        header = self.ring.header
+        header.tail = header.head
+        header.stop = 0
+        header.dropped_count = 0
+        self.ring.interest_table.enabled = 0
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.release()
+            self.ring = None
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def producer(self) -> MmapRingProducer:
+        """A producer in this process, which also wakes up the consumer"""
+        assert self.ring is not None
+        return MmapRingProducer(self.ring, self._wakeup)
+
+    def send_stop(self):
+        ring = self.ring
+        if ring is not None:
+            ring.header.stop = 1
+        self._wakeup.set()
+
+    def dropped_count(self) -> int:
+        if self.ring is None:
+            return 0
+        return self.ring.header.dropped_count
+
+    def interest_table(self) -> InterestTable|None:
+        if self.ring is None:
+            return None
+        return self.ring.interest_table
+
+    def _read_batch(self) -> None:
+        ring = self.ring
+        assert ring is not None
+        header = ring.header
+        head = header.head
+        tail = header.tail
+        mask = header.capacity-1
+        while tail!=head:
+            self._batch.append(IPCQueueItem.from_buffer_copy(ring.items[tail&mask]))
+            tail = (tail+1)&SEQUENCE_MASK
+        # release the slots after the records are copied
+        header.tail = tail
+
+    def _wait_item(self) -> IPCQueueItem|None:
+        while 1:
+            ring = self.ring
+            if ring is None:
+                return None
+            # like the win32 ring, pending records are read before the stop
+            if not self._batch:
+                self._read_batch()
+            if self._batch:
+                return self._batch.popleft()
+            if ring.header.stop:
+                return None
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -0,0 +1,156 @@
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from . import quacro_metrics
+from .quacro_events import Event, event_fields
+
+logger = logging.getLogger("watchdog")
+
+def describe_event(event:Event) -> str:
+    # no win32 calls here, the window of the event may be the hung one
+    fields = ", ".join(f"{name}={value!r}" for name, value in event_fields(event).items())
+    return f"{type(event).__name__}({fields})"
+
+def task_name(task:Event|str) -> str:
+    return task if isinstance(task, str) else type(task).__name__
+
+def describe_task(task:Event|str) -> str:
+    return task if isinstance(task, str) else describe_event(task)
+
+def format_thread_stacks() -> str:
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    sections = []
+    for thread_id, frame in sys._current_frames().items():
+        thread_name = thread_names.get(thread_id, "<unknown>")
+        stack = "".join(traceback.format_stack(frame))
+        sections.append(f"Thread '{thread_name}' ({thread_id}):\n{stack}")
+    return "\n".join(sections)
+
+class StallWatchdog:
+    """
+    Watch the handler running on the event loop thread,
+    either an event or a timer task labelled by its name.
+    When a handler runs longer than `threshold` seconds,
+    the stacks of all threads are written to a stall report in `report_dir`.
+    At most one report is written per `report_interval` seconds,
+    and at most `max_reports` per session.
+    """
+    threshold: float
+    report_dir: str
+    report_interval: float
+    max_reports: int
+
+    # the handler being run, set by the event loop thread
+    current_task: Event|str|None
+    current_start: float
+    # start time of the handler that has been reported
+    reported_start: float
+
+    report_count: int
+    suppressed_count: int
+    last_report_time: float|None
+
+    _stop: threading.Event
+    thread: threading.Thread|None
+
+    def __init__(
+            self,
+            threshold:float,
+            report_dir:str,
+            report_interval:float=60.0,
+            max_reports:int=20
+        ):
+        self.threshold = threshold
+        self.report_dir = report_dir
+        self.report_interval = report_interval
+        self.max_reports = max_reports
+        self.current_task = None
+        self.current_start = 0.0
+        self.reported_start = 0.0
+        self.report_count = 0
+        self.suppressed_count = 0
+        self.last_report_time = None
+        self._stop = threading.Event()
+        self.thread = None
+
+    def handler_started(self, task:Event|str):
+        self.current_start = time.monotonic()
+        self.current_task = task
+
+    def handler_finished(self):
+        self.current_task = None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.watch,
+            name="quacro_watchdog",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def watch(self):
+        # check several times per threshold, so a stall is found in time
+        interval = self.threshold/4
+        while not self._stop.wait(interval):
+            task = self.current_task
+            start = self.current_start
+            if task is None or start==self.reported_start:
+                continue
+            elapsed = time.monotonic()-start
+            if elapsed<self.threshold:
+                continue
+            self.reported_start = start
+            self.on_stall(task, elapsed)
+        logger.info("watchdog ended")
+
+    def on_stall(self, task:Event|str, elapsed:float):
+        if quacro_metrics.enabled:
+            quacro_metrics.counter("watchdog.stalls").inc()
+        now = time.monotonic()
+        if (
+            self.report_count>=self.max_reports or
+            (
+                self.last_report_time is not None and
+                now-self.last_report_time<self.report_interval
+            )
+        ):
+            self.suppressed_count += 1
+            logger.warning(
+                f"Event loop stalled for {elapsed:.1f}s "
+                f"handling {task_name(task)}, report suppressed"
+            )
+            return
+        self.last_report_time = now
+        self.report_count += 1
+        self.write_report(task, elapsed)
+
+    def write_report(self, task:Event|str, elapsed:float):
+        report_path = os.path.join(
+            self.report_dir,
+            time.strftime("stall-%Y-%m-%d-%H-%M-%S.txt", time.localtime())
+        )
+        report = (
+            f"Event loop stalled for {elapsed:.3f}s "
+            f"(threshold {self.threshold}s)\n"
+            f"Handling: {describe_task(task)}\n"
+            f"Reports suppressed since the last one: {self.suppressed_count}\n\n"
+            f"{format_thread_stacks()}"
+        )
+        self.suppressed_count = 0
+        try:
+            with open(report_path, "w", encoding="utf8") as report_file:
+                report_file.write(report)
+        except OSError as err:
+            logger.error(f"Unable to write stall report: {err}")
+            return
+        logger.warning(
+            f"Event loop stalled for {elapsed:.1f}s "
+            f"handling {task_name(task)}, report written to '{report_path}'"
+        )
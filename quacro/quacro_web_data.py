@@ -1,2 +1,2 @@
 # this file is auto generated
-frontend_html = '<script>`use strict`;var default_icon_svg=`\n<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 50 50">\n    <circle cx="25" cy="25" r="25" fill="#0b68aa"/>\n    <text \n        x="25"\n        y="25"\n        text-anchor="middle" \n        dominant-baseline="middle"\n        font-size="24"\n        fill="#eee"\n    >Qd</text>\n</svg>\n`;var default_icon=`data:image/svg+xml;charset=utf8,${encodeURIComponent(default_icon_svg)}`;const SVG_NS=`http://www.w3.org/2000/svg`;const TAB_DRAG_TYPE=`application/quacro-dock-tab`;class Tab{constructor(a,b,c,d){this.tab_id=d;this.container=a;this.element=document.createElement(`div`);this.element.setAttribute(`active`,`false`);this.element.setAttribute(`moving`,`false`);this.element.setAttribute(`title`,b);this.element.setAttribute(`draggable`,`true`);let e=document.createElement(`div`);e.setAttribute(`class`,`highlight_bar`);this.element.appendChild(e);let f=document.createElement(`div`);f.setAttribute(`class`,`icon`);{this.icon_image_element=document.createElement(`img`);this.icon_image_element.setAttribute(`src`,c);f.appendChild(this.icon_image_element);this.close_tab_btn=document.createElementNS(SVG_NS,`svg`);this.close_tab_btn.setAttribute(`class`,`close_btn`);this.close_tab_btn.setAttribute(`viewBox`,`0 0 50 50`);let a=document.createElementNS(SVG_NS,`use`);a.setAttribute(`href`,`#close_tab_btn_icon`);this.close_tab_btn.appendChild(a);f.appendChild(this.close_tab_btn)}this.element.appendChild(f);this.name_label_element=document.createElement(`p`);this.name_label_element.setAttribute(`class`,`name_label`);this.name_label_element.innerText=b;this.element.appendChild(this.name_label_element);this.drag_event_counter=0;this.mouse_hovering=!1;this.register_events()}update_icon(a){this.icon_image_element.setAttribute(`src`,a)}update_title(a){this.element.setAttribute(`title`,a);this.name_label_element.innerText=a}register_events(){this.element.onclick=a=>{this.container.request_activate_tab(this.tab_id)};this.close_tab_btn.onclick=a=>{a.stopPropagation();this.container.request_close_tab(this.tab_id)};this.element.ondragstart=a=>{a.dataTransfer.effectAllowed=`move`;a.dataTransfer.setData(TAB_DRAG_TYPE,`quacro`);this.container.dragging_tab=this.element;setTimeout(()=>{this.container.dragging_tab.setAttribute(`moving`,`true`)})};this.element.ondragend=a=>{a.preventDefault();this.element.setAttribute(`moving`,`false`)};this.element.ondragover=a=>{a.preventDefault();if(this.element===this.container.dragging_tab)return undefined;if(!a.dataTransfer.types.includes(TAB_DRAG_TYPE))return undefined;let b=this.element.getBoundingClientRect();let c=a.clientY- b.top;if(c>b.height/2)return this.container.element.insertBefore(this.container.dragging_tab,this.element.nextSibling),undefined;this.container.element.insertBefore(this.container.dragging_tab,this.element)};this.element.ondragenter=a=>{a.preventDefault();this.drag_event_counter++;if(this.drag_event_counter!==1)return undefined;!a.dataTransfer.types.includes(TAB_DRAG_TYPE)&&(this.ext_drag_float_timeout=setTimeout(()=>{this.container.request_activate_tab(this.tab_id)},500))};this.element.ondragleave=a=>{a.preventDefault();this.drag_event_counter--;if(this.drag_event_counter!==0)return undefined;!a.dataTransfer.types.includes(TAB_DRAG_TYPE)&&clearTimeout(this.ext_drag_float_timeout)};this.element.ondrop=a=>{a.preventDefault();this.drag_event_counter=0};this.element.onmouseenter=a=>{this.mouse_hovering=!0};this.element.onmouseleave=a=>{this.mouse_hovering=!1}}activate(){this.element.setAttribute(`active`,`true`)}deactivate(){this.element.setAttribute(`active`,`false`)}}const MENU_ITEM_KEY_CLOSE=`close`;const MENU_ITEM_KEY_CLOSE_ALL=`close_all`;const MENU_ITEM_KEY_CLOSE_OTHERS=`close_others`;const MENU_ITEM_KEY_RELAOD_ICON_TITLE=`reload_icon_title`;class TabList{constructor(){this.element=document.getElementById(`tab_list`);this.tab_id_map=new Map();this.tab_activated=null;this.dragging_tab=null;this.last_menued_tab=null}create_tab(a,b){if(b in this.tab_id_map)throw TypeError(`Tab id ${b} has been exist`);let c=new Tab(this,a,default_icon,b);this.element.appendChild(c.element);this.tab_id_map.set(b,c);this.request_get_icon(b);return c}remove_tab(a){let b=this.tab_id_map.get(a);if(b===undefined)throw TypeError(`Invalid tab id ${a}`);b===this.tab_activated&&(this.tab_activated=null);this.element.removeChild(b.element);this.tab_id_map.delete(a)}activate_tab(a){this.tab_activated!==null&&this.tab_activated.deactivate();this.tab_activated=this.tab_id_map.get(a);this.tab_activated.activate()}get_context_menu(){for(const a of this.tab_id_map.values())if(a.mouse_hovering)return this.last_menued_tab=a,[MENU_ITEM_KEY_CLOSE,MENU_ITEM_KEY_CLOSE_OTHERS,MENU_ITEM_KEY_CLOSE_ALL,null,MENU_ITEM_KEY_RELAOD_ICON_TITLE];return null}execute_menu_item_cmd(a){if(this.last_menued_tab===null)return undefined;switch(a){case MENU_ITEM_KEY_CLOSE:this.request_close_tab(this.last_menued_tab.tab_id);break;case MENU_ITEM_KEY_CLOSE_ALL:for(const a of Array.from(this.tab_id_map.keys()))this.request_close_tab(a);break;case MENU_ITEM_KEY_CLOSE_OTHERS:for(const a of Array.from(this.tab_id_map.keys())){if(a===this.last_menued_tab.tab_id)continue;this.request_close_tab(a)};break;case MENU_ITEM_KEY_RELAOD_ICON_TITLE:this.request_get_icon(this.last_menued_tab.tab_id);this.request_get_title(this.last_menued_tab.tab_id);break}this.last_menued_tab=null}request_get_icon(a){pywebview.api.api_get_icon(a).then(b=>{b&&this.tab_id_map.get(a).update_icon(b)})}request_get_title(a){pywebview.api.api_get_title(a).then(b=>{b&&this.tab_id_map.get(a).update_title(b)})}request_activate_tab(a){if(this.tab_activated!==null&&this.tab_activated.tab_id==a)return undefined;pywebview.api.api_activate_tab(a)}request_close_tab(a){pywebview.api.api_close_tab(a)}}window.onload=()=>{var a=(()=>{var d=(d=>{a=d.clientX;window.addEventListener(`mouseup`,c);window.addEventListener(`mousemove`,b)});var c=(()=>{window.removeEventListener(`mousemove`,b);window.removeEventListener(`mouseup`,c)});var b=(b=>{let c=b.screenX- a;pywebview.api.api_horizontal_resize(c)});var a=0;var e=document.querySelectorAll(`#horizontal_resize_region`);for(var f=0;f<e.length;f++)e[f].addEventListener(`mousedown`,d)});a()}</script><style>body{user-select:none;background-color:#f4f4f4;flex-direction:column;width:100%;height:100%;margin:0;padding:0;display:flex;overflow:hidden}#horizontal_resize_region{opacity:0;width:5px;margin:0;position:fixed;top:0;bottom:0;left:0}#horizontal_resize_region:hover{cursor:ew-resize}#top_bar{z-index:1;-webkit-app-region:drag;background-image:linear-gradient(30deg,#09f,#5eabef);height:50px;box-shadow:0 1px 4px #999}#top_bar>p{color:#fff;margin:10px 10px 10px 15px;font-size:15px}#bottom_bar{z-index:1;background-color:#f0f0f0;height:50px;box-shadow:0 -2px 5px #ccc}#tab_list{scrollbar-width:none;z-index:0;height:100%;margin:0;padding:0;transition:all .25s;overflow:hidden auto}#tab_list:hover{scrollbar-width:thin}#tab_list>div{background-color:#f0f0f0;flex-direction:row;align-items:center;width:100vw;height:64px;margin:0;transition:inherit;display:flex;left:0}#tab_list>div[active=true]{background-color:#ddd}#tab_list>div:hover{cursor:pointer;background-color:#ccc}#tab_list>div[moving=true]{opacity:.3}#tab_list>div>.icon{aspect-ratio:1;flex-shrink:0;height:70%;margin-left:10px;margin-right:10px;transition:inherit;position:relative}#tab_list>div>.icon>img{filter:drop-shadow(1px 1px 1px #00000050);-webkit-user-drag:none;width:100%;height:100%}#tab_list>div>.icon>.close_btn{filter:grayscale()brightness(2);opacity:0;height:16px;transition:inherit;position:absolute;top:-4px;right:-4px}#tab_list>div:hover>.icon>.close_btn{opacity:.8}#tab_list>div>.icon>.close_btn:hover{filter:none;transform:rotate(90deg)}#tab_list>div>.highlight_bar{opacity:0;background-color:#00aee8;flex-shrink:0;width:5px;height:100%;transition:inherit}#tab_list>div[active=true]>.highlight_bar{opacity:1}#tab_list>div>.name_label{text-wrap:nowrap;flex-grow:1;overflow:hidden;mask-image:linear-gradient(270deg,#0000,#000 30%)}@media (width>=100px){#tab_list>div>.name_label,#top_bar>p#title_long{display:block}#top_bar>p#title_mini{display:none}}@media (width<=100px){#tab_list>div>.name_label,#top_bar>p#title_long{display:none}#top_bar>p#title_mini{display:block}}</style></head><svg display=none xmlns=http://www.w3.org/2000/svg><g id=close_tab_btn_icon stroke=white stroke-linecap=round stroke-width=4><circle cx=25 cy=25 fill=#e81123 r=25 stroke=none /><line x1=14 x2=36 y1=14 y2=36 /><line x1=36 x2=14 y1=14 y2=36 /></g></svg><body><div id=top_bar><p id=title_long>QuacroDock<p id=title_mini>Quacro</div><div id=tab_list></div><div id=bottom_bar></div><div id=horizontal_resize_region></div>'
+frontend_html = '<script>`use strict`;var default_icon_svg=`\n<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 50 50">\n    <circle cx="25" cy="25" r="25" fill="#0b68aa"/>\n    <text \n        x="25"\n        y="25"\n        text-anchor="middle" \n        dominant-baseline="middle"\n        font-size="24"\n        fill="#eee"\n    >Qd</text>\n</svg>\n`;var default_icon=`data:image/svg+xml;charset=utf8,${encodeURIComponent(default_icon_svg)}`;const SVG_NS=`http://www.w3.org/2000/svg`;const TAB_DRAG_TYPE=`application/quacro-dock-tab`;class Tab{constructor(a,b,c,d){let i=`class`,h=`false`,g=`div`;this.tab_id=d;this.container=a;this.element=document.createElement(g);this.element.setAttribute(`active`,h);this.element.setAttribute(`moving`,h);this.element.setAttribute(`title`,b);this.element.setAttribute(`draggable`,`true`);let e=document.createElement(g);e.setAttribute(i,`highlight_bar`);this.element.appendChild(e);let f=document.createElement(g);f.setAttribute(i,`icon`);{this.icon_image_element=document.createElement(`img`);this.icon_image_element.setAttribute(`src`,c);f.appendChild(this.icon_image_element);this.close_tab_btn=document.createElementNS(SVG_NS,`svg`);this.close_tab_btn.setAttribute(i,`close_btn`);this.close_tab_btn.setAttribute(`viewBox`,`0 0 50 50`);let a=document.createElementNS(SVG_NS,`use`);a.setAttribute(`href`,`#close_tab_btn_icon`);this.close_tab_btn.appendChild(a);f.appendChild(this.close_tab_btn)}this.element.appendChild(f);this.name_label_element=document.createElement(`p`);this.name_label_element.setAttribute(i,`name_label`);this.name_label_element.innerText=b;this.element.appendChild(this.name_label_element);this.drag_event_counter=0;this.mouse_hovering=!1;this.register_events()}update_icon(a){this.icon_image_element.setAttribute(`src`,a)}update_title(a){this.element.setAttribute(`title`,a);this.name_label_element.innerText=a}register_events(){let b=0,a=`moving`;this.element.onclick=a=>{this.container.request_activate_tab(this.tab_id)};this.close_tab_btn.onclick=a=>{a.stopPropagation();this.container.request_close_tab(this.tab_id)};this.element.ondragstart=b=>{b.dataTransfer.effectAllowed=`move`;b.dataTransfer.setData(TAB_DRAG_TYPE,`quacro`);this.container.dragging_tab=this.element;setTimeout(()=>{this.container.dragging_tab.setAttribute(a,`true`)})};this.element.ondragend=b=>{b.preventDefault();this.element.setAttribute(a,`false`)};this.element.ondragover=a=>{a.preventDefault();if(this.element===this.container.dragging_tab){return};if(!a.dataTransfer.types.includes(TAB_DRAG_TYPE)){return};let b=this.element.getBoundingClientRect();let c=a.clientY- b.top;if(c>b.height/2){this.container.element.insertBefore(this.container.dragging_tab,this.element.nextSibling);return};this.container.element.insertBefore(this.container.dragging_tab,this.element)};this.element.ondragenter=a=>{a.preventDefault();this.drag_event_counter++;if(this.drag_event_counter!==1){return};if(!a.dataTransfer.types.includes(TAB_DRAG_TYPE)){this.ext_drag_float_timeout=setTimeout(()=>{this.container.request_activate_tab(this.tab_id)},500)}};this.element.ondragleave=a=>{a.preventDefault();this.drag_event_counter--;if(this.drag_event_counter!==b){return};if(!a.dataTransfer.types.includes(TAB_DRAG_TYPE)){clearTimeout(this.ext_drag_float_timeout)}};this.element.ondrop=a=>{a.preventDefault();this.drag_event_counter=b};this.element.onmouseenter=a=>{this.mouse_hovering=!0;this.container.push_context_menu()};this.element.onmouseleave=a=>{this.mouse_hovering=!1;this.container.push_context_menu()};this.element.oncontextmenu=a=>{this.container.right_clicked_tab_id=this.tab_id}}activate(){this.element.setAttribute(`active`,`true`)}deactivate(){this.element.setAttribute(`active`,`false`)}}const MENU_ITEM_KEY_CLOSE=`close`;const MENU_ITEM_KEY_CLOSE_ALL=`close_all`;const MENU_ITEM_KEY_CLOSE_OTHERS=`close_others`;const MENU_ITEM_KEY_RELAOD_ICON_TITLE=`reload_icon_title`;class TabList{constructor(){let a=null;this.element=document.getElementById(`tab_list`);this.tab_id_map=new Map();this.tab_activated=a;this.dragging_tab=a;this.pushed_menu_tab_id=undefined;this.menu_push_seq=0;this.right_clicked_tab_id=a;window.addEventListener(`contextmenu`,b=>{this.right_clicked_tab_id=a},!0)}create_tab(a,b){if(b in this.tab_id_map){throw TypeError(`Tab id ${b} has been exist`)};let c=new Tab(this,a,default_icon,b);this.element.appendChild(c.element);this.tab_id_map.set(b,c);this.request_get_icon(b);return c}remove_tab(a){let b=this.tab_id_map.get(a);if(b===undefined){throw TypeError(`Invalid tab id ${a}`)};if(b===this.tab_activated){this.tab_activated=null};this.element.removeChild(b.element);this.tab_id_map.delete(a);if(b.mouse_hovering){this.push_context_menu()}}activate_tab(a){if(this.tab_activated!==null){this.tab_activated.deactivate()};this.tab_activated=this.tab_id_map.get(a);this.tab_activated.activate()}get_context_menu(){let a=null;for(const b of this.tab_id_map.values()){if(b.mouse_hovering){return {tab_id:b.tab_id,items:[MENU_ITEM_KEY_CLOSE,MENU_ITEM_KEY_CLOSE_OTHERS,MENU_ITEM_KEY_CLOSE_ALL,a,MENU_ITEM_KEY_RELAOD_ICON_TITLE]}}};return a}push_context_menu(){let c=null;let a=this.get_context_menu();let b=a===c?c:a.tab_id;if(b===this.pushed_menu_tab_id){return};this.pushed_menu_tab_id=b;this.menu_push_seq+=1;pywebview.api.api_set_context_menu(this.menu_push_seq,a)}execute_menu_item_cmd(a,b){let c=Array.from;if(!this.tab_id_map.has(b)){return};if(b!==this.right_clicked_tab_id){console.warn(`Ignoring menu command of tab ${b}, tab ${this.right_clicked_tab_id} was right clicked`);return};switch(a){case MENU_ITEM_KEY_CLOSE:this.request_close_tab(b);break;case MENU_ITEM_KEY_CLOSE_ALL:for(const a of c(this.tab_id_map.keys())){this.request_close_tab(a)};break;case MENU_ITEM_KEY_CLOSE_OTHERS:for(const a of c(this.tab_id_map.keys())){if(a===b){continue};this.request_close_tab(a)};break;case MENU_ITEM_KEY_RELAOD_ICON_TITLE:this.request_get_icon(b);this.request_get_title(b);break}}update_tab_title(a,b){let c=this.tab_id_map.get(a);if(c!==undefined){c.update_title(b)}}request_get_icon(a){pywebview.api.api_get_icon(a).then(b=>{let c=this.tab_id_map.get(a);if(b&&c!==undefined){c.update_icon(b)}})}request_get_title(a){pywebview.api.api_get_title(a).then(b=>{let c=this.tab_id_map.get(a);if(b&&c!==undefined){c.update_title(b)}})}request_activate_tab(a){if(this.tab_activated!==null&&this.tab_activated.tab_id==a){return};pywebview.api.api_activate_tab(a)}request_close_tab(a){pywebview.api.api_close_tab(a)}}window.onload=()=>{let c=`mousemove`,d=`mouseup`,b=0;var a=(()=>{var f=(()=>{window.removeEventListener(c,e);window.removeEventListener(d,f)});var e=(b=>{let c=b.screenX- a;pywebview.api.api_horizontal_resize(c)});var g=(b=>{a=b.clientX;window.addEventListener(d,f);window.addEventListener(c,e)});var a=b;var h=document.querySelectorAll(`#horizontal_resize_region`);for(var i=b;i<h.length;i++){h[i].addEventListener(`mousedown`,g)}});a()}</script><style>body{margin:0;padding:0;background-color:#f4f4f4;overflow:hidden;height:100%;width:100%;display:flex;flex-direction:column;user-select:none}#horizontal_resize_region{position:fixed;opacity:0%;margin:0;top:0;bottom:0;left:0;width:5px}#horizontal_resize_region:hover {cursor:ew-resize}#top_bar{background-image:linear-gradient(30deg,#0099FF,#5eabef);height:50px;z-index:1;box-shadow:0 1px 4px #999;-webkit-app-region:drag}#top_bar > p{color:white;font-size:15;margin:10px;margin-left:15px}#bottom_bar{height:50px;background-color:#f0f0f0;box-shadow:0 -2px 5px #ccc;z-index:1}#tab_list{height:100%;padding:0;margin:0;overflow-x:hidden;overflow-y:auto;scrollbar-width:none;transition:.25s ease;z-index:0}#tab_list:hover{scrollbar-width:thin}#tab_list > div{left:0;width:100vw;height:64px;display:flex;flex-direction:row;align-items:center;margin:0;background-color:#f0f0f0;transition:inherit}#tab_list > div[active="true"]{background-color:#ddd}#tab_list > div:hover{background-color:#ccc;cursor:pointer}#tab_list > div[moving="true"]{opacity:30%}#tab_list > div > .icon{position:relative;height:70%;aspect-ratio:1;margin-left:10px;margin-right:10px;flex-shrink:0;transition:inherit}#tab_list > div > .icon > img{width:100%;height:100%;filter:drop-shadow(1px 1px 1px #00000050);-webkit-user-drag:none}#tab_list > div > .icon > .close_btn{position:absolute;top:-4px;right:-4px;height:16px;filter:grayscale(1) brightness(2);opacity:0%;transition:inherit}#tab_list > div:hover > .icon > .close_btn{opacity:80%}#tab_list > div > .icon > .close_btn:hover{filter:none;transform:rotate(90deg)}#tab_list > div > .highlight_bar{width:5px;height:100%;flex-shrink:0;background-color:#00aee8;opacity:0%;transition:inherit}#tab_list > div[active="true"] > .highlight_bar{opacity:100%}#tab_list > div > .name_label{flex-grow:1;text-wrap:nowrap;overflow:hidden;mask-image:linear-gradient(270deg,transparent,#000 30%)}@media (min-width: 100px){#tab_list > div > .name_label{display:block}#top_bar > p#title_long{display:block}#top_bar > p#title_mini{display:none}}@media (max-width: 100px){#tab_list > div > .name_label{display:none}#top_bar > p#title_long{display:none}#top_bar > p#title_mini{display:block}}</style></head><svg display=none xmlns=http://www.w3.org/2000/svg><g id=close_tab_btn_icon stroke=white stroke-linecap=round stroke-width=4><circle cx=25 cy=25 fill=#e81123 r=25 stroke=none /><line x1=14 x2=36 y1=14 y2=36 /><line x1=36 x2=14 y1=14 y2=36 /></g></svg><body><div id=top_bar><p id=title_long>QuacroDock<p id=title_mini>Quacro</div><div id=tab_list></div><div id=bottom_bar></div><div id=horizontal_resize_region></div>'
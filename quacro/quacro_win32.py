@@ -4,7 +4,7 @@ import ctypes
 import ctypes.wintypes
 import logging
 
-from .quacro_logging import warn_tb
+from .quacro_logging import warn_tb, Snapshot
 from .quacro_i18n import _
 
 logger = logging.getLogger('win32')
@@ -19,7 +19,10 @@ class W32:
     ExtractIcon = ctypes.windll.shell32.ExtractIconW
     GetWindowRect = ctypes.windll.user32.GetWindowRect
     SendMessage = ctypes.windll.user32.SendMessageW
+    SendMessageTimeout = ctypes.windll.user32.SendMessageTimeoutW
+    PostMessage = ctypes.windll.user32.PostMessageW
     ShowWindow = ctypes.windll.user32.ShowWindow
+    ShowWindowAsync = ctypes.windll.user32.ShowWindowAsync
     GetWindowLong = ctypes.windll.user32.GetWindowLongW
     SetWindowLong = ctypes.windll.user32.SetWindowLongW
     GetWindowText = ctypes.windll.user32.GetWindowTextW
@@ -38,6 +41,9 @@ class W32:
     MessageBox = ctypes.windll.user32.MessageBoxW
     DwmSetWindowAttribute = ctypes.windll.dwmapi.DwmSetWindowAttribute
     SwitchToThisWindow = ctypes.windll.user32.SwitchToThisWindow
+    IsWindow = ctypes.windll.user32.IsWindow
+    GetProcessTimes = ctypes.windll.kernel32.GetProcessTimes
+    GetProcessMemoryInfo = ctypes.windll.kernel32.K32GetProcessMemoryInfo
     GetUserDefaultLocaleName = ctypes.windll.kernel32.GetUserDefaultLocaleName
 
     def __new__(cls,*args,**kwargs):
@@ -131,6 +137,71 @@ def get_window_exe_path(hwnd):
     W32.CloseHandle(process_handle)
     return buf.value
 
+class ProcessMemoryCountersEx(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.wintypes.DWORD),
+        ("PageFaultCount", ctypes.wintypes.DWORD),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+        ("PrivateUsage", ctypes.c_size_t),
+    ]
+
+def get_process_private_bytes(pid) -> int:
+    """Private memory of the process in bytes, 0 if failed"""
+    process_handle = W32.OpenProcess(
+        win32con.PROCESS_QUERY_LIMITED_INFORMATION|win32con.PROCESS_VM_READ,
+        False,
+        ctypes.wintypes.DWORD(pid)
+    )
+    if not process_handle:
+        warn_last_error()
+        return 0
+    counters = ProcessMemoryCountersEx()
+    counters.cb = ctypes.sizeof(counters)
+    result = W32.GetProcessMemoryInfo(
+        process_handle,
+        ctypes.byref(counters),
+        counters.cb,
+    )
+    W32.CloseHandle(process_handle)
+    if result==0:
+        warn_last_error()
+        return 0
+    return counters.PrivateUsage
+
+def get_process_start_time(pid) -> int:
+    """Creation time of the process as a FILETIME value, 0 if failed"""
+    process_handle = W32.OpenProcess(
+        win32con.PROCESS_QUERY_LIMITED_INFORMATION,
+        False,
+        ctypes.wintypes.DWORD(pid)
+    )
+    if not process_handle:
+        warn_last_error()
+        return 0
+    creation_time = ctypes.wintypes.FILETIME()
+    exit_time = ctypes.wintypes.FILETIME()
+    kernel_time = ctypes.wintypes.FILETIME()
+    user_time = ctypes.wintypes.FILETIME()
+    result = W32.GetProcessTimes(
+        process_handle,
+        ctypes.byref(creation_time),
+        ctypes.byref(exit_time),
+        ctypes.byref(kernel_time),
+        ctypes.byref(user_time),
+    )
+    W32.CloseHandle(process_handle)
+    if result==0:
+        warn_last_error()
+        return 0
+    return (creation_time.dwHighDateTime<<32)|creation_time.dwLowDateTime
+
 def get_window_title(hwnd):
     buf = ctypes.create_unicode_buffer(BUF_LEN)
     result = W32.GetWindowText(hwnd, buf, BUF_LEN)
@@ -141,12 +212,31 @@ def get_window_title(hwnd):
         return ''
     return buf.value
 
-if __debug__:
-    def format_window(hwnd):
-        return f"[{hwnd}]'{get_window_title(hwnd)}'"
-else:
-    def format_window(hwnd):
-        return f"[{hwnd}]"
+class WindowFormat(Snapshot):
+    """
+    Formatted when converted to str. Pass it as a logging argument,
+    `logger.debug("%s", format_window(hwnd))`, so the title is only read
+    when the record passes the level. It is read when the record is queued,
+    on the calling thread, since the window may be gone later.
+    """
+    __slots__ = ("hwnd",)
+    hwnd: int
+
+    def __init__(self, hwnd:int):
+        self.hwnd = hwnd
+
+    if __debug__:
+        def __str__(self):
+            if not W32.IsWindow(self.hwnd):
+                # e.g. "Window destroyed", there is no title to read
+                return f"[{self.hwnd}](destroyed)"
+            return f"[{self.hwnd}]'{get_window_title(self.hwnd)}'"
+    else:
+        def __str__(self):
+            return f"[{self.hwnd}]"
+
+def format_window(hwnd:int) -> WindowFormat:
+    return WindowFormat(hwnd)
 
 def get_window_class_name(hwnd):
     buf = ctypes.create_unicode_buffer(BUF_LEN)
@@ -116,6 +116,8 @@ def get_rect_size(rect: tuple[int,int,int,int]) -> tuple[int,int]:
 def tolerant_eq(a, b, t):
     return abs(a-b)<=t
 
+SEND_MESSAGE_TIMEOUT_MS = 200
+
 class WindowMinimumSizeFilter(Filter):
     name = "window_minimum_size"
     target_size: tuple[int,int]
@@ -156,13 +158,18 @@ class WindowMinimumSizeFilter(Filter):
     
     def test(self, hwnd):
         mmi = self.MINMAXINFO()
-        result = quacro_win32.W32.SendMessage(
+        result = wintypes.DWORD(1)
+        # a hung window should not block the filtering
+        sent = quacro_win32.W32.SendMessageTimeout(
             hwnd,
             win32con.WM_GETMINMAXINFO,
             0,
-            ctypes.byref(mmi)
+            ctypes.byref(mmi),
+            win32con.SMTO_ABORTIFHUNG,
+            SEND_MESSAGE_TIMEOUT_MS,
+            ctypes.byref(result)
         )
-        if result==0:
+        if sent and result.value==0:
             min_w = mmi.ptMinTrackSize.x
             min_h = mmi.ptMinTrackSize.y
         else:
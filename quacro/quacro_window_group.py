@@ -1,8 +1,11 @@
 import typing
+import time
 
-from . import quacro_window_filters
+from . import quacro_window_filters, quacro_instrumentation
 
 WindowGroupCallBack:typing.TypeAlias = typing.Callable[[int,set[int]],None]|None
+# Pre-evaluated results of `WindowGrup.filter_window` for a single window
+FilterVerdicts:typing.TypeAlias = dict["WindowGrup", bool]
 
 class WindowGrup:
     filters: list[quacro_window_filters.Filter]
@@ -33,28 +36,64 @@ class WindowGrup:
     def register_cb_on_remove(self, cb:WindowGroupCallBack) -> None:
         self.cb_on_remove = cb
     
-    def filter_window(self, hwnd: int) -> bool:
+    def filter_window(self, hwnd: int, verdicts:FilterVerdicts|None=None) -> bool:
+        if verdicts is not None and self in verdicts:
+            return verdicts[self]
+        if quacro_instrumentation.enabled:
+            return self._filter_window_measured(hwnd)
         for filter_ in self.filters:
             if not filter_.test(hwnd):
                 return False
         return True
 
-    def _add_window(self, hwnd):
+    def _filter_window_measured(self, hwnd: int) -> bool:
+        for filter_ in self.filters:
+            start_time = time.perf_counter_ns()
+            result = filter_.test(hwnd)
+            quacro_instrumentation.record_span(
+                f"filter.{filter_.name}", "filter", start_time, {"hwnd": hwnd}
+            )
+            if not result:
+                return False
+        return True
+
+    def contains_window(self, hwnd:int) -> bool:
+        """
+        Test if the window is in the group,
+        or will be in the group once the window is propagated here
+        """
+        if hwnd in self.current_windows:
+            return True
+        for group in self.source_groups:
+            if group.contains_window(hwnd):
+                break
+        else:
+            if self.source_groups:
+                return False
+        return self.filter_window(hwnd)
+
+    def _add_window(self, hwnd, verdicts:FilterVerdicts|None):
         if hwnd in self.current_windows:
             return
-        if self.filter_window(hwnd):
+        if self.filter_window(hwnd, verdicts):
             self.current_windows.add(hwnd)
             if self.cb_on_add is not None:
                 self.cb_on_add(hwnd, self.current_windows)
             for group in self.sink_groups:
-                group.add_window(hwnd, self.current_windows)
+                group.add_window(hwnd, self.current_windows, verdicts)
     
-    def add_window(self, hwnd:int, all_windows: set[int]):
+    def add_window(
+            self,
+            hwnd:int,
+            all_windows: set[int],
+            verdicts:FilterVerdicts|None=None
+        ):
+        """`verdicts` are only used for `hwnd`"""
         if self.only_filter_when_window_created:
-            self._add_window(hwnd)
+            self._add_window(hwnd, verdicts)
         else:
-            for hwnd in all_windows:
-                self._add_window(hwnd) 
+            for window in all_windows:
+                self._add_window(window, verdicts if window==hwnd else None)
 
     def remove_window(self, hwnd:int):
         if hwnd not in self.current_windows:
@@ -64,3 +103,19 @@ class WindowGrup:
             self.cb_on_remove(hwnd, self.current_windows)
         for group in self.sink_groups:
             group.remove_window(hwnd)
+
+def evaluate_filters(zero_level_groups:list[WindowGrup], hwnd:int) -> FilterVerdicts:
+    """
+    Evaluate filters of the groups that `hwnd` can reach.
+    Safe to run off the event loop.
+    """
+    verdicts: FilterVerdicts = {}
+    stack = list(zero_level_groups)
+    while stack:
+        group = stack.pop()
+        if group in verdicts:
+            continue
+        verdicts[group] = group.filter_window(hwnd)
+        if verdicts[group]:
+            stack.extend(group.sink_groups)
+    return verdicts
@@ -1,6 +1,10 @@
+import collections
 import logging
 import threading
 import queue
+import time
+import traceback
+import typing
 
 import win32con
 
@@ -8,6 +12,11 @@ from . import (
     quacro_c_utils,
     quacro_win32,
     quacro_dock,
+    quacro_config,
+    quacro_app_data,
+    quacro_metrics,
+    quacro_tracing,
+    quacro_instrumentation,
 )
 
 from .quacro_win32 import format_window
@@ -19,7 +28,15 @@ from .quacro_dock import (
     EventRequestActivateWindow,
     EventRequestCloseWindow,
 )
+from .quacro_ipc import InterestTableWriter, event_mask
+from .quacro_transport import HookEventTransport
 from .quacro_c_utils import (
+    EVENT_TYPE_CREATE_WINDOW,
+    EVENT_TYPE_DESTROY_WINDOW,
+    EVENT_TYPE_MOVE_SIZE,
+    EVENT_TYPE_ACTIVATE,
+    EVENT_TYPE_ICON_TITLE_UPDATE,
+    EVENT_TYPE_MINIMIZED,
     EventCreateWindow,
     EventDestroyWindow,
     EventMoveSize,
@@ -27,11 +44,38 @@ from .quacro_c_utils import (
     EventIconTitleUpdate,
     EventMinimized
 )
-from .quacro_window_group import WindowGrup
+from .quacro_window_group import WindowGrup, FilterVerdicts, evaluate_filters
+from .quacro_dock_keys import classify_window
+from .quacro_debouncer import IconTitleDebouncer
+from .quacro_dispatcher import Dispatcher, EventBlockingCallDone
+from .quacro_event_queue import LaneEventQueue
+from .quacro_watchdog import StallWatchdog
+from .quacro_sweeper import WindowSweeper
+from .quacro_classification_cache import (
+    ClassificationCache,
+    WindowIdentity,
+    config_hash,
+    get_window_identity,
+)
+from .quacro_config_reload import (
+    ConfigWatcher,
+    ConfigReload,
+    RESTART_REQUIRED_SECTIONS,
+    group_signatures,
+    prepare_config_reload,
+)
+from .quacro_errors import ConfigError
 
 
 logger = logging.getLogger("window")
 
+class EventResync(Event):
+    """Hook events have been dropped, the window sets need to be rebuilt"""
+    __slots__ = ()
+
+    def coalesce_key(self):
+        return EventResync
+
 class WindowManager:
     window_groups: dict[str, WindowGrup]
     zero_level_groups: list[WindowGrup]
@@ -39,15 +83,62 @@ class WindowManager:
     all_windows: set[int]
 
     dock_manager: quacro_dock.DockManager
-    event_queue: queue.Queue[Event]
+    event_queue: LaneEventQueue
+    transport: HookEventTransport
 
     event_loop_ready: threading.Event
 
-
-    def __init__(self, window_groups, zero_level_groups, primary_group) -> None:
-        self.event_queue = queue.Queue()
+    icon_title_debouncer: IconTitleDebouncer
+    dispatcher: Dispatcher
+    # windows whose filters are being evaluated by the dispatcher
+    classifying: dict[int, EventCreateWindow]
+    # dock keys identified by the dispatcher, taken when the window is docked
+    classified_keys: dict[int, typing.Hashable]
+    # windows to classify or revalidate once the dispatcher has room,
+    # one entry per hwnd, so bursts are coalesced
+    classify_backlog: collections.OrderedDict[int, None]
+
+    event_handlers: dict[type[Event], typing.Callable[[typing.Any], None]]
+    # `async def` handlers, only run by the asyncio event loop
+    async_event_handlers: dict[type[Event], typing.Callable[[typing.Any], typing.Awaitable[None]]]
+    watchdog: StallWatchdog|None
+    interest_table: InterestTableWriter|None
+    sweeper: WindowSweeper|None
+    classification_cache: ClassificationCache|None
+
+    config: quacro_config.Config
+    config_watcher: ConfigWatcher|None
+    # signatures of the running window groups, to find the changed ones on reload
+    group_signatures: dict[str, int]
+
+
+    def __init__(
+            self,
+            window_groups,
+            zero_level_groups,
+            primary_group,
+            dock_key,
+            config:quacro_config.Config,
+            transport:HookEventTransport|None=None
+        ) -> None:
+        if transport is None:
+            transport = quacro_c_utils.Win32RingTransport()
+        self.transport = transport
+        if config.event_loop_mode=="asyncio":
+            # import asyncio only when it is used
+            from . import quacro_async_event_loop
+            self.event_queue = quacro_async_event_loop.AsyncEventQueue(
+                config.lane_max_wait,
+                config.lane_burst_limit,
+            )
+        else:
+            self.event_queue = LaneEventQueue(
+                config.lane_max_wait,
+                config.lane_burst_limit,
+            )
         self.dock_manager = quacro_dock.DockManager(
-            self.event_queue
+            self.event_queue,
+            dock_key,
         )
 
         self.window_groups = window_groups
@@ -59,18 +150,148 @@ class WindowManager:
         self.primary_group.register_cb_on_remove(
             self.on_primary_group_remove
         )
+        self.config = config
+        self.group_signatures = group_signatures(config.window_groups_config_dict)
         self.all_windows = set()
         self.event_loop_ready = threading.Event()
 
-    def on_primary_group_add(self, hwnd:int, all_windows:set[int]) -> None:
-        logger.info(f"Window detected: {format_window(hwnd)}")
-    
-        dock = self.dock_manager.get_dock_by_window(hwnd, default=None)
+        self.icon_title_debouncer = IconTitleDebouncer(
+            config.icon_title_quiet_period,
+            config.icon_title_max_wait,
+        )
+        if config.event_loop_mode=="asyncio":
+            self.dispatcher = quacro_async_event_loop.AsyncDispatcher(
+                self.event_queue,
+                config.blocking_workers,
+                config.blocking_call_timeout,
+                config.blocking_max_pending,
+            )
+        else:
+            self.dispatcher = Dispatcher(
+                self.event_queue,
+                config.blocking_workers,
+                config.blocking_max_pending,
+            )
+        self.classifying = {}
+        self.classified_keys = {}
+        self.classify_backlog = collections.OrderedDict()
+
+        self.event_handlers = {
+            EventCreateWindow: self.on_create_window,
+            EventDestroyWindow: self.on_destroy_window,
+            EventMoveSize: self.on_window_move_size,
+            EventActivate: self.on_window_activate,
+            EventRequestActivateWindow: self.on_dock_activate_tab,
+            EventRequestCloseWindow: self.on_dock_close_tab,
+            EventIconTitleUpdate: self.on_window_icon_title_updata,
+            EventMinimized: self.on_window_minimized,
+            EventBlockingCallDone: self.on_blocking_call_done,
+            EventResync: self.on_resync,
+        }
+        self.async_event_handlers = {}
+
+        if config.hook_source_filter:
+            self.interest_table = InterestTableWriter(
+                # every window is classified
+                event_mask(EVENT_TYPE_CREATE_WINDOW, EVENT_TYPE_DESTROY_WINDOW),
+                event_mask(
+                    EVENT_TYPE_MOVE_SIZE,
+                    EVENT_TYPE_ACTIVATE,
+                    EVENT_TYPE_ICON_TITLE_UPDATE,
+                    EVENT_TYPE_MINIMIZED,
+                ),
+            )
+        else:
+            self.interest_table = None
+
+        if config.classification_cache:
+            self.classification_cache = ClassificationCache(
+                config_hash(config.window_groups_config_dict)
+            )
+        else:
+            self.classification_cache = None
+
+        if config.sweep_interval>0:
+            self.sweeper = WindowSweeper(
+                config.sweep_interval,
+                config.sweep_batch_size,
+                time.monotonic(),
+            )
+        else:
+            self.sweeper = None
+
+        if config.config_watch_interval>0:
+            self.config_watcher = ConfigWatcher(
+                config.path,
+                config.config_watch_interval,
+                time.monotonic(),
+            )
+        else:
+            self.config_watcher = None
+
+        if config.stall_threshold>0:
+            self.watchdog = StallWatchdog(
+                config.stall_threshold,
+                quacro_app_data.LOG_PATH,
+                config.stall_report_interval,
+            )
+        else:
+            self.watchdog = None
+
+        if quacro_metrics.enabled:
+            quacro_metrics.registry.gauge(
+                "event_queue.depth", self.event_queue.qsize
+            )
+            quacro_metrics.registry.register_provider(
+                "event_queue.lanes", self.event_queue.stats
+            )
+            quacro_metrics.registry.gauge(
+                "hook_events.ring_dropped", self.transport.dropped_count
+            )
+            quacro_metrics.registry.gauge(
+                "dispatcher.pending", self.dispatcher.pending_count
+            )
+            quacro_metrics.registry.gauge(
+                "dispatcher.classify_backlog", self.classify_backlog.__len__
+            )
+            quacro_metrics.registry.register_provider(
+                "webview.memory", self.webview_memory_stats
+            )
+            if self.interest_table is not None:
+                quacro_metrics.registry.gauge(
+                    "hook_events.filtered_at_source",
+                    self.interest_table.filtered_count,
+                )
+
+    def attach_window_to_dock(self, hwnd:int, key) -> quacro_dock.Dock:
+        dock = self.dock_manager.get_dock_by_key(key, default=None)
         if dock is None:
-            key = self.dock_manager.identify_window_key(hwnd)
             dock = self.dock_manager.create_dock(key)
         title = quacro_win32.get_window_title(hwnd)
         dock.create_tab(hwnd, title)
+        self.update_interest_table()
+        return dock
+
+    def detach_window_from_dock(self, hwnd:int) -> quacro_dock.Dock|None:
+        """Return the dock of the window, None if the dock is destroyed"""
+        dock = self.dock_manager.get_dock_by_window(hwnd)
+        dock.remove_tab(hwnd)
+        self.icon_title_debouncer.discard(hwnd)
+
+        if len(dock.tabs)==0:
+            self.dock_manager.destroy_dock(dock)
+            self.update_interest_table()
+            return None
+        self.update_interest_table()
+        return dock
+
+    def on_primary_group_add(self, hwnd:int, all_windows:set[int]) -> None:
+        logger.info("Window detected: %s", format_window(hwnd))
+    
+        key = self.classified_keys.pop(hwnd, None)
+        if key is None:
+            key = self.dock_manager.identify_window_key(hwnd)
+        dock = self.attach_window_to_dock(hwnd, key)
 
         if self.event_loop_ready.is_set():
             dock.set_sticking_target(hwnd)
@@ -80,37 +301,62 @@ class WindowManager:
             
 
     def on_primary_group_remove(self, hwnd:int, all_windows:set[int]) -> None:
-        logger.info(f"Window destroyed: {format_window(hwnd)}")
+        logger.info("Window destroyed: %s", format_window(hwnd))
 
-        dock = self.dock_manager.get_dock_by_window(hwnd)
-        dock.remove_tab(hwnd)
+        dock = self.detach_window_from_dock(hwnd)
+        if dock is None or dock.target != hwnd:
+            return
 
-        if len(dock.tabs)==0:
-            self.dock_manager.destroy_dock(dock)
+        # target is destroyed, show the previously activated window
+        candidate = dock.tabs.most_recent()
+        if candidate is not None:
+            quacro_win32.W32.SwitchToThisWindow(candidate)
+    
+    def update_interest_table(self) -> None:
+        """Let the hook send the events of the tabs and the docks only"""
+        if self.interest_table is None:
             return
+        self.interest_table.update(
+            self.dock_manager.window_dock_map.keys() |
+            self.dock_manager.active_docks.keys()
+        )
 
-        if dock.target != hwnd:
+    def webview_memory_stats(self) -> dict[str, typing.Any]:
+        try:
+            return self.dock_manager.webview_memory_stats()
+        except Exception as err:
+            logger.warning("Unable to get the webview memory: %s", err)
+            return {}
+
+    def attach_interest_table(self) -> None:
+        """Called after the transport is opened, by the hook event forwarder"""
+        if self.interest_table is None:
             return
+        table = self.transport.interest_table()
+        if table is not None:
+            self.interest_table.attach(table)
+
+    def detach_interest_table(self) -> None:
+        if self.interest_table is not None:
+            self.interest_table.detach()
 
-        # target is destroyed, show next target
-        for candidate in dock.tabs:
-            quacro_win32.W32.SwitchToThisWindow(candidate)
-            break
-    
     def on_window_move_size(self, event:EventMoveSize) -> None:
         if event.hwnd in self.dock_manager.active_docks:
             dock = self.dock_manager.active_docks[event.hwnd]
-            logger.debug(f"{dock} move: {event.rect}")
+            logger.debug("%s move: %s", dock, event.rect)
             dock.stick_to_target(move_target=True)
             return 
 
-        if event.hwnd not in self.primary_group.current_windows:
+        dock = self.dock_manager.get_dock_by_window(event.hwnd, default=None)
+        if dock is None:
             return
 
-        logger.debug(f"Window {format_window(event.hwnd)} movesize: {event.rect}")
-        dock = self.dock_manager.get_dock_by_window(event.hwnd)
+        logger.debug("Window %s movesize: %s", format_window(event.hwnd), event.rect)
         if event.hwnd==dock.target:
             dock.move_dock_to_target(event.rect)
+        elif event.enqueue_ns<dock.target_ns:
+            # queued before the target changed, e.g. a drag served after a user activation
+            logger.debug("Ignoring stale movesize of %s", format_window(event.hwnd))
         else:
             dock.set_sticking_target(event.hwnd)
             dock.stick_to_target(move_target=False)
@@ -121,125 +367,542 @@ class WindowManager:
         if hwnd in self.dock_manager.active_docks:
             return
 
-        if hwnd not in self.primary_group.current_windows:
+        dock = self.dock_manager.get_dock_by_window(hwnd, default=None)
+        if dock is None:
             return
         
         if event.minimized:
             # minimized is handled in on_window_minimized
             return
-        
-        dock = self.dock_manager.get_dock_by_window(hwnd)
 
         # The window is activated and not minimized
         if not event.inactive: 
-            logger.debug(f"Window activated: {format_window(hwnd)}")
+            logger.debug("Window activated: %s", format_window(hwnd))
+            dock.tabs.touch(hwnd)
             dock.set_sticking_target(hwnd)
             dock.update_misc()
             dock.stick_to_target(move_target=True)
             dock.show()
         else:
-            logger.debug(f"Window inactivated: {format_window(hwnd)}")
+            logger.debug("Window inactivated: %s", format_window(hwnd))
     
     def on_window_minimized(self, event:EventMinimized):
         if event.hwnd in self.dock_manager.active_docks:
             return
 
-        if event.hwnd not in self.primary_group.current_windows:
+        dock = self.dock_manager.get_dock_by_window(event.hwnd, default=None)
+        if dock is None:
             return
-        logger.debug(f"Window minimized: {format_window(event.hwnd)}")
-        
-        dock = self.dock_manager.get_dock_by_window(event.hwnd)
+        logger.debug("Window minimized: %s", format_window(event.hwnd))
 
-        if dock.target==event.hwnd:
-            dock.target_lost()
+        if dock.target!=event.hwnd:
+            return
+
+        # fall back to the previously activated window if it is still visible
+        for candidate in dock.tabs.iter_recent():
+            if candidate==event.hwnd:
+                continue
+            if quacro_win32.is_window_minimized(candidate):
+                continue
+            logger.debug("%s target falls back to %s", dock, format_window(candidate))
+            dock.set_sticking_target(candidate)
+            dock.update_misc()
+            dock.stick_to_target(move_target=False)
+            return
+        dock.target_lost()
 
 
     def on_window_icon_title_updata(self, event:EventIconTitleUpdate):
         if event.hwnd in self.dock_manager.active_docks:
             return
-        if event.hwnd not in self.primary_group.current_windows:
+        dock = self.dock_manager.get_dock_by_window(event.hwnd, default=None)
+        if dock is None:
+            return
+        self.icon_title_debouncer.push(
+            event.hwnd,
+            event.icon_changed,
+            event.title_changed,
+            time.monotonic(),
+        )
+
+    def flush_icon_title_update(self, hwnd:int, icon_changed:bool, title_changed:bool):
+        dock = self.dock_manager.get_dock_by_window(hwnd, default=None)
+        if dock is None:
             return
-        logger.debug(f"Window title/icon updated: {format_window(event.hwnd)}")
-        dock = self.dock_manager.get_dock_by_window(event.hwnd)
-        dock.notify_icon_title_update(event.hwnd)
+        logger.debug("Window title/icon updated: %s", format_window(hwnd))
+        title = quacro_win32.get_window_title(hwnd) if title_changed else None
+        dock.notify_icon_title_update(hwnd, icon_changed, title)
     
     def on_dock_activate_tab(self, event:EventRequestActivateWindow):
-        logger.info(f"{event.dock} requests to activate: {format_window(event.hwnd)}")
-        quacro_win32.W32.ShowWindow(event.hwnd, win32con.SW_RESTORE)
-
-        event.dock.set_sticking_target(event.hwnd)
-        event.dock.update_misc()
+        logger.info("%s requests to activate: %s", event.dock, format_window(event.hwnd))
+        dock = event.dock
+        hwnd = event.hwnd
+        if dock is None or hwnd not in dock.tabs:
+            return
+        # the async calls only post to the target thread, a hung app can't block here
+        quacro_win32.W32.ShowWindowAsync(hwnd, win32con.SW_RESTORE)
+        dock.set_sticking_target(hwnd)
+        dock.update_misc()
         
     def on_dock_close_tab(self, event:EventRequestCloseWindow):
-        logger.info(f"{event.dock} requests to close: {format_window(event.hwnd)}")
-        quacro_win32.W32.SendMessage(event.hwnd, win32con.WM_CLOSE, 0, 0)
+        logger.info("%s requests to close: %s", event.dock, format_window(event.hwnd))
+        quacro_win32.W32.PostMessage(event.hwnd, win32con.WM_CLOSE, 0, 0)
+
+    def on_blocking_call_done(self, event:EventBlockingCallDone):
+        if event.error is not None:
+            error = event.error
+            tb_list = traceback.format_exception(type(error), error, error.__traceback__)
+            logger.error("Error occured in blocking call:\n%s", "".join(tb_list))
+            if event.errback is not None:
+                event.errback(error)
+        elif event.callback is not None:
+            event.callback(event.result)
+        # a dispatcher slot has been freed
+        self.drain_classify_backlog()
+
+    def add_window_to_groups(
+            self,
+            hwnd:int,
+            verdicts:FilterVerdicts|None=None,
+            key:typing.Hashable|None=None
+        ):
+        if key is None and verdicts is not None and verdicts.get(self.primary_group):
+            # identified with the verdicts, not by running the filters again
+            key = self.dock_manager.identify_window_key(hwnd, verdicts)
+        if key is not None:
+            self.classified_keys[hwnd] = key
+        try:
+            for group in self.zero_level_groups:
+                group.add_window(hwnd, self.all_windows, verdicts)
+        finally:
+            # not taken if the window is not in the primary group
+            self.classified_keys.pop(hwnd, None)
 
     def on_create_window(self, event:EventCreateWindow) -> None:
+        if self.dock_manager.is_dock_window(event.hwnd):
+            return
         self.all_windows.add(event.hwnd)
-        for group in self.zero_level_groups:
-            group.add_window(event.hwnd, self.all_windows)
+        # filters query other processes, evaluate them off the event loop
+        self.classifying[event.hwnd] = event
+        self.schedule_classify(event.hwnd)
+
+    def schedule_classify(self, hwnd:int) -> None:
+        """Classify a new window, or revalidate a cached one, on the dispatcher"""
+        if self.classify_backlog or not self.start_classify(hwnd):
+            # keep the order, and wait for the dispatcher to have room
+            self.classify_backlog[hwnd] = None
+
+    def start_classify(self, hwnd:int) -> bool:
+        """Return False if the dispatcher has no room"""
+        event = self.classifying.get(hwnd)
+        if event is not None:
+            return self.dispatcher.run_blocking(
+                classify_window,
+                self.zero_level_groups, self.primary_group,
+                self.dock_manager.dock_key, hwnd,
+                callback=lambda result: self.on_window_classified(event, *result),
+                # evaluated again on the event loop by add_window_to_groups
+                errback=lambda error: self.on_window_classified(event, None, None),
+            )
+        if hwnd in self.all_windows:
+            return self.dispatcher.run_blocking(
+                evaluate_filters, self.zero_level_groups, hwnd,
+                callback=lambda verdicts: self.on_window_revalidated(hwnd, verdicts),
+            )
+        # destroyed meanwhile
+        return True
+
+    def drain_classify_backlog(self) -> None:
+        while self.classify_backlog:
+            hwnd = next(iter(self.classify_backlog))
+            if not self.start_classify(hwnd):
+                return
+            del self.classify_backlog[hwnd]
+
+    def on_window_classified(
+            self,
+            event:EventCreateWindow,
+            verdicts:FilterVerdicts|None,
+            key:typing.Hashable|None
+        ):
+        if self.classifying.get(event.hwnd) is not event:
+            # destroyed or re-created while being classified
+            return
+        del self.classifying[event.hwnd]
+        self.add_window_to_groups(event.hwnd, verdicts, key)
 
     def on_destroy_window(self, event:EventDestroyWindow) -> None:
+        if self.dock_manager.is_dock_window(event.hwnd):
+            return
+        self.classifying.pop(event.hwnd, None)
+        self.classify_backlog.pop(event.hwnd, None)
         if event.hwnd in self.all_windows:
             self.all_windows.remove(event.hwnd)
         for group in self.zero_level_groups:
             group.remove_window(event.hwnd)
 
+    def on_resync(self, event:EventResync) -> None:
+        start_time = time.perf_counter()
+        current_windows: set[int] = set()
+        @quacro_c_utils.enum_toplevel_window_callback
+        def enum_winodw_callback(hwnd):
+            current_windows.add(hwnd)
+        quacro_c_utils.enum_toplevel_window(enum_winodw_callback)
+
+        # synthesize the events that have been lost
+        destroyed = self.all_windows-current_windows
+        created = {
+            hwnd for hwnd in current_windows-self.all_windows
+            if not self.dock_manager.is_dock_window(hwnd)
+        }
+        for hwnd in destroyed:
+            self.on_destroy_window(EventDestroyWindow(hwnd))
+        for hwnd in created:
+            self.on_create_window(EventCreateWindow(hwnd))
+
+        elapsed = time.perf_counter()-start_time
+        logger.info(
+            "Resync took %.1fms, %d created, %d destroyed",
+            elapsed*1000, len(created), len(destroyed)
+        )
+
+    def reload_config(self) -> None:
+        assert self.config_watcher is not None
+        logger.info("'%s' changed, reloading", self.config.path)
+        start_time = time.perf_counter_ns()
+        # windows being classified are classified again after the reload
+        windows = frozenset(self.all_windows.difference(self.classifying))
+        memberships = {
+            name: set(group.current_windows)
+            for name, group in self.window_groups.items()
+        }
+        started = self.dispatcher.run_blocking(
+            prepare_config_reload,
+            self.config.path, self.group_signatures, memberships, windows,
+            callback=lambda result: self.on_config_reloaded(result, start_time),
+            key="reload_config",
+        )
+        if not started:
+            # the last reload is still running
+            self.config_watcher.retry()
+
+    def on_config_reloaded(self, result:ConfigReload|ConfigError, start_time:int) -> None:
+        if isinstance(result, ConfigError):
+            logger.error("Invalid config, keeping the running one:\n%s", result)
+            return
+        old_config = self.config
+        try:
+            self.apply_config_reload(result, start_time)
+        except Exception:
+            logger.error(
+                "Error when applying the reloaded config:\n%s", traceback.format_exc()
+            )
+            return
+        if old_config.shared_renderer!=result.config.shared_renderer:
+            logger.warning("Changes of 'dock.shared_renderer' take effect after restart")
+        for section in RESTART_REQUIRED_SECTIONS:
+            if (
+                getattr(old_config, f"{section}_config_dict")!=
+                getattr(result.config, f"{section}_config_dict")
+            ):
+                logger.warning("Changes in [%s] take effect after restart", section)
+
+    def retarget_dock(self, dock:quacro_dock.Dock) -> None:
+        candidate = dock.tabs.most_recent()
+        if candidate is None:
+            dock.target_lost()
+            return
+        dock.set_sticking_target(candidate)
+        dock.stick_to_target(move_target=False)
+        dock.show()
+
+    def apply_config_reload(self, reload:ConfigReload, start_time:int) -> None:
+        """Switch to the reloaded groups, and move the tabs to match them"""
+        for group in reload.window_groups.values():
+            group.current_windows &= self.all_windows
+        # created or being classified while the filters were evaluated
+        reclassify = (self.all_windows-reload.windows)|self.classifying.keys()
+        old_primary_windows = self.primary_group.current_windows
+
+        self.window_groups = reload.window_groups
+        self.zero_level_groups = reload.zero_level_groups
+        self.primary_group = reload.primary_group
+        self.primary_group.register_cb_on_add(self.on_primary_group_add)
+        self.primary_group.register_cb_on_remove(self.on_primary_group_remove)
+        self.group_signatures = group_signatures(reload.config.window_groups_config_dict)
+        self.dock_manager.dock_key = reload.dock_key
+        self.config = reload.config
+        self.icon_title_debouncer.quiet_period = reload.config.icon_title_quiet_period
+        self.icon_title_debouncer.max_wait = reload.config.icon_title_max_wait
+        if self.classification_cache is not None:
+            self.classification_cache.config_hash = config_hash(
+                reload.config.window_groups_config_dict
+            )
+
+        new_primary_windows = self.primary_group.current_windows
+        removed = old_primary_windows-new_primary_windows
+        for hwnd in removed:
+            dock = self.detach_window_from_dock(hwnd)
+            if dock is not None and dock.target==hwnd:
+                self.retarget_dock(dock)
+
+        added = 0
+        moved = 0
+        changed_docks: set[quacro_dock.Dock] = set()
+        for hwnd in new_primary_windows:
+            key = reload.window_keys.get(hwnd)
+            if key is None:
+                key = self.dock_manager.identify_window_key(hwnd)
+            dock = self.dock_manager.get_dock_by_window(hwnd, default=None)
+            if dock is None:
+                added += 1
+            elif dock.key==key:
+                continue
+            else:
+                moved += 1
+                dock = self.detach_window_from_dock(hwnd)
+                if dock is not None and dock.target==hwnd:
+                    self.retarget_dock(dock)
+            changed_docks.add(self.attach_window_to_dock(hwnd, key))
+        for dock in changed_docks:
+            if dock.target not in dock.tabs:
+                self.retarget_dock(dock)
+
+        for hwnd in reclassify:
+            self.on_create_window(EventCreateWindow(hwnd))
+
+        elapsed = time.perf_counter_ns()-start_time
+        logger.info(
+            "Config reloaded in %.1fms (filters %.1fms), "
+            "%d of %d groups re-evaluated, tabs: %d added, %d removed, %d moved",
+            elapsed/1e6, reload.evaluate_time*1000,
+            len(reload.changed_groups), len(self.window_groups),
+            added, len(removed), moved
+        )
+        if quacro_instrumentation.enabled:
+            quacro_instrumentation.record_span("config.reload", "config", start_time)
+
+    def queue_hook_event(self, event:Event) -> None:
+        """Called by the hook event forwarder"""
+        if quacro_metrics.enabled:
+            quacro_metrics.count_hook_event(event)
+        self.event_queue.put(event)
+        if self.transport.sequence_tracker.take_missing():
+            # the resync runs after the events that have been queued
+            self.event_queue.put(EventResync())
 
     def forward_hook_event(self) -> None:
         try:
-            quacro_c_utils.event_queue_init()
-            quacro_c_utils.setup_hook()
+            self.transport.open()
+            self.attach_interest_table()
+            self.transport.start_producer()
         except:
             raise
         else:
             while 1:
-                event = quacro_c_utils.wait_for_hook_event()
-                self.event_queue.put(event)
+                event = self.transport.wait_event()
+                self.queue_hook_event(event)
                 if isinstance(event, EventStop):
                     break
         finally:
             self.event_queue.put(EventStop())
-            quacro_c_utils.unins_hook()
-            quacro_c_utils.event_queue_deinit()
+            self.transport.stop_producer()
+            self.detach_interest_table()
+            self.transport.close()
             logger.info("hook event forwarder loop ended")
     
-    def event_loop(self):
+    def run_timers(self) -> float|None:
+        """Run the due timers, return seconds until the next timer"""
+        now = time.monotonic()
+        for update in self.icon_title_debouncer.pop_due(now):
+            self.run_watched(
+                "timer.flush_icon_title_update", self.flush_icon_title_update, *update
+            )
+        if self.sweeper is not None and self.event_queue.qsize()==0:
+            # only sweep when idle
+            self.run_watched("timer.sweep_windows", self.sweep_windows, now)
+        if self.config_watcher is not None:
+            if self.run_watched("timer.poll_config", self.config_watcher.poll, now):
+                self.run_watched("timer.reload_config", self.reload_config)
+
+        deadlines = [
+            deadline for deadline in (
+                self.icon_title_debouncer.next_deadline(),
+                self.sweeper.next_time if self.sweeper is not None else None,
+                self.config_watcher.next_time if self.config_watcher is not None else None,
+            ) if deadline is not None
+        ]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines)-now)
+
+    def run_watched(self, task_name:str, fn:typing.Callable, *args) -> typing.Any:
+        """Run a timer task under the stall watchdog"""
+        watchdog = self.watchdog
+        if watchdog is None:
+            return fn(*args)
+        watchdog.handler_started(task_name)
+        try:
+            return fn(*args)
+        finally:
+            watchdog.handler_finished()
+
+    def sweep_windows(self, now:float) -> None:
+        assert self.sweeper is not None
+        batch = self.sweeper.next_batch(now, self.all_windows)
+        if batch is None:
+            return
+        reclaimed = 0
+        for hwnd in batch:
+            if hwnd not in self.all_windows:
+                continue
+            if quacro_win32.W32.IsWindow(hwnd):
+                continue
+            logger.debug("Reclaiming leaked window [%s]", hwnd)
+            self.on_destroy_window(EventDestroyWindow(hwnd))
+            reclaimed += 1
+        if reclaimed and quacro_metrics.enabled:
+            quacro_metrics.counter("sweeper.reclaimed").inc(reclaimed)
+        pass_reclaimed = self.sweeper.finish_batch(now, reclaimed)
+        if pass_reclaimed:
+            logger.info(
+                "Sweep reclaimed %d leaked windows, %d in total",
+                pass_reclaimed, self.sweeper.reclaimed_total
+            )
+    
+    def enumerate_windows(self):
+        start_time = time.perf_counter()
+        cache = self.classification_cache
+        if cache is not None:
+            cache.load(quacro_app_data.CLASSIFICATION_CACHE_PATH)
+        # windows classified by the cache, to be revalidated later
+        cached_windows: list[int] = []
+
         @quacro_c_utils.enum_toplevel_window_callback
         def enum_winodw_callback(hwnd):
-            self.on_create_window(EventCreateWindow(hwnd))
+            # classify synchronously, the dock is not shown yet
+            self.all_windows.add(hwnd)
+            verdicts = None
+            if cache is not None and cache.entries:
+                identity = get_window_identity(hwnd)
+                group_names = None if identity is None else cache.lookup(identity)
+                if group_names is not None:
+                    verdicts = {
+                        group: group.name in group_names
+                        for group in self.window_groups.values()
+                    }
+                    cached_windows.append(hwnd)
+            self.add_window_to_groups(hwnd, verdicts)
         quacro_c_utils.enum_toplevel_window(enum_winodw_callback)
+
+        elapsed = time.perf_counter()-start_time
+        logger.info(
+            "Enumerated %d windows in %.1fms, %d classified by the cache",
+            len(self.all_windows), elapsed*1000, len(cached_windows)
+        )
         self.event_loop_ready.set()
 
+        for hwnd in cached_windows:
+            self.schedule_classify(hwnd)
+
+    def on_window_revalidated(self, hwnd:int, verdicts:FilterVerdicts) -> None:
+        if hwnd not in self.all_windows or hwnd in self.classifying:
+            return
+        expected = {group for group, passed in verdicts.items() if passed}
+        actual = {
+            group for group in self.window_groups.values()
+            if hwnd in group.current_windows
+        }
+        if expected==actual:
+            return
+        logger.info("Cached classification of %s is outdated", format_window(hwnd))
+        for group in self.zero_level_groups:
+            group.remove_window(hwnd)
+        self.add_window_to_groups(hwnd, verdicts)
+
+    def save_classification_cache(self) -> None:
+        if self.classification_cache is None:
+            return
+        memberships: dict[WindowIdentity, list[str]] = {}
+        for hwnd in self.all_windows:
+            if hwnd in self.classifying:
+                continue
+            identity = get_window_identity(hwnd)
+            if identity is None:
+                continue
+            memberships[identity] = [
+                group.name for group in self.window_groups.values()
+                if hwnd in group.current_windows
+            ]
+        self.classification_cache.save(
+            quacro_app_data.CLASSIFICATION_CACHE_PATH,
+            memberships,
+        )
+
+    def finish_event_loop(self) -> None:
+        """Called on the event loop thread when the event loop ends"""
+        self.dispatcher.shutdown()
+        self.save_classification_cache()
+        logger.debug("Event queue stats: %s", self.event_queue.stats())
+
+    def handle_event(self, event:Event) -> None:
+        handler = self.event_handlers.get(type(event))
+        if handler is None:
+            logger.warning(
+                "Ignoring unknown hook event type '%s'", type(event).__name__
+            )
+            return
+        watchdog = self.watchdog
+        if watchdog is not None:
+            watchdog.handler_started(event)
+        try:
+            if quacro_instrumentation.enabled:
+                self._handle_event_measured(handler, event)
+            else:
+                handler(event)
+        finally:
+            if watchdog is not None:
+                watchdog.handler_finished()
+        event.release()
+
+    def _handle_event_measured(self, handler, event:Event) -> None:
+        start_time = time.perf_counter_ns()
+        event_name = type(event).__name__
+        if event.hook_ns and event.enqueue_ns:
+            if quacro_metrics.enabled:
+                quacro_metrics.histogram("latency.hook_to_enqueue").record(
+                    event.enqueue_ns-event.hook_ns
+                )
+                quacro_metrics.histogram("latency.hook_to_handler").record(
+                    start_time-event.hook_ns
+                )
+            if quacro_tracing.enabled:
+                quacro_tracing.async_span(
+                    f"ipc.{event_name}", "ipc",
+                    event.hook_ns, event.enqueue_ns
+                )
+        if quacro_tracing.enabled and event.enqueue_ns:
+            quacro_tracing.async_span(
+                f"queued.{event_name}", "queue",
+                event.enqueue_ns, start_time, {"lane": event.lane}
+            )
+        handler(event)
+        quacro_instrumentation.record_span(
+            f"handler.{handler.__name__}", "handler", start_time
+        )
+    
+    def event_loop(self):
+        self.enumerate_windows()
+
         while 1:
-            event = self.event_queue.get()
+            timeout = self.run_timers()
+            try:
+                event = self.event_queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
             if isinstance(event, EventStop):
                 break
-            if isinstance(event, EventCreateWindow):
-                if self.dock_manager.is_dock_window(event.hwnd):
-                    continue
-                self.on_create_window(event)
-            elif isinstance(event, EventDestroyWindow):
-                if self.dock_manager.is_dock_window(event.hwnd):
-                    continue
-                self.on_destroy_window(event)
-            elif isinstance(event, EventMoveSize):
-                self.on_window_move_size(event)
-            elif isinstance(event, EventActivate):
-                self.on_window_activate(event)
-            elif isinstance(event, EventRequestActivateWindow):
-                self.on_dock_activate_tab(event)
-            elif isinstance(event, EventRequestCloseWindow):
-                self.on_dock_close_tab(event)
-            elif isinstance(event, EventIconTitleUpdate):
-                self.on_window_icon_title_updata(event)
-            elif isinstance(event, EventMinimized):
-                self.on_window_minimized(event)
-            else:
-                logger.warning(
-                    f"Ignoring unknown hook event type '{type(event).__name__}'"
-                )
+            self.handle_event(event)
 
+        self.finish_event_loop()
         logger.info("event loop ended")
-
-
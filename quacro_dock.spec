@@ -31,7 +31,8 @@ a = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[
-        "asyncio",
+        # asyncio (and socket, select which it depends on) are kept
+        # for the optional asyncio event loop mode
         "argparse",
         "getopt",
         "multiprocessing",
@@ -44,9 +45,6 @@ a = Analysis(
         "hashlib",
         "pkg_resources",
         "xml",
-        "socket",
-        "_socket",
-        "select",
         "setuptools",
         "distutils",
         "tracemalloc",
@@ -2,26 +2,39 @@ import logging
 import threading
 import os
 import sys
+import traceback
+import typing
 
-from quacro import quacro_pywebview_inject
+from quacro.quacro_startup import timeline
 
-# inject before `import webview`
-quacro_pywebview_inject.inject()
+with timeline.phase("import pywebview"):
+    from quacro import quacro_pywebview_inject
 
-import webview
-from infi.systray import SysTrayIcon
+    # inject before `import webview`
+    quacro_pywebview_inject.inject()
 
-from quacro import (
-    quacro_logging,
-    quacro_app_data,
-    quacro_c_utils,
-    quacro_win32,
-    quacro_window_manager,
-    quacro_config,
-    quacro_i18n,
-)
-from quacro.quacro_errors import ConfigError
-from quacro.quacro_i18n import _
+    import webview
+
+if typing.TYPE_CHECKING:
+    # imported when the tray icon is created, after the first dock is ready
+    from infi.systray import SysTrayIcon
+
+with timeline.phase("import quacro"):
+    from quacro import (
+        quacro_logging,
+        quacro_app_data,
+        quacro_c_utils,
+        quacro_win32,
+        quacro_window_manager,
+        quacro_config,
+        quacro_i18n,
+        quacro_metrics,
+        quacro_tracing,
+        quacro_instrumentation,
+        quacro_ipc,
+    )
+    from quacro.quacro_errors import ConfigError
+    from quacro.quacro_i18n import _
 
 quacro_logging.setup_log_config()
 
@@ -38,9 +51,11 @@ if getattr(sys, "frozen", False):
 
 logger.debug(f"Process started, PID:{os.getpid()}")
 
-quacro_i18n.init()
+with timeline.phase("i18n"):
+    quacro_i18n.init()
 
-dll_abi_version = quacro_c_utils.get_dll_abi_version()
+with timeline.phase("abi check"):
+    dll_abi_version = quacro_c_utils.get_dll_abi_version()
 script_abi_version = quacro_c_utils.SCRIPT_ABI_VERSION
 if dll_abi_version!=script_abi_version:
     raise RuntimeError(
@@ -62,11 +77,13 @@ else:
         f"Failed to acquire single instance lock, return code: {result}"
     )
 
-quacro_app_data.extract_hook_proc_dll()
-quacro_c_utils.load_hook_proc_dll(quacro_app_data.HP_DLL_PATH)
+with timeline.phase("extract hook proc dll"):
+    quacro_app_data.extract_hook_proc_dll()
+    quacro_c_utils.load_hook_proc_dll(quacro_app_data.HP_DLL_PATH)
 
 try:
-    cfg = quacro_config.Config.load_config("quacro_config.toml")
+    with timeline.phase("load config"):
+        cfg = quacro_config.Config.load_config("quacro_config.toml")
 except ConfigError as err:
     logger.error(f"Error when load config: {err}")
     # todo:i18n
@@ -87,51 +104,148 @@ except ConfigError as err:
     )
     sys.exit()
 
-window_manager = quacro_window_manager.WindowManager(
-    *window_filter_config
-)
+try:
+    dock_key = cfg.load_dock_key_config(window_filter_config[0])
+except ConfigError as err:
+    logger.error(f"Error when load dock key config: {err}")
+    # todo:i18n
+    quacro_win32.fatal_msgbox(
+        f"Invalid dock key config:\n"
+        f"In 'quacro_config.toml', [dock_key]:\n{err}"
+    )
+    sys.exit()
+
+if cfg.shared_renderer:
+    logger.info("Docks share one WebView2 renderer process")
+    quacro_pywebview_inject.enable_shared_renderer()
+
+quacro_instrumentation.configure(cfg.metrics_enabled, cfg.tracing_enabled)
+quacro_tracing.configure(cfg.trace_buffer_size)
+quacro_ipc.event_pool.enabled = cfg.event_free_list
+
+with timeline.phase("create window manager"):
+    window_manager = quacro_window_manager.WindowManager(
+        *window_filter_config,
+        dock_key,
+        cfg,
+    )
 
 dock_manager = window_manager.dock_manager
 
-def on_quit(systray: SysTrayIcon):
-    quacro_c_utils.send_stop_event()
+if cfg.event_loop_mode=="asyncio":
+    from quacro import quacro_async_event_loop
+    async_runner = quacro_async_event_loop.AsyncEventLoopRunner(
+        window_manager,
+        cfg.slow_handler_threshold,
+        cfg.handler_timeout,
+    )
+else:
+    async_runner = None
+
+def on_quit(systray: "SysTrayIcon|None"):
+    window_manager.transport.send_stop()
+    if window_manager.watchdog is not None:
+        window_manager.watchdog.stop()
+    if async_runner is not None:
+        async_runner.stop()
     dock_manager.quit()
-    systray.shutdown(join=False)
+    quacro_app_data.cache_store.close()
+    if systray is not None:
+        systray.shutdown(join=False)
 
-tray_menu_options = (
-    (_["tray_menu.quit"], None, on_quit),
-)
+def on_diagnostics(systray: "SysTrayIcon"):
+    if not quacro_instrumentation.enabled:
+        quacro_win32.info_msgbox(_["diagnostics.disabled"])
+        return
+    messages = []
+    if quacro_tracing.enabled:
+        try:
+            span_count = quacro_tracing.dump(quacro_app_data.TRACE_DUMP_PATH)
+        except Exception:
+            logger.error(f"Unable to dump trace:\n{traceback.format_exc()}")
+        else:
+            logger.info(f"Trace dumped to '{quacro_app_data.TRACE_DUMP_PATH}'")
+            messages.append(_(
+                "diagnostics.trace_dumped",
+                path=os.path.abspath(quacro_app_data.TRACE_DUMP_PATH),
+                count=span_count,
+            ))
+    if quacro_metrics.enabled:
+        try:
+            snapshot = quacro_metrics.dump_json(quacro_app_data.METRICS_DUMP_PATH)
+        except Exception:
+            logger.error(f"Unable to dump metrics:\n{traceback.format_exc()}")
+        else:
+            logger.info(f"Metrics dumped to '{quacro_app_data.METRICS_DUMP_PATH}'")
+            messages.append(_(
+                "diagnostics.metrics_dumped",
+                path=os.path.abspath(quacro_app_data.METRICS_DUMP_PATH),
+                summary=quacro_metrics.format_summary(snapshot),
+            ))
+    if messages:
+        quacro_win32.info_msgbox("\n\n".join(messages))
 
-tray_icon = SysTrayIcon(
-    "", # left icon unset
-    "QuacroDock",
-    tray_menu_options
-)
+tray_icon: "SysTrayIcon|None" = None
 
-# set the tray icon as the exe icon
-tray_icon._hicon = quacro_win32.get_exe_hicon()
+def start_tray_icon():
+    global tray_icon
+    from infi.systray import SysTrayIcon
 
-event_loop_thread = threading.Thread(
-    target=window_manager.event_loop
-)
+    tray_menu_options = (
+        (_["tray_menu.diagnostics"], None, on_diagnostics),
+        (_["tray_menu.quit"], None, on_quit),
+    )
 
-hook_event_forwarder_thread = threading.Thread(
-    target=window_manager.forward_hook_event,
-)
+    tray_icon = SysTrayIcon(
+        "", # left icon unset
+        "QuacroDock",
+        tray_menu_options
+    )
+
+    # set the tray icon as the exe icon
+    tray_icon._hicon = quacro_win32.get_exe_hicon()
+    tray_icon.start()
+
+if async_runner is not None:
+    # the hook events are forwarded by a task in the asyncio loop
+    event_loop_thread = threading.Thread(
+        target=async_runner.run
+    )
+    hook_event_forwarder_thread = None
+else:
+    event_loop_thread = threading.Thread(
+        target=window_manager.event_loop
+    )
+    hook_event_forwarder_thread = threading.Thread(
+        target=window_manager.forward_hook_event,
+    )
 
 def start_threads_after_webview_init():
-    dock_manager.pre_created_dock.dom_loaded.wait(timeout=5)
+    with timeline.phase("webview init"):
+        dock_manager.pre_created_dock.dom_loaded.wait(timeout=5)
+    if window_manager.watchdog is not None:
+        logger.debug("Starting the watchdog thread")
+        window_manager.watchdog.start()
     logger.debug("Starting the event loop thread")
     event_loop_thread.start()
-    if not window_manager.event_loop_ready.wait(timeout=5):
+    with timeline.phase("enumerate windows"):
+        ready = window_manager.event_loop_ready.wait(timeout=5)
+    if not ready:
         on_quit(tray_icon)
         raise TimeoutError("Timeout waiting for event loop thread ready")
-    logger.debug("Starting the hook event forwader thread")
-    hook_event_forwarder_thread.start()
+    if hook_event_forwarder_thread is not None:
+        logger.debug("Starting the hook event forwader thread")
+        hook_event_forwarder_thread.start()
+    timeline.mark("first dock ready")
     logger.info("All threads started")
 
-logger.debug("Starting tray icon thread")
-tray_icon.start()
+    # the tray icon is not needed before the first dock appears
+    logger.debug("Starting tray icon thread")
+    with timeline.phase("start tray icon"):
+        start_tray_icon()
+    timeline.finish(
+        quacro_app_data.STARTUP_TIMELINE_PATH if cfg.startup_timeline_json else None
+    )
 
 logger.debug("Starting webview")
 webview.start(
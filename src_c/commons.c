@@ -15,7 +15,11 @@
 
 typedef struct {
     int32_t event_type;
+    // assigned for every event, including the dropped ones
+    uint32_t sequence;
     HWND hwnd;
+    // QueryPerformanceCounter ticks when the hook got the message
+    int64_t timestamp;
     union data {
         // Used by EVENT_TYPE_MOVESIZE
         RECT rect;
@@ -24,16 +28,43 @@ typedef struct {
             BOOL inactive;
             BOOL minimized;
         };
-        
+        // Used by EVENT_TYPE_ICON_TITLE_UPDATE
+        struct icon_title_info{
+            BOOL icon_changed;
+            BOOL title_changed;
+        };
     };
 } IPCQueueItem;
 
 #define IPC_QUEUE_MAX_SIZE 256
 
+// Written by python, see InterestTable in quacro_ipc.py
+#define INTEREST_TABLE_BITS 10
+#define INTEREST_TABLE_SIZE (1<<INTEREST_TABLE_BITS)
+#define FIBONACCI_HASH_MULTIPLIER 2654435761u
+
+typedef struct{
+    // seqlock, odd while python is writing the table
+    volatile LONG version;
+    // when 0 every event is sent
+    volatile uint32_t enabled;
+    // bit (1<<event_type): events sent for every window
+    uint32_t always_mask;
+    // bit (1<<event_type): events sent for the tracked windows only
+    uint32_t tracked_mask;
+    volatile LONG filtered_count;
+    // low 32 bits of the tracked hwnds, 0 for empty slots
+    uint32_t slots[INTEREST_TABLE_SIZE];
+} InterestTable;
+
 typedef struct{
     uint16_t queue_size;
     uint16_t queue_tail_ind;
+    uint32_t next_sequence;
+    // events dropped because the queue was full
+    uint32_t dropped_count;
     IPCQueueItem queue_buffer[IPC_QUEUE_MAX_SIZE];
+    InterestTable interest_table;
 } IPCArea;
 
 #define SHARE_MEM_SIZE sizeof(IPCArea)
@@ -95,6 +126,6 @@ typedef struct{
     uint16_t micro;
 } ABIVersion;
 
-const ABIVersion quacro_abi_version = {0,0,2};
+const ABIVersion quacro_abi_version = {0,0,6};
 
 typedef void (*get_version_fp)(uint16_t *major, uint16_t *minor, uint16_t *micro);
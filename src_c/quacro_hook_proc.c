@@ -26,13 +26,72 @@ BOOL WINAPI DllMain(HINSTANCE hinstDLL, DWORD fdwReason, LPVOID lpvReserved)
     UNREFERENCED_PARAMETER(lpvReserved);
 }
 
+BOOL interest_table_contains(InterestTable *table, HWND hwnd) {
+    // hwnd values only use the low 32 bits, even on 64bit windows
+    uint32_t key = (uint32_t)(uintptr_t)hwnd;
+    uint32_t index = (key*FIBONACCI_HASH_MULTIPLIER)>>(32-INTEREST_TABLE_BITS);
+    for (int i=0;i<INTEREST_TABLE_SIZE;i++) {
+        uint32_t slot = table->slots[index];
+        if (slot==key) {
+            return TRUE;
+        }
+        if (slot==0) {
+            return FALSE;
+        }
+        index = (index+1)&(INTEREST_TABLE_SIZE-1);
+    }
+    return FALSE;
+}
+
+BOOL is_event_wanted(int32_t event_type, HWND hwnd) {
+    InterestTable *table = &ipc_area->interest_table;
+    LONG version = table->version;
+    MemoryBarrier();
+    if ((version&1) || !table->enabled) {
+        // being written or disabled, send everything
+        return TRUE;
+    }
+    uint32_t bit = 1u<<event_type;
+    BOOL wanted;
+    if (table->always_mask&bit) {
+        wanted = TRUE;
+    }
+    else if (!(table->tracked_mask&bit)) {
+        wanted = FALSE;
+    }
+    else {
+        wanted = interest_table_contains(table, hwnd);
+    }
+    MemoryBarrier();
+    if (table->version!=version) {
+        // changed while reading
+        return TRUE;
+    }
+    return wanted;
+}
+
 int put_hook_event(IPCQueueItem *event) {
     uint16_t queue_head_ind;
+    LARGE_INTEGER timestamp;
+
+    // checked before taking the mutex, most events are not wanted
+    if (!is_event_wanted(event->event_type, event->hwnd)) {
+        InterlockedIncrement(&ipc_area->interest_table.filtered_count);
+        return 0;
+    }
+
+    QueryPerformanceCounter(&timestamp);
+    event->timestamp = timestamp.QuadPart;
+
     DWORD result = WaitForSingleObject(ipc_queue_mutex, INFINITE);
     if (result!=WAIT_OBJECT_0) {
         return -1;
     }
+    // take a sequence number even if the event is dropped,
+    // so the reader can find the gap
+    event->sequence = ipc_area->next_sequence++;
     if (ipc_area->queue_size==IPC_QUEUE_MAX_SIZE) {
+        ipc_area->dropped_count+=1;
         ReleaseMutex(ipc_queue_mutex);
         return -1;
     }
@@ -104,6 +163,8 @@ __declspec(dllexport) LRESULT CALLBACK hook_proc(int nCode, WPARAM wParam, LPARA
         case WM_SETTEXT:
             event.event_type = EVENT_TYPE_ICON_TITLE_UPDATE;
             event.hwnd = pMsg->hwnd;
+            event.icon_changed = pMsg->message==WM_SETICON;
+            event.title_changed = pMsg->message==WM_SETTEXT;
             put_hook_event(&event);
             break;
         case WM_SIZE:
@@ -11,6 +11,8 @@ __declspec(dllexport) int event_queue_init();
 __declspec(dllexport) void event_queue_deinit();
 __declspec(dllexport) int wait_for_hook_event(IPCQueueItem* event);
 __declspec(dllexport) void send_stop_event();
+__declspec(dllexport) uint32_t get_dropped_event_count();
+__declspec(dllexport) InterestTable* get_interest_table();
 __declspec(dllexport) void get_abi_version(uint16_t *major, uint16_t *minor, uint16_t *micro);
 __declspec(dllexport) int load_hook_proc_dll(WCHAR *hook_proc_dll_path);
 __declspec(dllexport) int setup_hook();
@@ -65,6 +67,11 @@ __declspec(dllexport) int event_queue_init() {
     }
     ipc_area->queue_size=0;
     ipc_area->queue_tail_ind=0;
+    ipc_area->next_sequence=0;
+    ipc_area->dropped_count=0;
+    // the table may be left by the last run, python enables it when ready
+    ipc_area->interest_table.enabled=0;
+    ipc_area->interest_table.filtered_count=0;
 
     // setup STOP event
     stop_event = CreateEvent(NULL, FALSE, FALSE, NULL);
@@ -139,6 +146,20 @@ __declspec(dllexport) int wait_for_hook_event(IPCQueueItem* event) {
     return -1;
 }
 
+__declspec(dllexport) uint32_t get_dropped_event_count() {
+    if (!event_queue_ready) {
+        return 0;
+    }
+    return ipc_area->dropped_count;
+}
+
+__declspec(dllexport) InterestTable* get_interest_table() {
+    if (!event_queue_ready) {
+        return NULL;
+    }
+    return &ipc_area->interest_table;
+}
+
 __declspec(dllexport) void send_stop_event() {
     if (event_queue_ready){
         SetEvent(stop_event);
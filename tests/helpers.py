@@ -0,0 +1,8 @@
+from quacro.quacro_ipc import IPCQueueItem
+
+def make_item(event_type:int, hwnd:int=0x10010) -> IPCQueueItem:
+    """A hook event record as written by the hook"""
+    item = IPCQueueItem()
+    item.event_type = event_type
+    item.hwnd = hwnd
+    return item
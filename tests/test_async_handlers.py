@@ -0,0 +1,114 @@
+import asyncio
+
+from quacro.quacro_async_event_loop import AsyncEventLoopRunner, AsyncEventQueue
+from quacro.quacro_events import Event
+
+class EventAsync(Event):
+    __slots__ = ("released",)
+
+    def __init__(self):
+        super().__init__()
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+class EventSync(Event):
+    __slots__ = ()
+
+class FakeWindowManager:
+    """The part of a WindowManager the runner uses to handle events"""
+
+    def __init__(self):
+        self.event_queue = AsyncEventQueue()
+        self.async_event_handlers = {}
+        self.handled = []
+
+    def handle_event(self, event:Event):
+        self.handled.append(event)
+
+def make_runner(handler, handler_timeout:float=1.0) -> AsyncEventLoopRunner:
+    window_manager = FakeWindowManager()
+    window_manager.async_event_handlers[EventAsync] = handler
+    return AsyncEventLoopRunner(
+        window_manager, # type: ignore
+        slow_handler_threshold=1.0,
+        handler_timeout=handler_timeout,
+    )
+
+def test_async_handler_does_not_block_the_next_event():
+    results = []
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        results.append(event)
+
+    async def main():
+        runner = make_runner(handler)
+        async_event = EventAsync()
+        sync_event = EventSync()
+        runner.handle_event(async_event)
+        runner.handle_event(sync_event)
+        # the sync event is handled while the async handler waits
+        assert runner.window_manager.handled==[sync_event]
+        assert results==[]
+        await asyncio.gather(*runner.handler_tasks)
+        assert results==[async_event]
+        assert async_event.released
+        assert not runner.handler_tasks
+
+    asyncio.run(main())
+
+def test_async_handler_is_cancelled_after_the_timeout(caplog):
+    cancelled = []
+    async def handler(event):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(event)
+            raise
+
+    async def main():
+        runner = make_runner(handler, handler_timeout=0.01)
+        event = EventAsync()
+        runner.handle_event(event)
+        await asyncio.gather(*runner.handler_tasks)
+        assert cancelled==[event]
+        assert event.released
+
+    asyncio.run(main())
+    assert "timed out after 0.01s, cancelled" in caplog.text
+
+def test_async_handler_error_is_logged(caplog):
+    async def handler(event):
+        raise ValueError("broken handler")
+
+    async def main():
+        runner = make_runner(handler)
+        event = EventAsync()
+        runner.handle_event(event)
+        await asyncio.gather(*runner.handler_tasks)
+        assert event.released
+
+    asyncio.run(main())
+    assert "broken handler" in caplog.text
+
+def test_handler_tasks_are_cancelled_on_shutdown():
+    cancelled = []
+    async def handler(event):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(event)
+            raise
+
+    async def main():
+        runner = make_runner(handler, handler_timeout=10)
+        events = [EventAsync(), EventAsync()]
+        for event in events:
+            runner.handle_event(event)
+        await asyncio.sleep(0)
+        await runner.cancel_handler_tasks()
+        assert set(cancelled)==set(events)
+        assert all(event.released for event in events)
+
+    asyncio.run(main())
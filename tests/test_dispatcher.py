@@ -0,0 +1,50 @@
+import queue
+import threading
+
+from quacro.quacro_dispatcher import Dispatcher, EventBlockingCallDone
+
+def make_dispatcher(max_pending:int) -> tuple[Dispatcher, queue.SimpleQueue]:
+    event_queue: queue.SimpleQueue = queue.SimpleQueue()
+    return Dispatcher(event_queue, max_workers=1, max_pending=max_pending), event_queue
+
+def test_calls_over_max_pending_are_rejected():
+    dispatcher, event_queue = make_dispatcher(max_pending=2)
+    release = threading.Event()
+    try:
+        assert dispatcher.run_blocking(release.wait, callback=lambda _: None)
+        # queued behind the running call, still pending
+        assert dispatcher.run_blocking(release.wait, callback=lambda _: None)
+        assert not dispatcher.run_blocking(release.wait, callback=lambda _: None)
+        assert dispatcher.pending_count()==2
+    finally:
+        release.set()
+    for _ in range(2):
+        assert isinstance(event_queue.get(timeout=5), EventBlockingCallDone)
+    assert dispatcher.pending_count()==0
+    assert dispatcher.run_blocking(lambda: 1, callback=lambda _: None)
+    assert event_queue.get(timeout=5).result==1
+    dispatcher.shutdown()
+
+def test_skipped_key_does_not_take_a_slot():
+    dispatcher, event_queue = make_dispatcher(max_pending=2)
+    release = threading.Event()
+    try:
+        assert dispatcher.run_blocking(release.wait, callback=lambda _: None, key="reload")
+        assert not dispatcher.run_blocking(release.wait, callback=lambda _: None, key="reload")
+        assert dispatcher.pending_count()==1
+    finally:
+        release.set()
+    event_queue.get(timeout=5)
+    assert dispatcher.pending_count()==0
+    assert dispatcher.in_flight==set()
+    dispatcher.shutdown()
+
+def test_errors_free_the_slot():
+    dispatcher, event_queue = make_dispatcher(max_pending=1)
+    def fail():
+        raise OSError("process is gone")
+    assert dispatcher.run_blocking(fail)
+    event = event_queue.get(timeout=5)
+    assert isinstance(event.error, OSError)
+    assert dispatcher.pending_count()==0
+    dispatcher.shutdown()
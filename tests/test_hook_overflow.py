@@ -0,0 +1,110 @@
+from quacro.quacro_ipc import (
+    EVENT_TYPE_CREATE_WINDOW,
+    EVENT_TYPE_DESTROY_WINDOW,
+    SEQUENCE_MASK,
+    EventCreateWindow,
+    EventDestroyWindow,
+    SequenceTracker,
+)
+from quacro.quacro_events import EventStop
+from quacro.quacro_transport import MmapRingTransport
+
+from tests.helpers import make_item
+
+def open_transport(capacity:int=8) -> MmapRingTransport:
+    transport = MmapRingTransport(capacity=capacity, poll_interval=0)
+    transport.open()
+    return transport
+
+def drain(transport:MmapRingTransport) -> list:
+    """Read the pending events, the stop flag is only set until they are read"""
+    transport.send_stop()
+    events = []
+    while not isinstance(event := transport.wait_event(), EventStop):
+        events.append(event)
+    transport.ring.header.stop = 0
+    return events
+
+def test_sequence_tracker_counts_gaps():
+    tracker = SequenceTracker()
+    assert tracker.observe(10)==0
+    assert tracker.observe(11)==0
+    assert tracker.observe(15)==3
+    assert tracker.observe(16)==0
+    assert tracker.missing_total==3
+    assert tracker.take_missing()==3
+    assert tracker.take_missing()==0
+
+def test_sequence_tracker_wraps_around():
+    tracker = SequenceTracker()
+    tracker.observe(SEQUENCE_MASK-1)
+    assert tracker.observe(SEQUENCE_MASK)==0
+    assert tracker.observe(0)==0
+    assert tracker.observe(1)==0
+    # SEQUENCE_MASK-1 -> 2 skips SEQUENCE_MASK, 0 and 1
+    tracker.observe(SEQUENCE_MASK-1)
+    assert tracker.observe(2)==3
+
+def test_sequence_tracker_reset_forgets_the_last_sequence():
+    tracker = SequenceTracker()
+    tracker.observe(5)
+    tracker.reset()
+    assert tracker.observe(100)==0
+    assert tracker.take_missing()==0
+
+def test_overflowing_producer_requests_one_resync():
+    transport = open_transport(capacity=8)
+    try:
+        producer = transport.producer()
+        items = [make_item(EVENT_TYPE_CREATE_WINDOW, hwnd) for hwnd in range(1, 13)]
+        assert producer.put_batch(items)==8
+        assert transport.dropped_count()==4
+
+        events = drain(transport)
+        assert [event.hwnd for event in events]==list(range(1, 9))
+        # the gap is only seen once the producer puts after the overflow
+        assert transport.sequence_tracker.take_missing()==0
+
+        assert producer.put(make_item(EVENT_TYPE_DESTROY_WINDOW, 3))
+        (event,) = drain(transport)
+        assert isinstance(event, EventDestroyWindow)
+        # the forwarder queues an EventResync when there are missing events
+        assert transport.sequence_tracker.take_missing()==4
+        assert transport.sequence_tracker.take_missing()==0
+        assert transport.sequence_tracker.missing_total==4
+    finally:
+        transport.close()
+
+def test_no_resync_without_overflow():
+    transport = open_transport(capacity=8)
+    try:
+        producer = transport.producer()
+        for round_ in range(5):
+            items = [
+                make_item(EVENT_TYPE_CREATE_WINDOW, round_*8+hwnd) for hwnd in range(8)
+            ]
+            assert producer.put_batch(items)==8
+            assert all(isinstance(event, EventCreateWindow) for event in drain(transport))
+        assert transport.dropped_count()==0
+        assert transport.sequence_tracker.take_missing()==0
+    finally:
+        transport.close()
+
+def test_ring_counters_and_sequence_wrap_around():
+    transport = open_transport(capacity=8)
+    try:
+        # views of the mmap are not kept, so that it can be closed
+        transport.ring.header.head = SEQUENCE_MASK-2
+        transport.ring.header.tail = SEQUENCE_MASK-2
+        transport.ring.header.next_sequence = SEQUENCE_MASK-2
+        producer = transport.producer()
+        items = [make_item(EVENT_TYPE_CREATE_WINDOW, hwnd) for hwnd in range(1, 7)]
+        assert producer.put_batch(items)==6
+        assert transport.ring.size()==6
+        assert transport.ring.header.head==3
+        assert [event.hwnd for event in drain(transport)]==list(range(1, 7))
+        assert transport.ring.header.tail==3
+        assert transport.ring.header.next_sequence==3
+        assert transport.sequence_tracker.take_missing()==0
+    finally:
+        transport.close()
@@ -0,0 +1,174 @@
+import itertools
+
+from quacro.quacro_ipc import (
+    EVENT_TYPE_CREATE_WINDOW,
+    EVENT_TYPE_DESTROY_WINDOW,
+    EVENT_TYPE_MOVE_SIZE,
+    EVENT_TYPE_ACTIVATE,
+    EVENT_TYPE_MINIMIZED,
+    FIBONACCI_HASH_MULTIPLIER,
+    INTEREST_TABLE_BITS,
+    INTEREST_TABLE_MAX_ITEMS,
+    INTEREST_TABLE_SIZE,
+    InterestTable,
+    InterestTableWriter,
+    encode_interest_slots,
+    event_mask,
+    interest_slot,
+    interest_table_wants,
+)
+from quacro.quacro_transport import MmapRingTransport
+
+from tests.helpers import make_item
+
+ALWAYS_MASK = event_mask(EVENT_TYPE_CREATE_WINDOW, EVENT_TYPE_DESTROY_WINDOW)
+TRACKED_MASK = event_mask(EVENT_TYPE_MOVE_SIZE, EVENT_TYPE_ACTIVATE)
+
+def colliding_hwnds(slot:int, count:int) -> list[int]:
+    return list(itertools.islice(
+        (hwnd for hwnd in itertools.count(1) if interest_slot(hwnd)==slot), count
+    ))
+
+def attached_writer(hwnds=()) -> tuple[InterestTableWriter, InterestTable]:
+    writer = InterestTableWriter(ALWAYS_MASK, TRACKED_MASK)
+    writer.update(hwnds)
+    table = InterestTable()
+    writer.attach(table)
+    return writer, table
+
+def test_interest_slot_is_a_fibonacci_hash_of_the_low_32_bits():
+    for hwnd in (1, 0x10086, 0x7FFFFFFF, 0xFFFFFFFF):
+        expected = ((hwnd*FIBONACCI_HASH_MULTIPLIER)&0xFFFFFFFF)>>(32-INTEREST_TABLE_BITS)
+        assert interest_slot(hwnd)==expected
+        assert 0<=interest_slot(hwnd)<INTEREST_TABLE_SIZE
+    assert interest_slot(0x1_0000_1234)==interest_slot(0x1234)
+
+def test_encode_probes_linearly_on_collisions():
+    hwnds = colliding_hwnds(5, 3)
+    slots = encode_interest_slots(hwnds)
+    assert slots[5:8]==hwnds
+    assert sum(1 for slot in slots if slot)==3
+
+def test_encode_probe_wraps_around_the_end():
+    hwnds = colliding_hwnds(INTEREST_TABLE_SIZE-1, 2)
+    slots = encode_interest_slots(hwnds)
+    assert slots[INTEREST_TABLE_SIZE-1]==hwnds[0]
+    assert slots[0]==hwnds[1]
+    _, table = attached_writer(hwnds)
+    for hwnd in hwnds:
+        assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, hwnd)
+
+def test_encode_skips_null_and_duplicate_keys():
+    slots = encode_interest_slots([0, 0x1_0000_0000, 42, 42])
+    assert sum(1 for slot in slots if slot)==1
+
+def test_insert_and_remove_keep_the_probe_chains():
+    first, second, third = colliding_hwnds(100, 3)
+    writer, table = attached_writer([first, second, third])
+    for hwnd in (first, second, third):
+        assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, hwnd)
+
+    # removing the head of a chain must not hide the keys probed after it
+    writer.update([second, third])
+    assert not interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, first)
+    assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, second)
+    assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, third)
+    # the table is rebuilt on every update, no tombstone is left behind
+    assert table.slots[100]==second
+    assert table.slots[102]==0
+
+def test_masks_select_always_and_tracked_events():
+    tracked = 0x1234
+    _, table = attached_writer([tracked])
+    untracked = next(
+        hwnd for hwnd in itertools.count(1)
+        if hwnd!=tracked and table.slots[interest_slot(hwnd)]==0
+    )
+    for hwnd in (tracked, untracked):
+        assert interest_table_wants(table, EVENT_TYPE_CREATE_WINDOW, hwnd)
+        assert interest_table_wants(table, EVENT_TYPE_DESTROY_WINDOW, hwnd)
+    assert interest_table_wants(table, EVENT_TYPE_ACTIVATE, tracked)
+    assert not interest_table_wants(table, EVENT_TYPE_ACTIVATE, untracked)
+    # in neither mask
+    assert not interest_table_wants(table, EVENT_TYPE_MINIMIZED, tracked)
+
+def test_full_table_is_disabled_and_sends_everything():
+    writer, table = attached_writer(range(1, INTEREST_TABLE_MAX_ITEMS+1))
+    assert not writer.overflowed
+    assert table.enabled
+
+    writer.update(range(1, INTEREST_TABLE_MAX_ITEMS+2))
+    assert writer.overflowed
+    assert not table.enabled
+    assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, 0xDEAD_BEEF)
+
+    writer.update(range(1, 10))
+    assert not writer.overflowed
+    assert table.enabled
+    assert not interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, 0xDEAD_BEEF)
+
+def test_disabled_or_detached_table_sends_everything():
+    assert interest_table_wants(InterestTable(), EVENT_TYPE_MOVE_SIZE, 1)
+    writer, table = attached_writer([1])
+    writer.detach()
+    assert not table.enabled
+    assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, 2)
+    # updates while detached are written on the next attach
+    writer.update([2])
+    writer.attach(table)
+    assert interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, 2)
+    assert not interest_table_wants(table, EVENT_TYPE_MOVE_SIZE, 1)
+
+class RecordingSlots(list):
+    """Records the seqlock version seen while the slots are written"""
+    def __init__(self, owner):
+        super().__init__([0]*INTEREST_TABLE_SIZE)
+        self.owner = owner
+        self.versions = []
+
+    def __setitem__(self, index, value):
+        self.versions.append(self.owner.version)
+        super().__setitem__(index, value)
+
+class RecordingTable:
+    def __init__(self):
+        self.version = 0
+        self.enabled = 0
+        self.always_mask = 0
+        self.tracked_mask = 0
+        self.filtered_count = 0
+        self.slots = RecordingSlots(self)
+
+def test_seqlock_version_is_odd_while_writing():
+    writer = InterestTableWriter(ALWAYS_MASK, TRACKED_MASK)
+    table = RecordingTable()
+    writer.attach(table)
+    writer.update([1, 2, 3])
+    assert table.slots.versions==[1, 3]
+    assert table.version==4
+
+    # unchanged hwnds are not written again
+    writer.update([3, 2, 1])
+    assert table.version==4
+
+def test_producer_counts_events_filtered_at_the_source():
+    transport = MmapRingTransport(capacity=8, poll_interval=0)
+    transport.open()
+    try:
+        writer = InterestTableWriter(ALWAYS_MASK, TRACKED_MASK)
+        writer.update([7])
+        writer.attach(transport.interest_table())
+        producer = transport.producer()
+        items = [
+            make_item(EVENT_TYPE_MOVE_SIZE, 7),
+            make_item(EVENT_TYPE_MOVE_SIZE, 8),
+            make_item(EVENT_TYPE_ACTIVATE, 9),
+            make_item(EVENT_TYPE_CREATE_WINDOW, 9),
+        ]
+        assert producer.put_batch(items)==2
+        assert writer.filtered_count()==2
+        # filtered events don't take a sequence number, so they are not missing
+        assert transport.ring.header.next_sequence==2
+        writer.detach()
+    finally:
+        transport.close()
@@ -0,0 +1,167 @@
+import collections
+
+import pytest
+
+try:
+    # needs the win32 modules and quacro_utils.dll
+    from quacro import quacro_c_utils, quacro_window_manager
+except (ImportError, OSError) as err:
+    pytest.skip(f"win32 runtime not available: {err}", allow_module_level=True)
+
+from quacro.quacro_dispatcher import EventBlockingCallDone
+from quacro.quacro_dock_keys import SingleDockKey
+from quacro.quacro_event_queue import LaneEventQueue
+from quacro.quacro_ipc import EventCreateWindow
+from quacro.quacro_transport import MmapRingTransport
+from quacro.quacro_window_group import WindowGrup
+from quacro.quacro_window_manager import EventResync, WindowManager
+
+DOCK_HWND = 0x500
+
+class AcceptAll:
+    name = "accept_all"
+
+    def test(self, hwnd:int) -> bool:
+        return True
+
+class FakeDockManager:
+    dock_key = SingleDockKey({}, {})
+
+    def is_dock_window(self, hwnd:int) -> bool:
+        return hwnd==DOCK_HWND
+
+    def identify_window_key(self, hwnd:int, verdicts=None):
+        return self.dock_key.identify(hwnd, verdicts)
+
+class InlineDispatcher:
+    """Runs the blocking calls on the calling thread"""
+
+    def run_blocking(self, fn, *args, callback=None, errback=None, key=None):
+        result = fn(*args)
+        if callback is not None:
+            callback(result)
+        return True
+
+class LimitedDispatcher:
+    """Holds the blocking calls until `finish_one`, `max_pending` at most"""
+
+    def __init__(self, max_pending:int):
+        self.max_pending = max_pending
+        self.calls = []
+
+    def run_blocking(self, fn, *args, callback=None, errback=None, key=None):
+        if len(self.calls)>=self.max_pending:
+            return False
+        self.calls.append((fn, args, callback))
+        return True
+
+    def finish_one(self, manager:WindowManager):
+        fn, args, callback = self.calls.pop(0)
+        manager.on_blocking_call_done(EventBlockingCallDone(callback, None, fn(*args), None))
+
+def make_window_manager(windows:set[int]) -> WindowManager:
+    """A WindowManager without docks, tracking `windows` in one group"""
+    group = WindowGrup("windows")
+    group.filters = [AcceptAll()] # type: ignore
+    group.only_filter_when_window_created = True
+    group.current_windows = set(windows)
+
+    manager = WindowManager.__new__(WindowManager)
+    manager.window_groups = {group.name: group}
+    manager.zero_level_groups = [group]
+    manager.primary_group = group
+    manager.all_windows = set(windows)
+    manager.dock_manager = FakeDockManager() # type: ignore
+    manager.dispatcher = InlineDispatcher() # type: ignore
+    manager.classifying = {}
+    manager.classified_keys = {}
+    manager.classify_backlog = collections.OrderedDict()
+    return manager
+
+@pytest.fixture
+def toplevel_windows(monkeypatch) -> set[int]:
+    """The windows reported by the stubbed `enum_toplevel_window`"""
+    windows: set[int] = set()
+    def enum_toplevel_window(callback):
+        for hwnd in sorted(windows):
+            callback(hwnd)
+        return 0
+    monkeypatch.setattr(quacro_c_utils, "enum_toplevel_window", enum_toplevel_window)
+    monkeypatch.setattr(quacro_c_utils, "enum_toplevel_window_callback", lambda fn: fn)
+    return windows
+
+def test_missing_events_queue_one_resync():
+    transport = MmapRingTransport(capacity=8, poll_interval=0)
+    manager = WindowManager.__new__(WindowManager)
+    manager.transport = transport
+    manager.event_queue = LaneEventQueue()
+
+    manager.queue_hook_event(EventCreateWindow(1))
+    assert manager.event_queue.qsize()==1
+
+    transport.sequence_tracker.observe(10)
+    transport.sequence_tracker.observe(14)
+    manager.queue_hook_event(EventCreateWindow(2))
+    manager.queue_hook_event(EventCreateWindow(3))
+    events = [manager.event_queue.get_nowait() for _ in range(4)]
+    # the resync runs after the event that found the gap, and only once
+    assert [type(event) for event in events]==[
+        EventCreateWindow, EventCreateWindow, EventResync, EventCreateWindow
+    ]
+    assert manager.event_queue.qsize()==0
+
+def test_resync_adds_missed_windows_and_removes_stale_ones(toplevel_windows):
+    manager = make_window_manager({0x100, 0x200, 0x300})
+    # 0x100 was destroyed and 0x400 created while the ring overflowed
+    toplevel_windows.update({0x200, 0x300, 0x400, DOCK_HWND})
+
+    manager.on_resync(EventResync())
+
+    assert manager.all_windows=={0x200, 0x300, 0x400}
+    assert manager.primary_group.current_windows=={0x200, 0x300, 0x400}
+    assert manager.classifying=={}
+    assert manager.classified_keys=={}
+
+def test_resync_drops_stale_window_being_classified(toplevel_windows):
+    manager = make_window_manager({0x100})
+    manager.all_windows.add(0x200)
+    manager.classifying[0x200] = EventCreateWindow(0x200)
+    toplevel_windows.add(0x100)
+
+    manager.on_resync(EventResync())
+
+    assert manager.all_windows=={0x100}
+    assert manager.classifying=={}
+    assert manager.primary_group.current_windows=={0x100}
+
+def test_resync_without_changes_keeps_the_windows(toplevel_windows):
+    manager = make_window_manager({0x100, 0x200})
+    toplevel_windows.update({0x100, 0x200})
+
+    manager.on_resync(EventResync())
+
+    assert manager.all_windows=={0x100, 0x200}
+    assert manager.primary_group.current_windows=={0x100, 0x200}
+
+def test_resync_burst_waits_in_the_classify_backlog(toplevel_windows):
+    manager = make_window_manager(set())
+    dispatcher = LimitedDispatcher(max_pending=1)
+    manager.dispatcher = dispatcher # type: ignore
+    toplevel_windows.update({0x100, 0x200, 0x300})
+
+    manager.on_resync(EventResync())
+
+    assert len(dispatcher.calls)==1
+    assert len(manager.classify_backlog)==2
+    assert manager.classifying.keys()=={0x100, 0x200, 0x300}
+
+    # destroyed before the dispatcher had room
+    (waiting, _) = manager.classify_backlog
+    toplevel_windows.discard(waiting)
+    manager.on_resync(EventResync())
+    assert waiting not in manager.classify_backlog
+
+    while dispatcher.calls:
+        dispatcher.finish_one(manager)
+    assert not manager.classify_backlog
+    assert manager.primary_group.current_windows=={0x100, 0x200, 0x300}-{waiting}
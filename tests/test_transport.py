@@ -0,0 +1,160 @@
+import ctypes
+import mmap
+import random
+
+import pytest
+
+from quacro.quacro_events import EventStop
+from quacro.quacro_ipc import (
+    EVENT_TYPE_STOP,
+    EVENT_TYPE_CREATE_WINDOW,
+    EVENT_TYPE_DESTROY_WINDOW,
+    EVENT_TYPE_MOVE_SIZE,
+    EVENT_TYPE_ACTIVATE,
+    EVENT_TYPE_ICON_TITLE_UPDATE,
+    EVENT_TYPE_MINIMIZED,
+    EventActivate,
+    EventCreateWindow,
+    EventDestroyWindow,
+    EventIconTitleUpdate,
+    EventMinimized,
+    EventMoveSize,
+    IPCQueueItem,
+    decode_event,
+)
+from quacro.quacro_transport import (
+    MmapRing,
+    MmapRingProducer,
+    MmapRingTransport,
+    mmap_ring_size,
+)
+
+from tests.helpers import make_item
+
+def read_until_stop(transport:MmapRingTransport) -> list:
+    transport.send_stop()
+    events = []
+    while not isinstance(event := transport.wait_event(), EventStop):
+        events.append(event)
+    return events
+
+def test_every_event_type_round_trips():
+    move = make_item(EVENT_TYPE_MOVE_SIZE)
+    move.data.rect.left, move.data.rect.top = -1920, -8
+    move.data.rect.right, move.data.rect.bottom = 1280, 720
+    activate = make_item(EVENT_TYPE_ACTIVATE)
+    activate.data.activate_info.inactive = 1
+    icon_title = make_item(EVENT_TYPE_ICON_TITLE_UPDATE)
+    icon_title.data.icon_title_info.title_changed = 1
+    items = [
+        make_item(EVENT_TYPE_CREATE_WINDOW, 1),
+        make_item(EVENT_TYPE_DESTROY_WINDOW, 2),
+        move,
+        activate,
+        icon_title,
+        make_item(EVENT_TYPE_MINIMIZED, 0xFFFF_FFFF),
+    ]
+    transport = MmapRingTransport(capacity=8, poll_interval=0)
+    transport.open()
+    try:
+        assert transport.producer().put_batch(items)==len(items)
+        events = read_until_stop(transport)
+    finally:
+        transport.close()
+
+    assert [type(event) for event in events]==[
+        EventCreateWindow,
+        EventDestroyWindow,
+        EventMoveSize,
+        EventActivate,
+        EventIconTitleUpdate,
+        EventMinimized,
+    ]
+    assert [event.hwnd for event in events]==[item.hwnd for item in items]
+    assert events[2].rect==(-1920, -8, 1280, 720)
+    assert (events[3].inactive, events[3].minimized)==(True, False)
+    assert (events[4].icon_changed, events[4].title_changed)==(False, True)
+    # timestamps of the mmap producer are perf_counter_ns
+    assert all(event.hook_ns>0 for event in events)
+    assert transport.sequence_tracker.missing_total==0
+
+def test_file_backed_ring_is_shared_with_another_mapping(tmp_path):
+    path = str(tmp_path/"ring")
+    transport = MmapRingTransport(path=path, capacity=4, poll_interval=0)
+    transport.open()
+    try:
+        # a producer with its own mapping, as the hook in another process
+        with open(path, "r+b") as ring_file:
+            buffer = mmap.mmap(ring_file.fileno(), mmap_ring_size(4))
+            ring = MmapRing(buffer, 4)
+            MmapRingProducer(ring).put_batch(
+                [make_item(EVENT_TYPE_CREATE_WINDOW, hwnd) for hwnd in (5, 6)]
+            )
+            ring.release()
+            buffer.close()
+        assert [event.hwnd for event in read_until_stop(transport)]==[5, 6]
+    finally:
+        transport.close()
+
+def test_ring_capacity_is_checked():
+    buffer = mmap.mmap(-1, mmap_ring_size(8))
+    with pytest.raises(ValueError):
+        MmapRing(buffer, 6)
+    ring = MmapRing(buffer, 8)
+    ring.release()
+    # the capacity is stored in the header by the first mapping
+    with pytest.raises(ValueError):
+        MmapRing(buffer, 4)
+    buffer.close()
+
+def test_truncated_buffers_are_rejected():
+    with pytest.raises(ValueError):
+        MmapRing(mmap.mmap(-1, mmap_ring_size(8)-1), 8)
+    record = bytes(ctypes.sizeof(IPCQueueItem))
+    IPCQueueItem.from_buffer_copy(record)
+    with pytest.raises(ValueError):
+        IPCQueueItem.from_buffer_copy(record[:-1])
+
+def test_unknown_event_type_is_an_error():
+    assert isinstance(decode_event(make_item(EVENT_TYPE_STOP), 1), EventStop)
+    for event_type in (-1, EVENT_TYPE_MINIMIZED+1, 0x7FFF_FFFF):
+        with pytest.raises(OSError):
+            decode_event(make_item(event_type), 1)
+
+def test_garbage_records_decode_or_raise_oserror():
+    rng = random.Random(20261019)
+    size = ctypes.sizeof(IPCQueueItem)
+    decoded = 0
+    for _ in range(5000):
+        record = bytearray(rng.randbytes(size))
+        if rng.random()<0.5:
+            # keep the event type valid so that the payloads are decoded
+            record[0:4] = rng.randrange(EVENT_TYPE_MINIMIZED+1).to_bytes(4, "little")
+        item = IPCQueueItem.from_buffer_copy(record)
+        try:
+            event = decode_event(item, rng.choice((1, 10_000_000, 1_000_000_000)))
+        except OSError:
+            continue
+        decoded += 1
+        if not isinstance(event, EventStop):
+            assert event.hwnd==item.hwnd
+    assert decoded>0
+
+def test_consumer_reads_a_batch_before_the_stop():
+    transport = MmapRingTransport(capacity=16, poll_interval=0)
+    transport.open()
+    try:
+        producer = transport.producer()
+        producer.put_batch([make_item(EVENT_TYPE_CREATE_WINDOW, hwnd) for hwnd in range(1, 11)])
+        transport.send_stop()
+        assert transport.wait_event().hwnd==1
+        # the whole batch has been copied out, the slots are free again
+        assert transport.ring.size()==0
+        assert producer.put_batch(
+            [make_item(EVENT_TYPE_CREATE_WINDOW, hwnd) for hwnd in range(11, 27)]
+        )==16
+        events = [transport.wait_event() for _ in range(25)]
+        assert [event.hwnd for event in events]==list(range(2, 27))
+        assert isinstance(transport.wait_event(), EventStop)
+    finally:
+        transport.close()
@@ -164,10 +164,16 @@ class Tab {
 
         this.element.onmouseenter = (event) => {
             this.mouse_hovering = true;
+            this.container.push_context_menu();
         }
 
         this.element.onmouseleave = (event) => {
             this.mouse_hovering = false;
+            this.container.push_context_menu();
+        }
+
+        this.element.oncontextmenu = (event) => {
+            this.container.right_clicked_tab_id = this.tab_id;
         }
     }
 
@@ -191,7 +197,16 @@ class TabList{
         this.tab_id_map = new Map();
         this.tab_activated = null;
         this.dragging_tab = null;
-        this.last_menued_tab = null;
+        // tab id of the menu model pushed to the backend
+        this.pushed_menu_tab_id = undefined;
+        // js api calls may arrive out of order, the backend keeps the latest push
+        this.menu_push_seq = 0;
+        // tab under the last right click, menu commands for other tabs are stale
+        this.right_clicked_tab_id = null;
+        window.addEventListener("contextmenu", (event) => {
+            // capture phase, runs before the handler of the clicked tab
+            this.right_clicked_tab_id = null;
+        }, true);
     }    
 
     create_tab(tab_name, tab_id) {
@@ -219,6 +234,9 @@ class TabList{
         }
         this.element.removeChild(to_be_del_tab.element);
         this.tab_id_map.delete(tab_id);
+        if (to_be_del_tab.mouse_hovering) {
+            this.push_context_menu();
+        }
     }
 
     activate_tab(tab_id) {
@@ -231,65 +249,94 @@ class TabList{
     }
 
     get_context_menu() {
-        // Called by python backend
+        // Called by python backend, when the menu model is not pushed yet
         for(const tab of this.tab_id_map.values()) {
             if (tab.mouse_hovering) {
-                this.last_menued_tab = tab
-                return [
-                    MENU_ITEM_KEY_CLOSE,
-                    MENU_ITEM_KEY_CLOSE_OTHERS,
-                    MENU_ITEM_KEY_CLOSE_ALL,
-                    null,
-                    MENU_ITEM_KEY_RELAOD_ICON_TITLE
-                ];
+                return {
+                    tab_id: tab.tab_id,
+                    items: [
+                        MENU_ITEM_KEY_CLOSE,
+                        MENU_ITEM_KEY_CLOSE_OTHERS,
+                        MENU_ITEM_KEY_CLOSE_ALL,
+                        null,
+                        MENU_ITEM_KEY_RELAOD_ICON_TITLE
+                    ]
+                };
             }
         }
         return null;
     }
 
-    execute_menu_item_cmd(menu_key) {
+    push_context_menu() {
+        // push the menu model when the hovered tab changes,
+        // so the backend doesn't call get_context_menu on right click
+        let menu = this.get_context_menu();
+        let tab_id = menu===null ? null : menu.tab_id;
+        if (tab_id===this.pushed_menu_tab_id) {
+            return;
+        }
+        this.pushed_menu_tab_id = tab_id;
+        this.menu_push_seq += 1;
+        pywebview.api.api_set_context_menu(this.menu_push_seq, menu);
+    }
+
+    execute_menu_item_cmd(menu_key, tab_id) {
         // Called by python backend
-        if (this.last_menued_tab===null) {
+        if (!this.tab_id_map.has(tab_id)) {
+            return;
+        }
+        if (tab_id!==this.right_clicked_tab_id) {
+            console.warn(`Ignoring menu command of tab ${tab_id}, tab ${this.right_clicked_tab_id} was right clicked`);
             return;
         }
         switch(menu_key) {
             case MENU_ITEM_KEY_CLOSE:
-                this.request_close_tab(this.last_menued_tab.tab_id);
+                this.request_close_tab(tab_id);
                 break;
             case MENU_ITEM_KEY_CLOSE_ALL:
-                for(const tab_id of Array.from(this.tab_id_map.keys())) {
-                    this.request_close_tab(tab_id);
+                for(const other_tab_id of Array.from(this.tab_id_map.keys())) {
+                    this.request_close_tab(other_tab_id);
                 }
                 break;
             case MENU_ITEM_KEY_CLOSE_OTHERS:
-                for(const tab_id of Array.from(this.tab_id_map.keys())) {
-                    if(tab_id===this.last_menued_tab.tab_id) {
+                for(const other_tab_id of Array.from(this.tab_id_map.keys())) {
+                    if(other_tab_id===tab_id) {
                         continue;
                     }
-                    this.request_close_tab(tab_id);
+                    this.request_close_tab(other_tab_id);
                 }
                 break;
             case MENU_ITEM_KEY_RELAOD_ICON_TITLE:
-                this.request_get_icon(this.last_menued_tab.tab_id);
-                this.request_get_title(this.last_menued_tab.tab_id);
+                this.request_get_icon(tab_id);
+                this.request_get_title(tab_id);
                 break;
 
         }
-        this.last_menued_tab = null;
+    }
+
+    update_tab_title(tab_id, title) {
+        // Called by python backend
+        let tab = this.tab_id_map.get(tab_id);
+        if(tab!==undefined) {
+            tab.update_title(title);
+        }
     }
 
     request_get_icon(tab_id) {
         pywebview.api.api_get_icon(tab_id).then(result => {
-            if(result) {
-                this.tab_id_map.get(tab_id).update_icon(result);
+            // the tab may be removed before the result arrives
+            let tab = this.tab_id_map.get(tab_id);
+            if(result&&tab!==undefined) {
+                tab.update_icon(result);
             }
         })
     }
 
     request_get_title(tab_id) {
         pywebview.api.api_get_title(tab_id).then(result => {
-            if(result) {
-                this.tab_id_map.get(tab_id).update_title(result);
+            let tab = this.tab_id_map.get(tab_id);
+            if(result&&tab!==undefined) {
+                tab.update_title(result);
             }
         })
     }